@@ -4,7 +4,8 @@ set -euo pipefail
 PROJECT_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 cd "$PROJECT_ROOT"
 
-INIT_PROMPT_FILE="${INIT_PROMPT_FILE:-init_prompt.md}"
+# All settings (env var, then harness.conf, then default) from one python3 call
+eval "$(python3 -m scripts.config export --shell)"
 
 if [[ ! -f "$INIT_PROMPT_FILE" ]]; then
   echo "ERROR: Prompt-Datei nicht gefunden: $INIT_PROMPT_FILE"
@@ -18,6 +19,7 @@ fi
 
 echo "==> Starte Codex Initializer (YOLO, ohne Sandbox/Landlock)…"
 
-codex exec \
+$CODEX_BIN exec \
   --yolo \
+  ${CODEX_MODEL:+--model "$CODEX_MODEL"} \
   "$(cat "$INIT_PROMPT_FILE")"
@@ -0,0 +1,8 @@
+#!/usr/bin/env bash
+# Parallel cycles on isolated git worktrees (see scripts/parallel.py)
+set -euo pipefail
+
+PROJECT_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+cd "$PROJECT_ROOT"
+
+python3 -m scripts.parallel "$@"
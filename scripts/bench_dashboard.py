@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Load Test for the Dashboard Server
+Generates large synthetic fixtures, starts scripts/dashboard.py against them
+and drives concurrent clients through every /api/* route.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+
+DASHBOARD = Path(__file__).resolve().parent / "dashboard.py"
+CATEGORIES = ["Auth", "Dashboard", "Settings", "API", "Search", "Billing", "Admin", "UI"]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _git(root: Path, *args: str, stdin: str | None = None) -> str:
+    result = subprocess.run(
+        ["git", *args], cwd=root, input=stdin, capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+# -----------------------------
+# Fixtures
+# -----------------------------
+
+def write_feature_list(root: Path, count: int, rng: random.Random) -> None:
+    tests = []
+    for i in range(count):
+        category = CATEGORIES[i % len(CATEGORIES)]
+        tests.append({
+            "category": category,
+            "description": f"{category} feature {i}: user can complete workflow step {rng.randint(1, 50)}",
+            "steps": [f"Step {s}: open page {rng.randint(1, 200)} and verify result" for s in range(1, 6)],
+            "passes": rng.random() < 0.6,
+        })
+    (root / "feature_list.json").write_text(json.dumps({"tests": tests}, indent=2), encoding="utf-8")
+
+
+def write_metrics(root: Path, lines: int, rng: random.Random) -> None:
+    start = datetime.now() - timedelta(minutes=15 * lines)
+    failing = lines // 4 + 10
+    with (root / "harness_metrics.jsonl").open("w", encoding="utf-8") as f:
+        for i in range(1, lines + 1):
+            success = rng.random() < 0.85
+            progress = 1 if success and failing > 0 and rng.random() < 0.3 else 0
+            entry = {
+                "timestamp": (start + timedelta(minutes=15 * i)).isoformat(),
+                "iteration": i,
+                "duration_secs": round(rng.uniform(60, 1800), 2),
+                "success": success,
+                "failing_before": failing,
+                "failing_after": failing - progress,
+                "progress": progress,
+                "timeout": not success and rng.random() < 0.3,
+                "error_msg": None if success else "exit_code_1",
+                "prompt_version": "a3f2b91c",
+            }
+            failing -= progress
+            f.write(json.dumps(entry) + "\n")
+
+
+def write_logs(root: Path, count: int, large_log_mb: int, rng: random.Random) -> list[str]:
+    log_dir = root / "logs"
+    log_dir.mkdir(exist_ok=True)
+    names = []
+    line = "codex: working on feature, running command and checking output " * 2 + "\n"
+    for i in range(1, count + 1):
+        name = f"cycle_{i}_20260101T{i % 24:02d}{i % 60:02d}00.log"
+        (log_dir / name).write_text(line * rng.randint(10, 2000), encoding="utf-8")
+        names.append(name)
+    if large_log_mb > 0:
+        name = f"cycle_{count + 1}_20260102T000000.log"
+        block = (line * 1024).encode()
+        with (log_dir / name).open("wb") as f:
+            for _ in range(large_log_mb * 1024 * 1024 // len(block) + 1):
+                f.write(block)
+        names.append(name)
+    return names
+
+
+def write_git_repo(root: Path, commits: int, tags: int) -> None:
+    _git(root, "init", "-q")
+    _git(root, "config", "user.email", "bench@example.invalid")
+    _git(root, "config", "user.name", "bench")
+    (root / ".gitignore").write_text("logs/\nharness_metrics.jsonl\n", encoding="utf-8")
+    _git(root, "add", ".gitignore", "feature_list.json")
+    _git(root, "commit", "-q", "-m", "baseline")
+    for i in range(1, commits):
+        _git(root, "commit", "-q", "--allow-empty", "-m", f"[FEAT] synthetic change {i}")
+    head = _git(root, "rev-parse", "HEAD")
+    refs = "".join(
+        f"create refs/tags/checkpoint-iter-{i}-passing-{i * 3} {head}\n" for i in range(1, tags + 1)
+    )
+    _git(root, "update-ref", "--stdin", stdin=refs)
+
+
+def build_fixtures(root: Path, args: argparse.Namespace) -> list[str]:
+    rng = random.Random(args.seed)
+    root.mkdir(parents=True, exist_ok=True)
+    print(f"==> Generating fixtures in {root}")
+    write_feature_list(root, args.tests, rng)
+    write_metrics(root, args.metrics_lines, rng)
+    log_names = write_logs(root, args.logs, args.large_log_mb, rng)
+    write_git_repo(root, args.commits, args.tags)
+    return log_names
+
+
+# -----------------------------
+# Server & measurement
+# -----------------------------
+
+def _rss_kb(pid: int) -> dict[str, int]:
+    """Current and peak resident set size of a process from /proc (Linux only)."""
+    values = {}
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            key, _, rest = line.partition(":")
+            if key in ("VmRSS", "VmHWM"):
+                values[key] = int(rest.split()[0])
+    except (OSError, ValueError):
+        pass
+    return {"rss_kb": values.get("VmRSS", 0), "peak_rss_kb": values.get("VmHWM", 0)}
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _request(base: str, route: dict[str, Any]) -> float:
+    body = json.dumps(route["body"]).encode() if "body" in route else None
+    req = urllib.request.Request(base + route["path"], data=body, headers=route.get("headers", {}))
+    if body is not None:
+        req.add_header("Content-Type", "application/json")
+    start = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        resp.read()
+    return time.perf_counter() - start
+
+
+def bench_route(base: str, route: dict[str, Any], clients: int, duration: float, pid: int) -> dict[str, Any]:
+    # The first request pays for index builds and cold caches
+    try:
+        cold_ms = round(_request(base, route) * 1000, 2)
+    except (urllib.error.URLError, OSError):
+        cold_ms = None
+
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client() -> None:
+        nonlocal errors
+        local: list[float] = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            try:
+                local.append(_request(base, route))
+            except (urllib.error.URLError, OSError):
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors += local_errors
+
+    peak = {"rss_kb": 0}
+    stop = threading.Event()
+
+    def sampler() -> None:
+        while not stop.is_set():
+            peak["rss_kb"] = max(peak["rss_kb"], _rss_kb(pid)["rss_kb"])
+            stop.wait(0.1)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    sample_thread = threading.Thread(target=sampler)
+    started = time.perf_counter()
+    sample_thread.start()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    sample_thread.join()
+
+    latencies.sort()
+    return {
+        "path": route["path"],
+        "method": "POST" if "body" in route else "GET",
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "cold_ms": cold_ms,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p90_ms": round(_percentile(latencies, 90) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        "server_rss_peak_kb": peak["rss_kb"],
+    }
+
+
+def build_routes(log_names: list[str]) -> dict[str, dict[str, Any]]:
+    large_log = log_names[-1]
+    return {
+        "metrics": {"path": "/api/metrics"},
+        "metrics_series": {"path": "/api/metrics/series?points=300"},
+        "status": {"path": "/api/status"},
+        "tests_page": {"path": "/api/tests?status=failing&offset=100&limit=50"},
+        "tests_search": {"path": "/api/tests?q=workflow+page&category=Auth&limit=50"},
+        "git": {"path": "/api/git"},
+        "logs": {"path": "/api/logs"},
+        "log_range": {"path": f"/api/logs/{large_log}", "headers": {"Range": "bytes=-65536"}},
+        "control_get": {"path": "/api/control"},
+        "control_post": {"path": "/api/control", "body": {"action": "resume"}},
+    }
+
+
+def start_dashboard(root: Path, port: int) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, str(DASHBOARD), str(port), str(root)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/api/control", timeout=2).read()
+            return proc
+        except (urllib.error.URLError, OSError):
+            if proc.poll() is not None:
+                raise RuntimeError(f"dashboard exited with code {proc.returncode}")
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("dashboard did not become ready within 30s")
+
+
+def _harness_version() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=DASHBOARD.parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="dashboard-bench-"))
+    try:
+        if args.reuse_fixtures and (workdir / "feature_list.json").exists():
+            log_names = sorted(p.name for p in (workdir / "logs").glob("cycle_*.log"))
+            log_names.sort(key=lambda n: (workdir / "logs" / n).stat().st_size)
+        else:
+            log_names = build_fixtures(workdir, args)
+
+        routes = build_routes(log_names)
+        if args.routes:
+            routes = {name: routes[name] for name in args.routes.split(",")}
+
+        port = args.port or _free_port()
+        proc = start_dashboard(workdir, port)
+        base = f"http://127.0.0.1:{port}"
+        results: dict[str, Any] = {}
+        try:
+            idle = _rss_kb(proc.pid)
+            for name, route in routes.items():
+                print(f"==> {name}: {route['path']}")
+                results[name] = bench_route(base, route, args.clients, args.duration, proc.pid)
+                r = results[name]
+                print(
+                    f"    {r['throughput_rps']} req/s  p50={r['p50_ms']}ms  "
+                    f"p99={r['p99_ms']}ms  errors={r['errors']}"
+                )
+            final = _rss_kb(proc.pid)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+        return {
+            "meta": {
+                "timestamp": datetime.now().isoformat(),
+                "harness_version": _harness_version(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "clients": args.clients,
+                "duration_secs": args.duration,
+                "fixtures": {
+                    "tests": args.tests,
+                    "metrics_lines": args.metrics_lines,
+                    "logs": args.logs,
+                    "large_log_mb": args.large_log_mb,
+                    "commits": args.commits,
+                    "tags": args.tags,
+                },
+            },
+            "server": {"idle_rss_kb": idle["rss_kb"], **final},
+            "routes": results,
+        }
+    finally:
+        if not args.workdir and not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(old_path: str, new_path: str) -> int:
+    """Print per-route deltas between two result files."""
+    old = json.loads(Path(old_path).read_text(encoding="utf-8"))
+    new = json.loads(Path(new_path).read_text(encoding="utf-8"))
+    print(f"{'route':<16} {'rps':>18} {'p50 ms':>20} {'p99 ms':>20}")
+    for name, n in new["routes"].items():
+        o = old["routes"].get(name)
+        if not o:
+            print(f"{name:<16} (new route)")
+            continue
+        cells = [
+            f"{o[key]:>8} → {n[key]:<8}" for key in ("throughput_rps", "p50_ms", "p99_ms")
+        ]
+        print(f"{name:<16} " + " ".join(cells))
+    print(f"peak server RSS: {old['server']['peak_rss_kb']} KB → {new['server']['peak_rss_kb']} KB")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="bench_dashboard.json", help="result file (JSON)")
+    parser.add_argument("--workdir", help="fixture directory (default: temporary, removed afterwards)")
+    parser.add_argument("--reuse-fixtures", action="store_true", help="reuse fixtures already in --workdir")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary fixture directory")
+    parser.add_argument("--tests", type=int, default=10000)
+    parser.add_argument("--metrics-lines", type=int, default=1000000)
+    parser.add_argument("--logs", type=int, default=300)
+    parser.add_argument("--large-log-mb", type=int, default=256)
+    parser.add_argument("--commits", type=int, default=50)
+    parser.add_argument("--tags", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per route")
+    parser.add_argument("--routes", help="comma-separated subset of routes to run")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare)
+
+    result = run(args)
+    Path(args.out).write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+    print(f"✓ Results written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Overhead Benchmark for the Autonomous Codex Harness
+Builds a synthetic project (feature list, source tree, git history), runs
+run_until_green.sh against scripts/fake_codex.py for many simulated cycles
+and reports the harness's own time per iteration by phase, i.e. everything
+except the time the (fake) model spends.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+
+PACKAGE_ROOT = Path(__file__).resolve().parent.parent
+HARNESS_FILES = ["run_until_green.sh", "run_cycle.sh", "coding_prompt.md"]
+CATEGORIES = ["Auth", "Dashboard", "Settings", "API", "Search", "Billing", "Admin", "UI"]
+
+
+def _git(root: Path, *args: str) -> str:
+    result = subprocess.run(["git", *args], cwd=root, capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+# -----------------------------
+# Fixtures
+# -----------------------------
+
+def write_feature_list(root: Path, count: int, rng: random.Random) -> None:
+    tests = []
+    for i in range(count):
+        category = CATEGORIES[i % len(CATEGORIES)]
+        tests.append({
+            "category": category,
+            "description": f"{category} feature {i}: user can complete workflow step {rng.randint(1, 50)}",
+            "steps": [f"Step {s}: open page {rng.randint(1, 200)} and verify result" for s in range(1, 6)],
+            "passes": False,
+        })
+    (root / "feature_list.json").write_text(json.dumps({"tests": tests}, indent=2), encoding="utf-8")
+
+
+def write_sources(root: Path, count: int, file_kb: int, rng: random.Random) -> None:
+    line = "def handler_{n}(request):\n    return {{'status': {s}, 'items': list(range({n}))}}\n\n"
+    for i in range(count):
+        path = root / "src" / f"pkg_{i % 20}" / f"module_{i}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        body = []
+        size = 0
+        while size < file_kb * 1024:
+            chunk = line.format(n=len(body), s=rng.choice((200, 201, 404)))
+            body.append(chunk)
+            size += len(chunk)
+        path.write_text("".join(body), encoding="utf-8")
+
+
+def write_harness(root: Path, overrides: dict[str, str]) -> None:
+    shutil.copytree(PACKAGE_ROOT / "scripts", root / "scripts", ignore=shutil.ignore_patterns("__pycache__"))
+    for name in HARNESS_FILES:
+        shutil.copy2(PACKAGE_ROOT / name, root / name)
+    conf = (PACKAGE_ROOT / "harness.conf").read_text(encoding="utf-8")
+    for key, value in overrides.items():
+        conf, n = re.subn(rf"^{re.escape(key)}=.*$", lambda _: f"{key}={value}", conf, flags=re.MULTILINE)
+        if not n:
+            conf += f"\n{key}={value}\n"
+    (root / "harness.conf").write_text(conf, encoding="utf-8")
+
+
+def build_fixtures(root: Path, args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    root.mkdir(parents=True, exist_ok=True)
+    print(f"==> Generating fixtures in {root}")
+    write_feature_list(root, args.tests, rng)
+    write_sources(root, args.files, args.file_kb, rng)
+    overrides = {
+        "codex_bin": "python3 scripts/fake_codex.py",
+        "push_each_cycle": "0",
+        "sleep_secs": "0",
+        "max_iterations": str(args.cycles),
+        "max_errors": str(args.cycles),
+        "stuck_threshold": str(args.cycles + 1),
+    }
+    for item in args.conf:
+        key, _, value = item.partition("=")
+        overrides[key.strip()] = value.strip()
+    write_harness(root, overrides)
+    (root / "app_spec.txt").write_text("Synthetic benchmark project.\n", encoding="utf-8")
+    (root / ".gitignore").write_text("logs/\nharness_metrics.jsonl\nbench_run.log\n", encoding="utf-8")
+    _git(root, "init", "-q")
+    _git(root, "config", "user.email", "bench@example.invalid")
+    _git(root, "config", "user.name", "bench")
+    _git(root, "add", "-A")
+    _git(root, "commit", "-q", "-m", "baseline")
+    for i in range(1, args.commits):
+        _git(root, "commit", "-q", "--allow-empty", "-m", f"[FEAT] synthetic change {i}")
+
+
+# -----------------------------
+# Run & analysis
+# -----------------------------
+
+def analyze(root: Path, wall_secs: float) -> dict[str, Any]:
+    entries = [json.loads(line) for line in (root / "harness_metrics.jsonl").read_text(encoding="utf-8").splitlines()
+               if line.strip()]
+    try:
+        codex_secs = json.loads((root / ".git" / "fake_codex.json").read_text(encoding="utf-8"))["secs"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        codex_secs = {}
+
+    per_phase: dict[str, list[float]] = {}
+    overhead: list[float] = []
+    for n, entry in enumerate(entries):
+        phases = dict(entry.get("phases", {}))
+        codex = float(codex_secs.get(str(n), 0.0))
+        if "cycle" in phases:
+            # What run_cycle.sh costs besides the model: bash, interpreter, prompt, resource sampling
+            phases["cycle_runner"] = max(0.0, phases.pop("cycle") - codex)
+        for name, secs in phases.items():
+            per_phase.setdefault(name, []).append(secs)
+        overhead.append(sum(phases.values()))
+
+    iterations = len(entries)
+    phase_stats = {}
+    for name, values in per_phase.items():
+        ordered = sorted(values)
+        phase_stats[name] = {
+            # Averaged over all iterations, so phases that only run sometimes (rollback) stay comparable
+            "mean_ms": round(sum(values) / iterations * 1000, 2),
+            "p50_ms": round(_percentile(ordered, 50) * 1000, 2),
+            "p95_ms": round(_percentile(ordered, 95) * 1000, 2),
+            "runs": len(values),
+        }
+    ordered = sorted(overhead)
+    return {
+        "iterations": iterations,
+        "wall_secs": round(wall_secs, 2),
+        "wall_per_iteration_ms": round(wall_secs / iterations * 1000, 2) if iterations else 0.0,
+        "codex_per_iteration_ms": round(sum(float(v) for v in codex_secs.values()) / iterations * 1000, 2)
+        if iterations else 0.0,
+        "overhead_per_iteration_ms": {
+            "mean": round(sum(overhead) / iterations * 1000, 2) if iterations else 0.0,
+            "p50": round(_percentile(ordered, 50) * 1000, 2),
+            "p95": round(_percentile(ordered, 95) * 1000, 2),
+        },
+        "outcomes": {
+            "success": sum(1 for e in entries if e.get("success")),
+            "failed": sum(1 for e in entries if not e.get("success")),
+        },
+        "phases": dict(sorted(phase_stats.items(), key=lambda kv: -kv[1]["mean_ms"])),
+    }
+
+
+def _harness_version() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PACKAGE_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="harness-bench-"))
+    try:
+        build_fixtures(workdir, args)
+        print(f"==> Running {args.cycles} simulated cycles (FAKE_CODEX={args.script!r})")
+        started = time.perf_counter()
+        with (workdir / "bench_run.log").open("wb") as log:
+            rc = subprocess.run(["./run_until_green.sh"], cwd=workdir, stdout=log, stderr=subprocess.STDOUT,
+                                env={**os.environ, "FAKE_CODEX": args.script}).returncode
+        wall = time.perf_counter() - started
+        print(f"    exit code {rc} after {wall:.1f}s (log: {workdir / 'bench_run.log'})")
+        result = analyze(workdir, wall)
+        return {
+            "meta": {
+                "timestamp": datetime.now().isoformat(),
+                "harness_version": _harness_version(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "exit_code": rc,
+                "script": args.script,
+                "conf": args.conf,
+                "fixtures": {
+                    "tests": args.tests,
+                    "files": args.files,
+                    "file_kb": args.file_kb,
+                    "commits": args.commits,
+                    "cycles": args.cycles,
+                },
+            },
+            **result,
+        }
+    finally:
+        if not args.workdir and not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def print_report(result: dict[str, Any]) -> None:
+    overhead = result["overhead_per_iteration_ms"]
+    print(f"==> {result['iterations']} iterations ({result['outcomes']['success']} ok, "
+          f"{result['outcomes']['failed']} failed)")
+    print(f"    wall {result['wall_per_iteration_ms']} ms/iteration, fake codex {result['codex_per_iteration_ms']} ms, "
+          f"harness overhead mean {overhead['mean']} / p50 {overhead['p50']} / p95 {overhead['p95']} ms")
+    print(f"    {'phase':<16} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'runs':>6}")
+    for name, s in result["phases"].items():
+        print(f"    {name:<16} {s['mean_ms']:>9} {s['p50_ms']:>9} {s['p95_ms']:>9} {s['runs']:>6}")
+
+
+def compare(old_path: str, new_path: str) -> int:
+    """Print per-phase deltas between two result files."""
+    old = json.loads(Path(old_path).read_text(encoding="utf-8"))
+    new = json.loads(Path(new_path).read_text(encoding="utf-8"))
+    print(f"{'phase':<16} {'mean ms':>22} {'p95 ms':>22}")
+    for name, n in new["phases"].items():
+        o = old["phases"].get(name)
+        if not o:
+            print(f"{name:<16} (new phase)")
+            continue
+        cells = [f"{o[key]:>9} → {n[key]:<9}" for key in ("mean_ms", "p95_ms")]
+        print(f"{name:<16} " + " ".join(cells))
+    o, n = old["overhead_per_iteration_ms"], new["overhead_per_iteration_ms"]
+    print(f"overhead per iteration: {o['mean']} ms → {n['mean']} ms (p95 {o['p95']} → {n['p95']})")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="bench_harness.json", help="result file (JSON)")
+    parser.add_argument("--workdir", help="fixture directory (default: temporary, removed afterwards)")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary fixture directory")
+    parser.add_argument("--cycles", type=int, default=200, help="simulated cycles (max_iterations)")
+    parser.add_argument("--tests", type=int, default=2000)
+    parser.add_argument("--files", type=int, default=500, help="synthetic source files")
+    parser.add_argument("--file-kb", type=int, default=4)
+    parser.add_argument("--commits", type=int, default=20)
+    parser.add_argument("--script", default="flip:1,edit:2",
+                        help="fake codex behaviour, see scripts/fake_codex.py (e.g. 'flip:1;crash;corrupt')")
+    parser.add_argument("--conf", action="append", default=[], metavar="KEY=VALUE",
+                        help="harness.conf override for the run (repeatable)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare)
+
+    result = run(args)
+    print_report(result)
+    Path(args.out).write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+    print(f"✓ Results written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,113 @@
+"""
+Config for Autonomous Codex Harness
+harness.conf is compiled once per file version into a typed snapshot: every
+key is checked against CONFIG_SCHEMA (type, allowed values, minimum), and
+duplicate or unknown keys are reported instead of silently winning.
+
+    python3 -m scripts.config validate
+    eval "$(python3 -m scripts.config export --shell)"
+"""
 from __future__ import annotations
 
+import json
+import os
+import shlex
+import sys
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Mapping
+
+
+# Env overrides are HARNESS_CONF_<KEY>, so generic names (SERVICES, LOG_DIR, ...) set for
+# something else never reconfigure the harness; HARNESS_<KEY> is taken by per-cycle handoffs
+ENV_PREFIX = "HARNESS_CONF_"
+
+
+@dataclass(frozen=True)
+class Option:
+    default: object
+    aliases: tuple[str, ...] = ()  # documented legacy env vars; the first is also the shell export name
+    choices: tuple[str, ...] = ()
+    minimum: float | None = None
 
+    @property
+    def type(self) -> type:
+        return type(self.default)
 
-DEFAULT_CONFIG: dict[str, object] = {
-    "test_case_limit": 200,
-    "codex_model": "",
-    "cycle_prompt_file": "coding_prompt.md",
-    "init_prompt_file": "init_prompt.md",
-    "max_files": 200,
-    "max_file_bytes": 200000,
-    "max_git_log_lines": 50,
-    "log_level": "INFO",
-    "stuck_threshold": 5,
-    "checkpoint_interval": 10,
-    "use_smart_test_limit": 1,
-    "validate_feature_list": 1,
+
+def env_names(key: str) -> tuple[str, ...]:
+    """Env vars that override ``key``, in order of precedence."""
+    return (ENV_PREFIX + key.upper(), *CONFIG_SCHEMA[key].aliases)
+
+
+CONFIG_SCHEMA: dict[str, Option] = {
+    # Test & feature management
+    "test_case_limit": Option(200, minimum=0),
+    "use_smart_test_limit": Option(True),
+    "validate_feature_list": Option(True),
+    "use_feature_store": Option(True),
+    "feature_store_dir": Option(".feature_store"),
+    # Codex / prompts
+    "codex_bin": Option("codex"),
+    "codex_model": Option(""),
+    "cycle_prompt_file": Option("coding_prompt.md", aliases=("CYCLE_PROMPT_FILE",)),
+    "init_prompt_file": Option("init_prompt.md", aliases=("INIT_PROMPT_FILE",)),
+    # Context building
+    "max_files": Option(200, minimum=0),
+    "max_file_bytes": Option(200000, minimum=0),
+    "max_git_log_lines": Option(50, minimum=0),
+    "context_refresh_cycles": Option(10, minimum=0),
+    "context_drift_ratio": Option(0.25, minimum=0),
+    # Loop
+    "sleep_secs": Option(2.0, aliases=("SLEEP_SECS",), minimum=0),
+    "max_iterations": Option(9999, aliases=("MAX_ITERS",), minimum=1),
+    "max_errors": Option(5, aliases=("MAX_ERRORS",), minimum=0),
+    "cycle_timeout": Option(1800, aliases=("CYCLE_TIMEOUT",), minimum=0),
+    "adaptive_timeout": Option(True),
+    "adaptive_timeout_factor": Option(1.5, minimum=1),
+    "adaptive_timeout_min": Option(600, minimum=1),
+    "adaptive_timeout_max": Option(7200, minimum=1),
+    "adaptive_timeout_samples": Option(5, minimum=1),
+    "stall_timeout": Option(600, minimum=0),
+    "snapshot_keep": Option(20, minimum=0),
+    "stuck_threshold": Option(5, aliases=("STUCK_THRESHOLD",), minimum=1),
+    "resource_sample_secs": Option(1.0, minimum=0),
+    "checkpoint_interval": Option(10, aliases=("CHECKPOINT_INTERVAL",), minimum=0),
+    # Scheduler / sentinels / services / prefetch
+    "scheduler": Option(True),
+    "scheduler_targets": Option(1, minimum=0),
+    "scheduler_retry_penalty": Option(5.0, minimum=0),
+    "scheduler_cost_penalty": Option(2.0, minimum=0),
+    "sentinel": Option(True),
+    "sentinel_file": Option("harness_sentinels.json"),
+    "sentinel_workers": Option(4, minimum=1),
+    "sentinel_timeout": Option(120, minimum=0),
+    "services": Option(True),
+    "services_file": Option("harness_services.json"),
+    "services_keep_running": Option(False),
+    "prefetch": Option(True),
+    "prefetch_warm_files": Option(50, minimum=0),
+    # Parallel cycles
+    "parallel_workers": Option(1, minimum=1),
+    "parallel_shard_strategy": Option("category", choices=("category", "range")),
+    "parallel_worktree_dir": Option(".harness_worktrees"),
+    # Git
+    "push_each_cycle": Option(True, aliases=("PUSH_EACH_CYCLE",)),
+    "push_backoff_max": Option(300, aliases=("PUSH_BACKOFF_MAX",), minimum=1),
+    "push_alert_failures": Option(3, aliases=("PUSH_ALERT_FAILURES",), minimum=1),
+    "push_flush_timeout": Option(60, aliases=("PUSH_FLUSH_TIMEOUT",), minimum=0),
+    "git_remote": Option("origin", aliases=("GIT_REMOTE",)),
+    "git_branch": Option("", aliases=("GIT_BRANCH",)),
+    # Logging
+    "log_dir": Option("logs", aliases=("LOG_DIR",)),
+    "log_level": Option("INFO", aliases=("LOG_LEVEL",), choices=("DEBUG", "INFO", "WARNING", "ERROR")),
 }
 
+DEFAULT_CONFIG: dict[str, object] = {key: option.default for key, option in CONFIG_SCHEMA.items()}
+
+TRUE_VALUES = {"1", "true", "yes", "on"}
+FALSE_VALUES = {"0", "false", "no", "off"}
+
 
 def _parse_value(raw: str) -> object:
     value = raw.strip().strip('"').strip("'")
@@ -34,23 +124,156 @@ def _parse_value(raw: str) -> object:
         return value
 
 
-def load_config(path: str | Path | None = None) -> dict[str, object]:
-    config_path = Path(path) if path else Path("harness.conf")
-    if not config_path.exists():
-        return DEFAULT_CONFIG.copy()
+def _coerce(key: str, raw: str) -> tuple[object, str | None]:
+    """Typed value for ``key`` and an error message if ``raw`` does not fit the schema."""
+    option = CONFIG_SCHEMA.get(key)
+    if option is None:
+        return _parse_value(raw), None
+    value = raw.strip().strip('"').strip("'")
+    if option.type is bool:
+        if value.lower() in TRUE_VALUES | FALSE_VALUES:
+            return value.lower() in TRUE_VALUES, None
+        return option.default, f"{key}={value} is not a boolean (1/0, true/false)"
+    if option.type in (int, float):
+        try:
+            number = option.type(value)
+        except ValueError:
+            return option.default, f"{key}={value} is not {'an integer' if option.type is int else 'a number'}"
+        if option.minimum is not None and number < option.minimum:
+            return option.default, f"{key}={value} is below the minimum {option.minimum:g}"
+        return number, None
+    if option.choices:
+        if key == "log_level":
+            value = value.upper()
+        if value not in option.choices:
+            return option.default, f"{key}={value} is not one of {', '.join(option.choices)}"
+    return value, None
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """harness.conf compiled into typed values, with everything that looked wrong."""
 
-    merged = DEFAULT_CONFIG.copy()
-    for line in config_path.read_text(encoding="utf-8").splitlines():
+    values: Mapping[str, object]
+    warnings: tuple[str, ...]
+    version: tuple[int, int] | None  # (mtime_ns, size) of the file; None without harness.conf
+
+
+def compile_config(text: str, source: str = "harness.conf") -> tuple[dict[str, object], list[str]]:
+    values = DEFAULT_CONFIG.copy()
+    warnings: list[str] = []
+    seen: dict[str, int] = {}
+    for lineno, line in enumerate(text.splitlines(), start=1):
         stripped = line.strip()
         if not stripped or stripped.startswith("#"):
             continue
         if "=" not in stripped:
+            warnings.append(f"{source}:{lineno}: ignoring line without '=': {stripped}")
             continue
         key, raw_value = stripped.split("=", 1)
         key_clean = key.strip()
+        if key_clean in seen:
+            warnings.append(f"{source}:{lineno}: duplicate key {key_clean} (first set on line "
+                            f"{seen[key_clean]}); the last value wins")
+        seen[key_clean] = lineno
+        if key_clean not in CONFIG_SCHEMA:
+            warnings.append(f"{source}:{lineno}: unknown key {key_clean}")
         # Skip if value is empty (allows commenting out by leaving value blank)
         if not raw_value.strip():
             continue
-        merged[key_clean] = _parse_value(raw_value)
+        value, error = _coerce(key_clean, raw_value)
+        if error:
+            warnings.append(f"{source}:{lineno}: {error}; using {value!r}")
+        values[key_clean] = value
+    if values["adaptive_timeout_min"] > values["adaptive_timeout_max"]:
+        warnings.append(f"{source}: adaptive_timeout_min ({values['adaptive_timeout_min']}) is above "
+                        f"adaptive_timeout_max ({values['adaptive_timeout_max']})")
+    return values, warnings
+
+
+_SNAPSHOTS: dict[Path, ConfigSnapshot] = {}
+
+
+def snapshot(path: str | Path | None = None) -> ConfigSnapshot:
+    """Compiled config for ``path``, re-parsed only when the file's mtime or size changes."""
+    config_path = Path(path) if path else Path("harness.conf")
+    try:
+        stat = config_path.stat()
+    except FileNotFoundError:
+        return ConfigSnapshot(DEFAULT_CONFIG.copy(), (), None)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _SNAPSHOTS.get(config_path.resolve())
+    if cached is not None and cached.version == version:
+        return cached
+    values, warnings = compile_config(config_path.read_text(encoding="utf-8"), str(config_path))
+    compiled = ConfigSnapshot(values, tuple(warnings), version)
+    _SNAPSHOTS[config_path.resolve()] = compiled
+    for warning in warnings:
+        print(f"WARNING: {warning}", file=sys.stderr)
+    return compiled
+
+
+def load_config(path: str | Path | None = None) -> dict[str, object]:
+    return dict(snapshot(path).values)
+
+
+def resolve(config: Mapping[str, object], env: Mapping[str, str] | None = None) -> dict[str, object]:
+    """Apply env var overrides on top of ``config`` (env var, then harness.conf, then default).
+
+    Each key is overridden by HARNESS_CONF_<KEY> or, for the settings the
+    old shell loop read, by its legacy name (MAX_ITERS, SLEEP_SECS, ...).
+    """
+    env = os.environ if env is None else env
+    resolved = dict(config)
+    for key in CONFIG_SCHEMA:
+        name = next((n for n in env_names(key) if env.get(n, "") != ""), None)
+        if name is None:
+            continue
+        value, error = _coerce(key, env[name])
+        if error:
+            print(f"WARNING: env {name}: {error}; using {value!r}", file=sys.stderr)
+        resolved[key] = value
+    return resolved
+
+
+def export_shell(config: Mapping[str, object]) -> str:
+    """``NAME=value`` lines for ``eval`` in bash (booleans as 1/0)."""
+    lines = []
+    for key, option in CONFIG_SCHEMA.items():
+        value = config.get(key, option.default)
+        if isinstance(value, bool):
+            value = int(value)
+        name = option.aliases[0] if option.aliases else key.upper()
+        lines.append(f"{name}={shlex.quote(str(value))}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    if len(sys.argv) < 2 or sys.argv[1] not in ("validate", "export"):
+        print("Usage: python3 -m scripts.config <command> [--shell]")
+        print("Commands:")
+        print("  validate        check harness.conf against the schema")
+        print("  export          print the effective settings (env, harness.conf, defaults) as JSON")
+        print("  export --shell  ... as NAME=value lines for: eval \"$(python3 -m scripts.config export --shell)\"")
+        return 1
+
+    compiled = snapshot()
+    if sys.argv[1] == "validate":
+        if compiled.version is None:
+            print("No harness.conf found; using defaults")
+            return 0
+        if compiled.warnings:
+            return 1
+        print("OK")
+        return 0
+
+    config = resolve(compiled.values)
+    if "--shell" in sys.argv[2:]:
+        print(export_shell(config))
+    else:
+        print(json.dumps(config, indent=2))
+    return 0
+
 
-    return merged
+if __name__ == "__main__":
+    sys.exit(main())
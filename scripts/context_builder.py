@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
 import os
 import subprocess
+import sys
+from itertools import islice
 from pathlib import Path
 from typing import Any
 
+from scripts.config import load_config
+from scripts.feature_store import STORE_DIR, FeatureStore, FeatureStoreError
+from scripts.snapshot import Snapshotter, SnapshotError
+
 
 IGNORE_DIRS = {
     ".git",
@@ -18,6 +26,8 @@ IGNORE_DIRS = {
     ".pytest_cache",
     "venv",
     "env",
+    ".harness_worktrees",  # parallel worker checkouts, each a full copy of the repo
+    STORE_DIR,  # index and shards derived from feature_list.json
 }
 
 # File priority for context building
@@ -79,19 +89,39 @@ def _load_feature_list(path: Path, limit: int | None) -> Any:
     return {"tests": limited} if isinstance(data, dict) else limited
 
 
-def get_smart_test_limit(feature_list: dict, default_limit: int) -> int:
+def _current_store(config: dict[str, object]) -> FeatureStore | None:
+    """The feature store, if enabled and in sync with feature_list.json."""
+    if not int(config.get("use_feature_store", 1)):
+        return None
+    store = FeatureStore(str(config.get("feature_store_dir", STORE_DIR)))
+    try:
+        return store if store.in_sync(Path("feature_list.json")) else None
+    except (FeatureStoreError, OSError, ValueError):
+        return None
+
+
+def _load_feature_list_from_store(store: FeatureStore, limit: int | None) -> Any:
+    tests = [test for _, test in islice(store.iter_tests(), limit if limit and limit > 0 else None)]
+    return {"tests": tests} if store.meta["shape"] == "dict" else tests
+
+
+def get_smart_test_limit(feature_list: dict, default_limit: int,
+                         counts: tuple[int, int] | None = None) -> int:
     """Calculate optimal test limit based on failing tests.
     
     If only a few tests fail, we can include more context.
     If many tests fail, we must limit to avoid token overflow.
+    ``counts`` (total, failing) skips the scan when already known.
     """
-    tests = feature_list.get("tests", [])
-    if not tests:
+    if counts is not None:
+        total, failing = counts
+    else:
+        tests = feature_list.get("tests", [])
+        total = len(tests)
+        failing = sum(1 for t in tests if not t.get("passes", False))
+    if not total:
         return default_limit
     
-    total = len(tests)
-    failing = sum(1 for t in tests if not t.get("passes", False))
-    
     # If <=3 tests failing, show more context
     if failing <= 3:
         return min(failing + 5, total, 15)
@@ -115,18 +145,26 @@ def _git_log(max_lines: int) -> str:
         return ""
 
 
-def _collect_repo_files(
-    root: Path, max_files: int, max_file_bytes: int, failing_tests: list[dict] = None
-) -> tuple[list[str], dict[str, str]]:
-    """Collect repository files with smart prioritization based on failing tests."""
-    files: list[str] = []
-    contents: dict[str, str] = {}
-    
-    # First pass: collect all files with priorities
+def harness_dirs(config: dict[str, object]) -> set[str]:
+    """Directories inside the repo that the harness maintains itself, as configured (relative paths)."""
+    return {
+        Path(str(config.get("parallel_worktree_dir", ".harness_worktrees"))).as_posix(),
+        Path(str(config.get("feature_store_dir", STORE_DIR))).as_posix(),
+    }
+
+
+def rank_repo_files(root: Path, failing_tests: list[dict] | None = None,
+                    skip_dirs: set[str] | frozenset[str] = frozenset()) -> list[tuple[str, Path]]:
+    """Repository files as (relative path, path), most relevant to the failing tests first.
+
+    Directories named in IGNORE_DIRS are skipped anywhere, ``skip_dirs``
+    (paths relative to ``root``) only at that location.
+    """
     file_priorities: list[tuple[str, int, Path]] = []
     
     for dirpath, dirnames, filenames in os.walk(root):
-        dirnames[:] = [d for d in dirnames if d not in IGNORE_DIRS]
+        rel_dir = Path(dirpath).relative_to(root)
+        dirnames[:] = [d for d in dirnames if d not in IGNORE_DIRS and (rel_dir / d).as_posix() not in skip_dirs]
         for filename in filenames:
             path = Path(dirpath) / filename
             rel = path.relative_to(root).as_posix()
@@ -137,9 +175,45 @@ def _collect_repo_files(
     
     # Sort by priority (highest first)
     file_priorities.sort(key=lambda x: x[1], reverse=True)
+    return [(rel, path) for rel, _, path in file_priorities]
+
+
+def warm_files(paths: list[Path], max_bytes: int) -> int:
+    """Ask the kernel to read the first ``max_bytes`` of each file into the page cache.
+
+    posix_fadvise(WILLNEED) starts readahead without copying anything into
+    this process; without it (macOS) the bytes are read once. Returns how
+    many files were warmed.
+    """
+    warmed = 0
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fd, 0, max_bytes, os.POSIX_FADV_WILLNEED)
+            else:
+                os.read(fd, max_bytes)
+            warmed += 1
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+    return warmed
+
+
+def _collect_repo_files(
+    root: Path, max_files: int, max_file_bytes: int, failing_tests: list[dict] = None,
+    skip_dirs: set[str] | frozenset[str] = frozenset(),
+) -> tuple[list[str], dict[str, str]]:
+    """Collect repository files with smart prioritization based on failing tests."""
+    files: list[str] = []
+    contents: dict[str, str] = {}
     
-    # Second pass: read files in priority order
-    for rel, priority, path in file_priorities:
+    # Read files in priority order
+    for rel, path in rank_repo_files(root, failing_tests, skip_dirs):
         if len(files) >= max_files:
             break
         
@@ -159,28 +233,38 @@ def build_context(config: dict[str, object]) -> dict[str, object]:
     max_git_log_lines = int(config.get("max_git_log_lines", 50))
     test_case_limit = int(config.get("test_case_limit", 200))
     
-    # Load feature list first to enable smart prioritization
-    feature_list_full = _load_feature_list(Path("feature_list.json"), None)
-    
-    # Get failing tests for prioritization
-    failing_tests = []
-    if feature_list_full and isinstance(feature_list_full, dict):
-        tests = feature_list_full.get("tests", [])
-        failing_tests = [t for t in tests if not t.get("passes", False)]
-    
-    # Calculate smart test limit
-    smart_limit = get_smart_test_limit(
-        feature_list_full if feature_list_full else {},
-        test_case_limit
-    )
+    # Failing tests and counts come from the feature store when it is current,
+    # otherwise from the full feature list
+    store = _current_store(config)
+    if store is not None:
+        # Only the first 10 failing tests are used for prioritization
+        failing_tests = [test for _, test in store.failing(limit=10)]
+        smart_limit = get_smart_test_limit({}, test_case_limit, store.count())
+    else:
+        feature_list_full = _load_feature_list(Path("feature_list.json"), None)
+        
+        # Get failing tests for prioritization
+        failing_tests = []
+        if feature_list_full and isinstance(feature_list_full, dict):
+            tests = feature_list_full.get("tests", [])
+            failing_tests = [t for t in tests if not t.get("passes", False)]
+        
+        # Calculate smart test limit
+        smart_limit = get_smart_test_limit(
+            feature_list_full if feature_list_full else {},
+            test_case_limit
+        )
 
     # Collect files with smart prioritization
     files_list, files_content = _collect_repo_files(
-        root, max_files, max_file_bytes, failing_tests
+        root, max_files, max_file_bytes, failing_tests, harness_dirs(config)
     )
     
     # Load feature list with calculated limit
-    feature_list = _load_feature_list(Path("feature_list.json"), smart_limit)
+    if store is not None:
+        feature_list = _load_feature_list_from_store(store, smart_limit)
+    else:
+        feature_list = _load_feature_list(Path("feature_list.json"), smart_limit)
 
     context: dict[str, object] = {
         "app_spec": Path("app_spec.txt").read_text(encoding="utf-8")
@@ -195,3 +279,261 @@ def build_context(config: dict[str, object]) -> dict[str, object]:
         "git_log": _git_log(max_git_log_lines),
     }
     return context
+
+
+def render_context(context: dict[str, object]) -> str:
+    """Plain-text rendering of a build_context() result, sections in a fixed order."""
+    parts = [
+        "### APP SPEC", str(context["app_spec"]).rstrip(), "",
+        "### FEATURE LIST", json.dumps(context["feature_list"], indent=2), "",
+        "### PROGRESS", str(context["progress"]).rstrip(), "",
+        "### GIT LOG", str(context["git_log"]), "",
+        "### FILES",
+    ]
+    files = context["files"]
+    for rel in context["repo_tree"]:
+        parts.extend([f"--- {rel}", files.get(rel, ""), ""])
+    return "\n".join(parts) + "\n"
+
+
+# -----------------------------
+# Delta context
+# -----------------------------
+
+CONTEXT_STATE_DIR = "context"
+# Config keys the base snapshot depends on; changing one forces a refresh
+SNAPSHOT_KEYS = ("max_files", "max_file_bytes", "max_git_log_lines", "test_case_limit")
+# Bookkeeping the harness commits along with the agent's work; not useful in a diff
+HARNESS_OUTPUTS = ("harness_metrics.jsonl",)
+
+
+def _git_output(*args: str) -> str | None:
+    try:
+        result = subprocess.run(["git", *args], check=False, capture_output=True, text=True)
+    except FileNotFoundError:
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def _truncate(text: str, max_bytes: int) -> str:
+    raw = text.encode("utf-8")
+    if len(raw) <= max_bytes:
+        return text
+    return raw[:max_bytes].decode("utf-8", errors="ignore") + f"\n\n[TRUNCATED: {len(raw) - max_bytes} bytes]"
+
+
+def _test_fingerprint(test: object) -> str:
+    return hashlib.sha1(json.dumps(test, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def _all_tests() -> list[dict]:
+    try:
+        data = _load_feature_list(Path("feature_list.json"), None)
+    except (OSError, ValueError):
+        return []
+    tests = data.get("tests") if isinstance(data, dict) else data
+    return tests if isinstance(tests, list) else []
+
+
+class DeltaContext:
+    """Stable base snapshot plus a small per-cycle delta.
+
+    The base is the full context with files in path order instead of
+    priority order, so its bytes stay identical between refreshes and work
+    as a cacheable prompt prefix. Each build adds only the commits and
+    ``git diff`` since the snapshot's commit and the tests whose entry
+    changed since then. The base is rebuilt every ``context_refresh_cycles``
+    builds, when the delta grows beyond ``context_drift_ratio`` of the base,
+    when the context limits change, or when its commit is no longer an
+    ancestor of HEAD (re-baseline, reset).
+    """
+
+    def __init__(self, config: dict[str, object], state_dir: str | Path | None = None):
+        self.config = config
+        self.state_dir = Path(state_dir) if state_dir else Path(str(config.get("log_dir", "logs"))) / CONTEXT_STATE_DIR
+        self.base_file = self.state_dir / "base.md"
+        self.meta_file = self.state_dir / "base.json"
+        self.refresh_cycles = int(config.get("context_refresh_cycles", 10))
+        self.drift_ratio = float(config.get("context_drift_ratio", 0.25))
+
+    def _limits(self) -> dict[str, object]:
+        return {key: self.config.get(key) for key in SNAPSHOT_KEYS}
+
+    def _load(self) -> tuple[str | None, dict[str, Any] | None]:
+        try:
+            meta = json.loads(self.meta_file.read_text(encoding="utf-8"))
+            base = self.base_file.read_text(encoding="utf-8")
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None, None
+        if len(base.encode("utf-8")) != meta.get("bytes"):
+            return None, None
+        return base, meta
+
+    def _save_meta(self, meta: dict[str, Any]) -> None:
+        self.meta_file.write_text(json.dumps(meta), encoding="utf-8")
+
+    def _skipped(self, path: str) -> bool:
+        """Paths the base never reads (IGNORE_DIRS, logs, harness bookkeeping)."""
+        log_dir = Path(str(self.config.get("log_dir", "logs")))
+        return (path in HARNESS_OUTPUTS or Path(path).is_relative_to(log_dir)
+                or any(part in IGNORE_DIRS for part in Path(path).parts)
+                or any(Path(path).is_relative_to(d) for d in harness_dirs(self.config)))
+
+    def _worktree_tree(self) -> str | None:
+        """The work tree as a git tree, untracked files included, like the base reads it."""
+        try:
+            return Snapshotter().worktree_tree(exclude=self._skipped)
+        except SnapshotError:
+            return None
+
+    def _stale_reason(self, meta: dict[str, Any] | None, head: str) -> str | None:
+        if not head:
+            return "not a git repository"
+        if meta is None:
+            return "no snapshot"
+        if meta.get("limits") != self._limits():
+            return "context limits changed"
+        if self.refresh_cycles > 0 and meta["builds"] >= self.refresh_cycles:
+            return f"{meta['builds']} cycles since the snapshot"
+        if meta["commit"] != head and _git_output("merge-base", "--is-ancestor", meta["commit"], head) is None:
+            return "snapshot commit is not an ancestor of HEAD"
+        if _git_output("cat-file", "-e", meta["tree"]) is None:
+            return "snapshot tree no longer exists"
+        return None
+
+    def refresh(self, head: str | None = None, tests: list[dict] | None = None) -> tuple[str, dict[str, Any]]:
+        """Build a new base snapshot from the current tree."""
+        head = head if head is not None else (_git_output("rev-parse", "HEAD") or "").strip()
+        tests = tests if tests is not None else _all_tests()
+        # The base is read from the work tree; its tree (uncommitted and
+        # untracked files included) is what the next delta diffs against
+        tree = self._worktree_tree() or head
+        context = build_context(self.config)
+        context["repo_tree"] = sorted(context["repo_tree"])
+        base = render_context(context)
+        meta = {
+            "commit": head,
+            "tree": tree,
+            "builds": 0,
+            "limits": self._limits(),
+            "bytes": len(base.encode("utf-8")),
+            "tests": [_test_fingerprint(test) for test in tests],
+        }
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.base_file.write_text(base, encoding="utf-8")
+        self._save_meta(meta)
+        return base, meta
+
+    def delta(self, meta: dict[str, Any], tests: list[dict]) -> str:
+        """Commits, diff and changed tests since the snapshot in ``meta``."""
+        commit = meta["commit"]
+        max_file_bytes = int(self.config.get("max_file_bytes", 200000))
+        lines = [f"### CHANGES SINCE CONTEXT SNAPSHOT ({commit[:10]}, cycle {meta['builds']} since the snapshot)", ""]
+        log = (_git_output("log", "--oneline", f"-{int(self.config.get('max_git_log_lines', 50))}",
+                           f"{commit}..HEAD") or "").strip()
+        if log:
+            lines += ["#### Commits", log, ""]
+        # feature_list.json is summarized per test below instead of as a (large) diff
+        excludes = [f":(exclude){path}" for path in ("feature_list.json", self.config.get("log_dir", "logs"),
+                                                     *HARNESS_OUTPUTS)]
+        # Tree against tree, so files created since the snapshot show up even while untracked
+        current = self._worktree_tree()
+        diff = (_git_output("diff", "--no-color", "--unified=1", meta["tree"], *([current] if current else []),
+                            "--", ".", *excludes) or "").rstrip()
+        if diff:
+            lines += ["#### Diff", _truncate(diff, max_file_bytes), ""]
+
+        base_tests = meta["tests"]
+        changed, now_passing = [], []
+        for i, test in enumerate(tests):
+            if i < len(base_tests) and base_tests[i] == _test_fingerprint(test):
+                continue
+            if test.get("passes", False):
+                now_passing.append(i)
+            else:
+                changed.append({"index": i, **test})
+        if changed:
+            lines += ["#### Failing tests changed since snapshot", json.dumps(changed, indent=2), ""]
+        if now_passing:
+            lines += ["#### Now passing: " + ", ".join(f"#{i}" for i in now_passing), ""]
+        if len(tests) < len(base_tests):
+            lines += [f"#### {len(base_tests) - len(tests)} tests removed from the end of feature_list.json", ""]
+        return "\n".join(lines) + "\n"
+
+    def build(self, report: bool = False) -> dict[str, object]:
+        """Base snapshot and delta for this cycle, refreshing the base if needed.
+
+        With ``report`` the full context is also built once to measure how
+        many prompt bytes the delta saved (everything in a cached, unchanged
+        base counts as saved); that doubles the cost, so it is opt-in.
+        """
+        head = (_git_output("rev-parse", "HEAD") or "").strip()
+        tests = _all_tests()
+        base, meta = self._load()
+        reason = self._stale_reason(meta, head)
+        delta = ""
+        if reason is None:
+            meta["builds"] += 1
+            delta = self.delta(meta, tests)
+            if self.drift_ratio > 0 and len(delta.encode("utf-8")) > self.drift_ratio * meta["bytes"]:
+                reason = f"delta is {len(delta.encode('utf-8')) / meta['bytes']:.0%} of the snapshot"
+        if reason is not None:
+            base, meta = self.refresh(head, tests)
+            delta = ""
+        else:
+            self._save_meta(meta)
+
+        delta_bytes = len(delta.encode("utf-8"))
+        fresh_bytes = delta_bytes + (meta["bytes"] if reason is not None else 0)
+        full_bytes = len(render_context(build_context(self.config)).encode("utf-8")) if report else None
+        stats = {
+            "refreshed": reason is not None,
+            "reason": reason,
+            "base_commit": meta["commit"],
+            "base_bytes": meta["bytes"],
+            "delta_bytes": delta_bytes,
+            "full_bytes": full_bytes,
+            "saved_ratio": round(1 - fresh_bytes / full_bytes, 3) if full_bytes else None,
+        }
+        return {"base": base, "delta": delta, "stats": stats}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build the cycle context (full or as base snapshot + delta)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("full", help="print the full context")
+    p = sub.add_parser("delta", help="print the delta since the base snapshot (refreshing it if needed)")
+    p.add_argument("--base", action="store_true", help="print the base snapshot before the delta")
+    p.add_argument("--stats", action="store_true",
+                   help="only print the byte statistics as JSON (builds the full context once for comparison)")
+    sub.add_parser("refresh", help="rebuild the base snapshot")
+    args = parser.parse_args()
+
+    config = load_config()
+    delta_context = DeltaContext(config)
+    try:
+        if args.command == "full":
+            sys.stdout.write(render_context(build_context(config)))
+            return 0
+        if args.command == "refresh":
+            base, meta = delta_context.refresh()
+            print(f"snapshot at {meta['commit'][:10]}: {meta['bytes']} bytes ({delta_context.base_file})")
+            return 0
+        result = delta_context.build(report=args.stats)
+    except ValueError as e:
+        print(f"ERROR: feature_list.json: {e}", file=sys.stderr)
+        return 1
+    if args.stats:
+        print(json.dumps(result["stats"], indent=2))
+        return 0
+    if args.base:
+        sys.stdout.write(result["base"])
+    sys.stdout.write(result["delta"])
+    stats = result["stats"]
+    print(f"==> base {stats['base_bytes']} bytes ({'refreshed: ' + stats['reason'] if stats['refreshed'] else 'cached'}), "
+          f"delta {stats['delta_bytes']} bytes", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
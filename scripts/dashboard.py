@@ -4,16 +4,646 @@ Dashboard Server for Autonomous Codex Harness
 Provides web-based monitoring and metrics visualization
 """
 
+import cProfile
 import http.server
 import json
 import os
+import random
+import re
 import socketserver
 import subprocess
 import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any
-from urllib.parse import parse_qs, urlparse
+from typing import Any, Callable, Iterator
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+LOG_DIR = Path("logs")
+FEATURE_FILE = Path("feature_list.json")
+TESTS_DEFAULT_LIMIT = 50
+TESTS_MAX_LIMIT = 500
+METRICS_FILE = Path("harness_metrics.jsonl")
+RECENT_CYCLES = 20
+SERIES_DEFAULT_POINTS = 200
+SERIES_MAX_POINTS = 2000
+METRICS_READ_CHUNK = 4 * 1024 * 1024
+PERF_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+PERF_SLOW_LOG = LOG_DIR / "dashboard_slow.jsonl"
+PERF_PROFILE_DIR = LOG_DIR / "dashboard_profiles"
+HARNESS_PID_FILE = LOG_DIR / "harness.pid"
+# Paths with their own latency histogram; everything else (404s, scanners) shares "<other>"
+PERF_ROUTES = {
+    "GET": {"/", "/index.html", "/api/metrics", "/api/metrics/series", "/api/status", "/api/tests", "/api/git",
+            "/api/logs", "/api/services", "/api/control", "/api/_debug/perf"},
+    "POST": {"/api/control"},
+}
+LOG_PREVIEW_LINES = 10
+TAIL_CHUNK_SIZE = 8192
+STREAM_CHUNK_SIZE = 64 * 1024
+FOLLOW_POLL_SECS = 0.5
+FOLLOW_KEEPALIVE_SECS = 15
+LOG_NAME_RE = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.\-]*$")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class PerfRecorder:
+    """Opt-in request instrumentation for the dashboard.
+    
+    Records a latency histogram per route plus the time spent in named spans
+    (subprocess calls, file reads, JSON encoding). Requests slower than the
+    threshold go to a slow-request log; a sampled fraction of requests runs
+    under cProfile so slow ones come with a profile dump.
+    
+    Enable with DASHBOARD_PROFILE=1; DASHBOARD_SLOW_MS and
+    DASHBOARD_PROFILE_SAMPLE tune the threshold and sampling rate.
+    """
+    
+    def __init__(self, enabled: bool = False, slow_ms: float = 500.0, sample_rate: float = 0.1):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profile_lock = threading.Lock()
+        self.routes: dict[str, dict[str, Any]] = {}
+        self.slow: deque[dict[str, Any]] = deque(maxlen=50)
+    
+    @classmethod
+    def from_env(cls) -> "PerfRecorder":
+        def number(name: str, default: float) -> float:
+            try:
+                return float(os.getenv(name) or default)
+            except ValueError:
+                print(f"WARNING: env {name}: invalid number {os.getenv(name)!r}; using {default}", file=sys.stderr)
+                return default
+        
+        return cls(
+            enabled=os.getenv("DASHBOARD_PROFILE", "0") in ("1", "true", "yes"),
+            slow_ms=number("DASHBOARD_SLOW_MS", 500.0),
+            sample_rate=number("DASHBOARD_PROFILE_SAMPLE", 0.1),
+        )
+    
+    @contextmanager
+    def span(self, kind: str) -> Iterator[None]:
+        """Attribute the enclosed time to ``kind`` for the current request."""
+        spans = getattr(self._local, "spans", None)
+        if spans is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            spans[kind] = spans.get(kind, 0.0) + time.perf_counter() - start
+    
+    def mark_streaming(self):
+        """Exclude the current request from slow-request logging."""
+        self._local.streaming = True
+    
+    def measure(self, route: str, path: str, handler: Callable[[], None]):
+        """Run a request handler, recording its latency, spans and profile."""
+        if not self.enabled:
+            handler()
+            return
+        
+        self._local.spans = {}
+        self._local.streaming = False
+        profiler = None
+        # cProfile can only run one profile at a time reliably
+        if random.random() < self.sample_rate and self._profile_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                self._profile_lock.release()
+                profiler = None
+        
+        start = time.perf_counter()
+        try:
+            handler()
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if profiler is not None:
+                profiler.disable()
+                self._profile_lock.release()
+            spans = {k: round(v * 1000, 3) for k, v in self._local.spans.items()}
+            streaming = self._local.streaming
+            self._local.spans = None
+            self._record(route, elapsed_ms, spans)
+            if elapsed_ms >= self.slow_ms and not streaming:
+                self._log_slow(route, path, elapsed_ms, spans, profiler)
+    
+    def _record(self, route: str, elapsed_ms: float, spans: dict[str, float]):
+        with self._lock:
+            stats = self.routes.setdefault(route, {
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "buckets": [0] * (len(PERF_BUCKETS_MS) + 1),
+                "spans_ms": {},
+            })
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            bucket = bisect_left(PERF_BUCKETS_MS, elapsed_ms)
+            stats["buckets"][bucket] += 1
+            for kind, ms in spans.items():
+                stats["spans_ms"][kind] = stats["spans_ms"].get(kind, 0.0) + ms
+    
+    def _log_slow(self, route: str, path: str, elapsed_ms: float, spans: dict[str, float], profiler):
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "route": route,
+            "path": path,
+            "duration_ms": round(elapsed_ms, 2),
+            "spans_ms": spans,
+            "profile": None,
+        }
+        try:
+            PERF_SLOW_LOG.parent.mkdir(parents=True, exist_ok=True)
+            if profiler is not None:
+                PERF_PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+                name = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_")
+                dump = PERF_PROFILE_DIR / f"{datetime.now():%Y%m%dT%H%M%S%f}_{name}.prof"
+                profiler.dump_stats(str(dump))
+                entry["profile"] = str(dump)
+            with PERF_SLOW_LOG.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError:
+            pass
+        with self._lock:
+            self.slow.append(entry)
+    
+    def snapshot(self) -> dict[str, Any]:
+        """Per-route counts, latency quantiles (bucket upper bounds) and span totals."""
+        def quantile(buckets: list[int], count: int, q: float) -> float | None:
+            target = q * count
+            seen = 0
+            for i, n in enumerate(buckets):
+                seen += n
+                if seen >= target:
+                    return PERF_BUCKETS_MS[i] if i < len(PERF_BUCKETS_MS) else None
+            return None
+        
+        with self._lock:
+            routes = {}
+            for route, stats in self.routes.items():
+                count = stats["count"]
+                routes[route] = {
+                    "count": count,
+                    "avg_ms": round(stats["total_ms"] / count, 3),
+                    "max_ms": round(stats["max_ms"], 3),
+                    "p50_ms_le": quantile(stats["buckets"], count, 0.5),
+                    "p99_ms_le": quantile(stats["buckets"], count, 0.99),
+                    "histogram": dict(zip([f"le_{b}" for b in PERF_BUCKETS_MS] + ["inf"], stats["buckets"])),
+                    "spans_ms": {k: round(v, 3) for k, v in stats["spans_ms"].items()},
+                }
+            slow = list(self.slow)
+        return {
+            "enabled": self.enabled,
+            "slow_threshold_ms": self.slow_ms,
+            "profile_sample_rate": self.sample_rate,
+            "routes": routes,
+            "slow_requests": slow,
+        }
+
+
+PERF = PerfRecorder.from_env()
+
+
+def _run_command(cmd: list[str], **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run, attributed to the "subprocess" span when profiling."""
+    with PERF.span("subprocess"):
+        return subprocess.run(cmd, **kwargs)
+
+
+def _route_key(method: str, path: str) -> str:
+    """Collapse per-file paths so every log shares one histogram; unknown paths share "<other>"."""
+    if method == "GET" and path.startswith("/api/logs/"):
+        return f"{method} /api/logs/<name>"
+    if path in PERF_ROUTES.get(method, ()):
+        return f"{method} {path}"
+    return "<other>"
+
+
+def _process_start_time(pid: int) -> int | None:
+    """Start time of ``pid`` (clock ticks since boot), read like scripts/resources.py does."""
+    try:
+        raw = Path(f"/proc/{pid}/stat").read_bytes()
+    except OSError:
+        return None
+    # Fields after "comm)"; comm itself may contain spaces and parentheses
+    return int(raw[raw.rfind(b")") + 2:].split()[19])
+
+
+def _pid_running(pid: int | None, starttime: int | None) -> bool:
+    """Same rule as ServiceSupervisor._alive: with /proc a pid only counts together with its start time."""
+    if not pid:
+        return False
+    if Path("/proc").is_dir():
+        started = _process_start_time(pid)
+        return started is not None and started == starttime
+    try:
+        os.kill(pid, 0)
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _tail_lines(path: Path, n: int, chunk_size: int = TAIL_CHUNK_SIZE) -> str:
+    """Return the last n lines of a file by seeking backwards from the end.
+
+    Only the trailing blocks that contain those lines are read, so the cost
+    does not depend on the size of the log.
+    """
+    with path.open("rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        # n lines need n+1 newlines when the file ends with one
+        while pos > 0 and data.count(b"\n") <= n:
+            step = min(chunk_size, pos)
+            pos -= step
+            f.seek(pos)
+            with PERF.span("file_read"):
+                data = f.read(step) + data
+    lines = data.splitlines(keepends=True)[-n:] if n > 0 else []
+    return b"".join(lines).decode("utf-8", errors="replace")
+
+
+def _parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Parse a single-range ``Range: bytes=...`` header.
+
+    Returns an inclusive (start, end) tuple, None if the header is absent or
+    not a single byte range, and raises ValueError if it cannot be satisfied.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if size == 0:
+        raise ValueError("empty file")
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("range not satisfiable")
+    return start, min(end, size - 1)
+
+
+def _resolve_log(name: str) -> Path | None:
+    """Map a log name from the URL to a file directly inside LOG_DIR."""
+    if not LOG_NAME_RE.match(name):
+        return None
+    candidate = LOG_DIR / name
+    if not candidate.is_file():
+        return None
+    return candidate
+
+
+class FeatureIndex:
+    """In-memory index over feature_list.json.
+    
+    The file is parsed once per version (mtime + size); queries afterwards
+    only walk precomputed id lists and lowercased search strings.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._version: tuple[int, int] | None = None
+        self.tests: list[dict[str, Any]] = []
+        self.search_text: list[str] = []
+        self.by_status: dict[str, list[int]] = {"passing": [], "failing": []}
+        self.by_category: dict[str, list[int]] = {}
+    
+    def refresh(self) -> bool:
+        """Rebuild the index if the file changed. Returns False if it is missing."""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return False
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if version == self._version:
+                return True
+            with PERF.span("file_read"):
+                raw = self.path.read_text(encoding="utf-8")
+            with PERF.span("json_decode"):
+                data = json.loads(raw)
+            tests = data.get("tests") if isinstance(data, dict) else data
+            if not isinstance(tests, list):
+                raise ValueError("feature_list.json: expected a list or {tests: [...]}")
+            
+            entries: list[dict[str, Any]] = []
+            search_text: list[str] = []
+            by_status: dict[str, list[int]] = {"passing": [], "failing": []}
+            by_category: dict[str, list[int]] = {}
+            for i, test in enumerate(tests):
+                steps = test.get("steps", [])
+                passes = bool(test.get("passes", False))
+                category = test.get("category", "Unknown")
+                entries.append({
+                    "index": i,
+                    "category": category,
+                    "description": test.get("description", ""),
+                    "steps": steps,
+                    "passes": passes,
+                })
+                search_text.append(
+                    (str(test.get("description", "")) + "\n" + "\n".join(map(str, steps))).lower()
+                )
+                by_status["passing" if passes else "failing"].append(i)
+                by_category.setdefault(category, []).append(i)
+            
+            self.tests = entries
+            self.search_text = search_text
+            self.by_status = by_status
+            self.by_category = by_category
+            self._version = version
+        return True
+    
+    def summary(self, failing_limit: int = 10) -> dict[str, Any]:
+        """Counts, per-category counts and the first failing tests, all from one index version."""
+        with self._lock:
+            tests = self.tests
+            by_status = self.by_status
+            by_category = self.by_category
+        
+        categories = {}
+        for category, ids in by_category.items():
+            passing = sum(1 for i in ids if tests[i]["passes"])
+            categories[category] = {"total": len(ids), "passing": passing, "failing": len(ids) - passing}
+        return {
+            "total": len(tests),
+            "passing": len(by_status["passing"]),
+            "categories": categories,
+            "failing_tests": [tests[i] for i in by_status["failing"][:failing_limit]],
+        }
+    
+    def query(
+        self,
+        status: str = "all",
+        category: str | None = None,
+        text: str = "",
+        offset: int = 0,
+        limit: int = TESTS_DEFAULT_LIMIT,
+    ) -> dict[str, Any]:
+        """Filter tests by status, category and search terms, then paginate.
+        
+        ``category_counts`` holds the matches per category before the
+        category filter is applied, so clients can render facet counts.
+        """
+        with self._lock:
+            tests = self.tests
+            search_text = self.search_text
+            ids = self.by_status[status] if status in self.by_status else range(len(tests))
+        
+        terms = text.lower().split()
+        if terms:
+            ids = [i for i in ids if all(term in search_text[i] for term in terms)]
+        
+        category_counts: dict[str, int] = {}
+        for i in ids:
+            cat = tests[i]["category"]
+            category_counts[cat] = category_counts.get(cat, 0) + 1
+        
+        if category is not None:
+            ids = [i for i in ids if tests[i]["category"] == category]
+        
+        return {
+            "total": len(ids),
+            "offset": offset,
+            "limit": limit,
+            "tests": [tests[i] for i in ids[offset:offset + limit]],
+            "category_counts": category_counts,
+        }
+
+
+FEATURE_INDEX = FeatureIndex(FEATURE_FILE)
+
+
+def _parse_time(value: str) -> float:
+    """Parse epoch seconds or an ISO 8601 timestamp into epoch seconds."""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def _lttb(xs: list[float], ys: list[float], threshold: int) -> list[int]:
+    """Largest-Triangle-Three-Buckets downsampling; returns the kept indices."""
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    
+    kept = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for b in range(threshold - 2):
+        start = int(b * bucket_size) + 1
+        end = int((b + 1) * bucket_size) + 1
+        # Average of the next bucket is the third triangle vertex
+        next_start = end
+        next_end = min(int((b + 2) * bucket_size) + 1, n)
+        if next_start >= next_end:
+            next_start, next_end = n - 1, n
+        count = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / count
+        avg_y = sum(ys[next_start:next_end]) / count
+        
+        best, best_area = start, -1.0
+        ax, ay = xs[a], ys[a]
+        for i in range(start, end):
+            area = abs((ax - avg_x) * (ys[i] - ay) - (ax - xs[i]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = i, area
+        kept.append(best)
+        a = best
+    kept.append(n - 1)
+    return kept
+
+
+def _minmax(ys: list[float], buckets: int) -> list[int]:
+    """Keep the min and max sample of each bucket, in index order."""
+    n = len(ys)
+    if buckets * 2 >= n or buckets < 1:
+        return list(range(n))
+    kept: list[int] = []
+    size = n / buckets
+    for b in range(buckets):
+        start, end = int(b * size), int((b + 1) * size)
+        if start >= end:
+            continue
+        window = range(start, end)
+        lo = min(window, key=ys.__getitem__)
+        hi = max(window, key=ys.__getitem__)
+        kept.extend(sorted({lo, hi}))
+    return kept
+
+
+class MetricsIndex:
+    """Incremental index over harness_metrics.jsonl.
+    
+    Only bytes appended since the previous refresh are parsed. Per-cycle
+    values are kept in compact arrays for the series endpoint, running
+    totals feed the summary, and only the last cycles are kept as records.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._reset()
+    
+    def _reset(self):
+        self._offset = 0
+        self._inode: int | None = None
+        self.timestamps = array("d")
+        self.failing = array("d")
+        self.durations = array("d")
+        self.successes = array("b")
+        self.recent: deque[dict[str, Any]] = deque(maxlen=RECENT_CYCLES)
+        self.successful = 0
+        self.total_progress = 0
+        self.total_duration = 0.0
+        self.timeout_count = 0
+        self.resource_cycles = 0
+        self.total_cpu_secs = 0.0
+        self.max_peak_rss_mb = 0.0
+        self.skipped_lines = 0
+    
+    def refresh(self) -> None:
+        """Parse newly appended lines; start over if the file was replaced."""
+        with self._lock:
+            try:
+                stat = self.path.stat()
+            except FileNotFoundError:
+                self._reset()
+                return
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                self._reset()
+                self._inode = stat.st_ino
+            if stat.st_size == self._offset:
+                return
+            
+            with self.path.open("rb") as f:
+                f.seek(self._offset)
+                pending = b""
+                while True:
+                    with PERF.span("file_read"):
+                        chunk = f.read(METRICS_READ_CHUNK)
+                    if not chunk:
+                        break
+                    pending += chunk
+                    # Leave a partially written last line for the next refresh
+                    complete = pending.rfind(b"\n") + 1
+                    for line in pending[:complete].splitlines():
+                        if line.strip() and not self._add_line(line):
+                            # Skipped for good: the offset still moves past it
+                            self.skipped_lines += 1
+                    self._offset += complete
+                    pending = pending[complete:]
+    
+    def _add_line(self, line: bytes) -> bool:
+        """Index one JSONL record; False if it is malformed."""
+        try:
+            entry = json.loads(line)
+            if not isinstance(entry, dict):
+                return False
+            self._add(entry)
+        except (ValueError, TypeError, AttributeError):
+            return False
+        return True
+    
+    def _add(self, entry: dict[str, Any]):
+        # Convert everything first so a bad field leaves the index untouched
+        try:
+            ts = datetime.fromisoformat(entry["timestamp"]).timestamp()
+        except (KeyError, TypeError, ValueError):
+            ts = self.timestamps[-1] if self.timestamps else 0.0
+        failing = float(entry.get("failing_after", 0) or 0)
+        duration = float(entry.get("duration_secs", 0) or 0)
+        progress = int(entry.get("progress", 0) or 0)
+        resources = entry.get("resources") or {}
+        cpu_secs = float(resources.get("user_cpu_secs", 0)) + float(resources.get("sys_cpu_secs", 0))
+        peak_rss_mb = float(resources.get("peak_rss_mb", resources.get("max_rss_mb", 0)))
+        
+        self.timestamps.append(ts)
+        self.failing.append(failing)
+        self.durations.append(duration)
+        self.successes.append(1 if entry.get("success", False) else 0)
+        self.successful += self.successes[-1]
+        self.recent.append(entry)
+        self.total_progress += progress
+        self.total_duration += duration
+        if entry.get("timeout", False):
+            self.timeout_count += 1
+        if resources:
+            self.resource_cycles += 1
+            self.total_cpu_secs += cpu_secs
+            self.max_peak_rss_mb = max(self.max_peak_rss_mb, peak_rss_mb)
+    
+    def series(
+        self,
+        start: float | None = None,
+        end: float | None = None,
+        points: int = SERIES_DEFAULT_POINTS,
+        method: str = "lttb",
+    ) -> dict[str, Any]:
+        """Downsample failing tests, duration and success rate to ~points samples."""
+        with self._lock:
+            lo = bisect_left(self.timestamps, start) if start is not None else 0
+            hi = bisect_right(self.timestamps, end) if end is not None else len(self.timestamps)
+            xs = self.timestamps[lo:hi].tolist()
+            failing = self.failing[lo:hi].tolist()
+            durations = self.durations[lo:hi].tolist()
+            successes = self.successes[lo:hi].tolist()
+        
+        def pick(ys: list[float]) -> list[list[float]]:
+            if method == "minmax":
+                kept = _minmax(ys, max(1, points // 2))
+            else:
+                kept = _lttb(xs, ys, points)
+            return [[xs[i], ys[i]] for i in kept]
+        
+        # Success is 0/1 per cycle, so it is averaged per bucket instead
+        success_rate: list[list[float]] = []
+        if xs:
+            size = max(1, -(-len(xs) // points))
+            for b in range(0, len(xs), size):
+                window = successes[b:b + size]
+                success_rate.append([xs[b], round(sum(window) / len(window), 3)])
+        
+        return {
+            "cycles": len(xs),
+            "from": xs[0] if xs else None,
+            "to": xs[-1] if xs else None,
+            "method": method,
+            "failing_tests": pick(failing),
+            "duration_secs": pick(durations),
+            "success_rate": success_rate,
+        }
+
+
+METRICS_INDEX = MetricsIndex(METRICS_FILE)
 
 
 class DashboardHandler(http.server.SimpleHTTPRequestHandler):
@@ -25,7 +655,9 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
         self.send_header("Content-type", "application/json")
         self.send_header("Access-Control-Allow-Origin", "*")
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
+        with PERF.span("json_encode"):
+            payload = json.dumps(data).encode()
+        self.wfile.write(payload)
     
     def _send_html(self, content: str):
         """Send HTML response."""
@@ -36,27 +668,43 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
     
     def do_GET(self):
         """Handle GET requests."""
+        PERF.measure(_route_key("GET", urlparse(self.path).path), self.path, self._route_get)
+    
+    def do_POST(self):
+        """Handle POST requests for control actions."""
+        PERF.measure(_route_key("POST", urlparse(self.path).path), self.path, self._route_post)
+    
+    def _route_get(self):
         parsed = urlparse(self.path)
         path = parsed.path
         
         # API endpoints
         if path == "/api/metrics":
             self._handle_metrics()
+        elif path == "/api/metrics/series":
+            self._handle_metrics_series(parse_qs(parsed.query))
         elif path == "/api/status":
             self._handle_status()
+        elif path == "/api/tests":
+            self._handle_tests(parse_qs(parsed.query))
         elif path == "/api/git":
             self._handle_git()
         elif path == "/api/logs":
             self._handle_logs()
+        elif path.startswith("/api/logs/"):
+            self._handle_log_file(unquote(path[len("/api/logs/"):]), parse_qs(parsed.query))
+        elif path == "/api/services":
+            self._handle_services()
         elif path == "/api/control":
             self._handle_control_status()
+        elif path == "/api/_debug/perf":
+            self._send_json(PERF.snapshot())
         elif path == "/" or path == "/index.html":
             self._serve_dashboard()
         else:
             self.send_error(404, "Not found")
     
-    def do_POST(self):
-        """Handle POST requests for control actions."""
+    def _route_post(self):
         parsed = urlparse(self.path)
         
         if parsed.path == "/api/control":
@@ -69,83 +717,82 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
     
     def _handle_metrics(self):
         """Return metrics summary."""
-        metrics_file = Path("harness_metrics.jsonl")
-        
-        if not metrics_file.exists():
-            self._send_json({
-                "total_cycles": 0,
-                "successful_cycles": 0,
-                "recent_cycles": []
-            })
+        try:
+            METRICS_INDEX.refresh()
+        except OSError as e:
+            self._send_json({"error": str(e)}, 500)
             return
+        total = len(METRICS_INDEX.timestamps)
         
-        lines = metrics_file.read_text().strip().split("\n")
-        entries = [json.loads(line) for line in lines if line]
-        
-        if not entries:
+        if not total:
             self._send_json({
                 "total_cycles": 0,
                 "successful_cycles": 0,
+                "skipped_lines": METRICS_INDEX.skipped_lines,
                 "recent_cycles": []
             })
             return
         
-        successful = sum(1 for e in entries if e.get("success", False))
-        total_progress = sum(e.get("progress", 0) for e in entries)
-        avg_duration = sum(e.get("duration_secs", 0) for e in entries) / len(entries) if entries else 0
-        timeout_count = sum(1 for e in entries if e.get("timeout", False))
-        error_rate = (len(entries) - successful) / len(entries) if len(entries) > 0 else 0
-        
-        # Get recent 20 cycles
-        recent = entries[-20:] if len(entries) > 20 else entries
+        successful = METRICS_INDEX.successful
+        avg_duration = METRICS_INDEX.total_duration / total
+        error_rate = (total - successful) / total
         
         self._send_json({
-            "total_cycles": len(entries),
+            "total_cycles": total,
             "successful_cycles": successful,
-            "failed_cycles": len(entries) - successful,
-            "total_tests_fixed": total_progress,
+            "failed_cycles": total - successful,
+            "total_tests_fixed": METRICS_INDEX.total_progress,
             "avg_cycle_duration": round(avg_duration, 2),
             "error_rate": round(error_rate, 3),
-            "timeout_count": timeout_count,
-            "recent_cycles": recent,
+            "timeout_count": METRICS_INDEX.timeout_count,
+            "skipped_lines": METRICS_INDEX.skipped_lines,
+            "resources": {
+                "avg_cpu_secs": round(METRICS_INDEX.total_cpu_secs / METRICS_INDEX.resource_cycles, 2),
+                "max_peak_rss_mb": METRICS_INDEX.max_peak_rss_mb,
+            } if METRICS_INDEX.resource_cycles else None,
+            "recent_cycles": list(METRICS_INDEX.recent),
             "last_update": datetime.now().isoformat()
         })
     
-    def _handle_status(self):
-        """Return current test status."""
-        feature_file = Path("feature_list.json")
-        
-        if not feature_file.exists():
-            self._send_json({"error": "feature_list.json not found"}, 404)
+    def _handle_metrics_series(self, query: dict[str, list[str]]):
+        """Return downsampled metric series for a time window."""
+        method = query.get("method", ["lttb"])[0]
+        if method not in ("lttb", "minmax"):
+            self._send_json({"error": "method must be lttb or minmax"}, 400)
+            return
+        try:
+            start = _parse_time(query["from"][0]) if "from" in query else None
+            end = _parse_time(query["to"][0]) if "to" in query else None
+            points = int(query.get("points", [str(SERIES_DEFAULT_POINTS)])[0])
+        except ValueError:
+            self._send_json({"error": "from/to must be ISO timestamps or epoch seconds, points an integer"}, 400)
             return
+        points = min(SERIES_MAX_POINTS, max(3, points))
         
         try:
-            data = json.loads(feature_file.read_text())
-            tests = data.get("tests") if isinstance(data, dict) else data
+            METRICS_INDEX.refresh()
+            result = METRICS_INDEX.series(start, end, points, method)
+            result["last_update"] = datetime.now().isoformat()
+            self._send_json(result)
+        except Exception as e:
+            self._send_json({"error": str(e)}, 500)
+    
+    def _handle_status(self):
+        """Return current test status."""
+        try:
+            if not FEATURE_INDEX.refresh():
+                self._send_json({"error": "feature_list.json not found"}, 404)
+                return
             
-            total = len(tests)
-            passing = sum(1 for t in tests if t.get("passes", False))
+            summary = FEATURE_INDEX.summary()
+            total = summary["total"]
+            passing = summary["passing"]
             failing = total - passing
             
-            # Group by category
-            categories = {}
-            for test in tests:
-                cat = test.get("category", "Unknown")
-                if cat not in categories:
-                    categories[cat] = {"total": 0, "passing": 0, "failing": 0}
-                categories[cat]["total"] += 1
-                if test.get("passes", False):
-                    categories[cat]["passing"] += 1
-                else:
-                    categories[cat]["failing"] += 1
-            
-            # Get failing tests details
+            # First 10 failing tests; /api/tests pages through the rest
             failing_tests = [
-                {
-                    "category": t.get("category", "Unknown"),
-                    "description": t.get("description", "")
-                }
-                for t in tests if not t.get("passes", False)
+                {"category": t["category"], "description": t["description"]}
+                for t in summary["failing_tests"]
             ]
             
             self._send_json({
@@ -153,18 +800,47 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
                 "passing_tests": passing,
                 "failing_tests": failing,
                 "pass_rate": round(passing / total * 100, 1) if total > 0 else 0,
-                "categories": categories,
-                "failing_details": failing_tests[:10],  # First 10
+                "categories": summary["categories"],
+                "failing_details": failing_tests,
                 "last_update": datetime.now().isoformat()
             })
         except Exception as e:
             self._send_json({"error": str(e)}, 500)
     
+    def _handle_tests(self, query: dict[str, list[str]]):
+        """Return a filtered, paginated slice of feature_list.json."""
+        status = query.get("status", ["all"])[0]
+        if status not in ("all", "passing", "failing"):
+            self._send_json({"error": "status must be all, passing or failing"}, 400)
+            return
+        try:
+            offset = max(0, int(query.get("offset", ["0"])[0]))
+            limit = min(TESTS_MAX_LIMIT, max(1, int(query.get("limit", [str(TESTS_DEFAULT_LIMIT)])[0])))
+        except ValueError:
+            self._send_json({"error": "offset and limit must be integers"}, 400)
+            return
+        
+        try:
+            if not FEATURE_INDEX.refresh():
+                self._send_json({"error": "feature_list.json not found"}, 404)
+                return
+            result = FEATURE_INDEX.query(
+                status=status,
+                category=query.get("category", [None])[0],
+                text=query.get("q", [""])[0],
+                offset=offset,
+                limit=limit,
+            )
+            result["last_update"] = datetime.now().isoformat()
+            self._send_json(result)
+        except Exception as e:
+            self._send_json({"error": str(e)}, 500)
+    
     def _handle_git(self):
         """Return git history and checkpoints."""
         try:
             # Recent commits
-            result = subprocess.run(
+            result = _run_command(
                 ["git", "log", "--oneline", "-20"],
                 capture_output=True,
                 text=True,
@@ -173,7 +849,7 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
             commits = result.stdout.strip().split("\n")
             
             # Checkpoints
-            result = subprocess.run(
+            result = _run_command(
                 ["git", "tag", "-l", "checkpoint-*"],
                 capture_output=True,
                 text=True,
@@ -182,7 +858,7 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
             checkpoints = result.stdout.strip().split("\n") if result.stdout.strip() else []
             
             # Current branch
-            result = subprocess.run(
+            result = _run_command(
                 ["git", "branch", "--show-current"],
                 capture_output=True,
                 text=True,
@@ -201,7 +877,7 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
     
     def _handle_logs(self):
         """Return recent log files."""
-        log_dir = Path("logs")
+        log_dir = LOG_DIR
         
         if not log_dir.exists():
             self._send_json({"logs": []})
@@ -229,33 +905,165 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
         except Exception as e:
             self._send_json({"error": str(e)}, 500)
     
+    def _handle_services(self):
+        """Return the dev servers kept warm by the harness (logs/services.json)."""
+        try:
+            data = json.loads((LOG_DIR / "services.json").read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            self._send_json({"services": []})
+            return
+        except (OSError, json.JSONDecodeError) as e:
+            self._send_json({"error": str(e)}, 500)
+            return
+        
+        services = []
+        for name, entry in data.get("services", {}).items():
+            pid = entry.get("pid")
+            # A pid reused after a crash or reboot must not show as a live service
+            running = _pid_running(pid, entry.get("starttime"))
+            services.append({
+                "name": name,
+                "status": entry.get("status", "unknown") if running else "stopped",
+                "running": running,
+                "pid": pid,
+                "health": entry.get("health"),
+                "detail": entry.get("detail", ""),
+                "restarts": entry.get("restarts", 0),
+                "started_at": entry.get("started_at"),
+                "last_check": entry.get("last_check"),
+            })
+        self._send_json({"services": services, "last_update": data.get("updated")})
+    
     def _read_log_preview(self, log_file: Path) -> str:
         """Read last 10 lines of log file."""
         try:
-            result = subprocess.run(
-                ["tail", "-10", str(log_file)],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            return result.stdout
-        except:
+            return _tail_lines(log_file, LOG_PREVIEW_LINES)
+        except OSError:
             return ""
     
+    def _handle_log_file(self, name: str, query: dict[str, list[str]]):
+        """Serve a single log file, honouring Range or following appended bytes."""
+        log_file = _resolve_log(name)
+        if log_file is None:
+            self.send_error(404, "Log not found")
+            return
+        
+        if query.get("follow", ["0"])[0] in ("1", "true", "yes"):
+            self._follow_log(log_file, query)
+            return
+        
+        size = log_file.stat().st_size
+        try:
+            byte_range = _parse_range(self.headers.get("Range"), size)
+        except ValueError:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        
+        start, end = byte_range if byte_range else (0, size - 1)
+        length = max(0, end - start + 1)
+        self.send_response(206 if byte_range else 200)
+        self.send_header("Content-type", "text/plain; charset=utf-8")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(length))
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        
+        with log_file.open("rb") as f:
+            f.seek(start)
+            remaining = length
+            while remaining > 0:
+                with PERF.span("file_read"):
+                    chunk = f.read(min(STREAM_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+    
+    def _follow_log(self, log_file: Path, query: dict[str, list[str]]):
+        """Stream bytes appended to a log as Server-Sent Events.
+        
+        Each event carries complete lines and its id is the byte offset after
+        them, so a client can reconnect with ``offset=<id>`` (or the standard
+        ``Last-Event-ID`` header) and resume without gaps. Without an offset
+        only bytes written after the request are streamed.
+        """
+        saved = self.headers.get("Last-Event-ID") or query.get("offset", [""])[0]
+        size = log_file.stat().st_size
+        try:
+            offset = min(max(0, int(saved)), size) if saved else size
+        except ValueError:
+            self.send_error(400, "Invalid offset")
+            return
+        
+        self.send_response(200)
+        self.send_header("Content-type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.close_connection = True
+        PERF.mark_streaming()
+        
+        last_write = time.monotonic()
+        pending = b""
+        try:
+            with log_file.open("rb") as f:
+                f.seek(offset)
+                while True:
+                    chunk = f.read(STREAM_CHUNK_SIZE)
+                    if chunk:
+                        pending += chunk
+                        # Hold back a trailing partial line unless it is huge
+                        cut = pending.rfind(b"\n") + 1
+                        if cut == 0 and len(pending) >= STREAM_CHUNK_SIZE:
+                            cut = len(pending)
+                        if cut:
+                            ready, pending = pending[:cut], pending[cut:]
+                            offset += len(ready)
+                            text = ready.decode("utf-8", errors="replace")
+                            event = f"id: {offset}\n"
+                            event += "".join(f"data: {line}\n" for line in text.splitlines())
+                            self.wfile.write((event + "\n").encode())
+                            self.wfile.flush()
+                            last_write = time.monotonic()
+                        continue
+                    
+                    if not log_file.exists() or log_file.stat().st_size < offset + len(pending):
+                        # Log was rotated or truncated
+                        self.wfile.write(b"event: eof\ndata: log truncated or removed\n\n")
+                        return
+                    if time.monotonic() - last_write >= FOLLOW_KEEPALIVE_SECS:
+                        self.wfile.write(b": keepalive\n\n")
+                        self.wfile.flush()
+                        last_write = time.monotonic()
+                    time.sleep(FOLLOW_POLL_SECS)
+        except (BrokenPipeError, ConnectionResetError):
+            return
+    
     def _handle_control_status(self):
         """Check control file status."""
         pause_exists = Path(".harness_pause").exists()
         stop_exists = Path(".harness_stop").exists()
         
-        # Check if harness is running
+        # Check if harness is running: the orchestrator writes pid + start time to logs/harness.pid
         try:
-            result = subprocess.run(
-                ["pgrep", "-f", "run_until_green.sh"],
-                capture_output=True,
-                check=False
-            )
-            running = result.returncode == 0
-        except:
+            info = json.loads(HARNESS_PID_FILE.read_text(encoding="utf-8"))
+            running = _pid_running(info.get("pid"), info.get("starttime"))
+        except FileNotFoundError:
+            # No pid file (e.g. a harness started before it existed): match the process
+            try:
+                result = _run_command(
+                    ["pgrep", "-f", "scripts[.]orchestrator"],
+                    capture_output=True,
+                    check=False
+                )
+                running = result.returncode == 0
+            except OSError:
+                running = False
+        except (OSError, ValueError, AttributeError):
             running = False
         
         self._send_json({
@@ -465,6 +1273,12 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
             </div>
         </div>
         
+        <!-- History Chart -->
+        <div class="card" style="margin-bottom: 20px;">
+            <h2>Failing Tests History</h2>
+            <div id="history-chart">Loading...</div>
+        </div>
+        
         <!-- Recent Cycles -->
         <div class="card">
             <h2>Recent Cycles</h2>
@@ -483,6 +1297,12 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
                 <h2>Recent Logs</h2>
                 <div id="logs-info">Loading...</div>
             </div>
+            
+            <!-- Services -->
+            <div class="card">
+                <h2>Services</h2>
+                <div id="services-info">Loading...</div>
+            </div>
         </div>
         
         <div class="refresh-info">Auto-refresh every 5 seconds</div>
@@ -590,6 +1410,18 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
                         <span class="stat-value" style="color: #2ea043">${testsFixed}</span>
                     </div>
                 `;
+                if (metrics.resources) {
+                    html += `
+                        <div class="stat">
+                            <span class="stat-label">Avg CPU / Cycle</span>
+                            <span class="stat-value">${Math.round(metrics.resources.avg_cpu_secs)}s</span>
+                        </div>
+                        <div class="stat">
+                            <span class="stat-label">Max Peak RSS</span>
+                            <span class="stat-value">${Math.round(metrics.resources.max_peak_rss_mb)} MB</span>
+                        </div>
+                    `;
+                }
                 document.getElementById('metrics-info').innerHTML = html;
                 
                 // Recent cycles
@@ -605,6 +1437,10 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
                         const progress = cycle.progress || 0;
                         const failingAfter = cycle.failing_after || 0;
                         const duration = Math.round(cycle.duration_secs || 0);
+                        const res = cycle.resources;
+                        const usage = res
+                            ? `<span style="color: #6e7681; font-size: 11px;">${Math.round(res.user_cpu_secs + res.sys_cpu_secs)}s CPU, ${Math.round(res.peak_rss_mb ?? res.max_rss_mb)} MB</span> `
+                            : '';
                         
                         cyclesHtml += `
                             <div class="cycle-item ${cssClass}">
@@ -614,7 +1450,7 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
                                     Progress: ${progress > 0 ? '+' + progress : progress}
                                     (${failingAfter} failing)
                                 </div>
-                                <div>${duration}s</div>
+                                <div>${usage}${duration}s</div>
                             </div>
                         `;
                     }
@@ -624,6 +1460,27 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
                 }
             }
             
+            // History chart (server-side downsampled, fixed payload size)
+            const series = await fetchData('/api/metrics/series?points=300');
+            if (series && !series.error) {
+                const pts = series.failing_tests;
+                if (pts.length > 1) {
+                    const x0 = pts[0][0], x1 = pts[pts.length - 1][0] || x0 + 1;
+                    const yMax = Math.max(1, ...pts.map(p => p[1]));
+                    const coords = pts.map(p =>
+                        `${((p[0] - x0) / (x1 - x0 || 1) * 1000).toFixed(1)},${(120 - p[1] / yMax * 110).toFixed(1)}`
+                    ).join(' ');
+                    document.getElementById('history-chart').innerHTML = `
+                        <svg viewBox="0 0 1000 125" preserveAspectRatio="none" style="width: 100%; height: 125px;">
+                            <polyline fill="none" stroke="#da3633" stroke-width="2" points="${coords}" />
+                        </svg>
+                        <div class="refresh-info">${series.cycles} cycles, max ${yMax} failing</div>
+                    `;
+                } else {
+                    document.getElementById('history-chart').innerHTML = 'No history yet';
+                }
+            }
+            
             // Git info
             const git = await fetchData('/api/git');
             if (git && !git.error) {
@@ -651,9 +1508,10 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
             if (logs && logs.logs) {
                 let html = '';
                 for (const log of logs.logs.slice(0, 5)) {
+                    const url = '/api/logs/' + encodeURIComponent(log.filename);
                     html += `
                         <div style="margin: 10px 0;">
-                            <strong>${log.filename}</strong>
+                            <strong><a href="${url}" target="_blank" style="color: #58a6ff;">${log.filename}</a></strong>
                             <span style="color: #6e7681; font-size: 11px;">
                                 (${(log.size / 1024).toFixed(1)} KB)
                             </span>
@@ -662,6 +1520,26 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
                 }
                 document.getElementById('logs-info').innerHTML = html || 'No logs yet';
             }
+            
+            // Services
+            const services = await fetchData('/api/services');
+            if (services && services.services) {
+                let html = '';
+                for (const service of services.services) {
+                    const healthy = service.running && service.status === 'healthy';
+                    const indicator = healthy ? 'status-running' : (service.running ? 'status-paused' : 'status-stopped');
+                    html += `
+                        <div class="stat">
+                            <span class="stat-label"><span class="status-indicator ${indicator}"></span>${service.name}</span>
+                            <span>${service.status}${service.restarts ? ` (${service.restarts} restarts)` : ''}</span>
+                        </div>
+                    `;
+                    if (!healthy && service.detail) {
+                        html += `<div style="color: #6e7681; font-size: 11px;">${service.detail}</div>`;
+                    }
+                }
+                document.getElementById('services-info').innerHTML = html || 'No services configured';
+            }
         }
         
         // Initial load and auto-refresh
@@ -673,12 +1551,19 @@ class DashboardHandler(http.server.SimpleHTTPRequestHandler):
         self._send_html(html)
 
 
+class DashboardServer(socketserver.ThreadingTCPServer):
+    """Threaded server so long-lived log follows do not block polling."""
+    
+    daemon_threads = True
+    allow_reuse_address = True
+
+
 def main():
     """Start the dashboard server."""
     port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
     
-    # Change to project root
-    os.chdir(Path(__file__).parent.parent)
+    # Change to project root (or an explicit root, e.g. benchmark fixtures)
+    os.chdir(sys.argv[2] if len(sys.argv) > 2 else Path(__file__).parent.parent)
     
     print(f"🚀 Starting Autonomous Codex Dashboard")
     print(f"📊 Dashboard URL: http://localhost:{port}")
@@ -686,7 +1571,7 @@ def main():
     print(f"⏹  Press Ctrl+C to stop")
     print()
     
-    with socketserver.TCPServer(("", port), DashboardHandler) as httpd:
+    with DashboardServer(("", port), DashboardHandler) as httpd:
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
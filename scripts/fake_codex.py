@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Fake Codex for Autonomous Codex Harness
+Stand-in for the `codex` CLI that follows a scripted behaviour instead of
+calling a model, so the harness can be exercised and benchmarked locally.
+Select it with `codex_bin=python3 scripts/fake_codex.py` in harness.conf or
+by putting it on PATH as `codex`.
+
+The behaviour comes from FAKE_CODEX (or the file in FAKE_CODEX_SCRIPT):
+cycles separated by ";" or newlines, actions within a cycle by ",". Cycle n
+uses entry n modulo the number of entries.
+
+  flip[:N]      mark N failing tests as passing (default 1)
+  regress[:N]   mark N passing tests as failing
+  edit[:N]      append a line to N source files (default 1)
+  sleep:S       simulate S seconds of model time
+  hang          sleep until killed (timeout / stall path)
+  crash[:RC]    leave changes uncommitted and exit with RC (default 1)
+  corrupt       write invalid JSON to feature_list.json
+  rewrite       change a test description (only `passes` may change)
+  nocommit      do not commit at the end
+
+  FAKE_CODEX="flip:1,edit:3;flip:1;crash;flip:2,sleep:0.5" ./run_until_green.sh
+
+The cycle counter and each invocation's own duration are kept in
+.git/fake_codex.json (outside the work tree, so rollbacks leave it alone).
+"""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+DEFAULT_SCRIPT = "flip:1"
+SOURCE_SUFFIXES = (".py", ".js", ".ts", ".tsx", ".jsx", ".html", ".css", ".txt", ".md")
+HARNESS_FILES = ("feature_list.json", "harness.conf", "coding_prompt.md", "init_prompt.md")
+
+
+def _git(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], capture_output=True, text=True)
+
+
+def _state_file() -> Path:
+    git_dir = _git("rev-parse", "--git-dir").stdout.strip() or ".git"
+    return Path(git_dir) / "fake_codex.json"
+
+
+def parse_script(text: str) -> list[list[tuple[str, str]]]:
+    cycles = []
+    for cycle in text.replace("\n", ";").split(";"):
+        if not cycle.strip():
+            continue
+        actions = []
+        for action in cycle.split(","):
+            name, _, arg = action.strip().partition(":")
+            if name:
+                actions.append((name, arg))
+        cycles.append(actions)
+    return cycles or [[]]
+
+
+def _load_tests() -> tuple[object, list[dict]]:
+    data = json.loads(Path("feature_list.json").read_text(encoding="utf-8"))
+    return data, data.get("tests") if isinstance(data, dict) else data
+
+
+def _save_tests(data: object) -> None:
+    Path("feature_list.json").write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def _set_passes(count: int, to: bool) -> list[int]:
+    data, tests = _load_tests()
+    changed = []
+    for i, test in enumerate(tests):
+        if len(changed) >= count:
+            break
+        if bool(test.get("passes")) != to:
+            test["passes"] = to
+            changed.append(i)
+    _save_tests(data)
+    return changed
+
+
+def _edit_files(count: int, cycle: int) -> list[str]:
+    tracked = [p for p in _git("ls-files").stdout.splitlines()
+               if p.endswith(SOURCE_SUFFIXES) and not p.startswith(("scripts/", "logs/")) and p not in HARNESS_FILES]
+    if not tracked:
+        tracked = [f"sim/file_{i}.txt" for i in range(count)]
+    edited = [tracked[(cycle * count + k) % len(tracked)] for k in range(min(count, len(tracked)))]
+    for path in edited:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(f"\n# fake codex cycle {cycle}\n")
+    return edited
+
+
+def run(actions: list[tuple[str, str]], cycle: int) -> int:
+    commit = True
+    summary = []
+    for name, arg in actions:
+        if name == "flip":
+            summary.append(f"flipped {_set_passes(int(arg or 1), True)}")
+        elif name == "regress":
+            summary.append(f"regressed {_set_passes(int(arg or 1), False)}")
+        elif name == "edit":
+            summary.append(f"edited {len(_edit_files(int(arg or 1), cycle))} files")
+        elif name == "sleep":
+            time.sleep(float(arg or 1))
+        elif name == "hang":
+            print("fake codex: hanging", flush=True)
+            while True:
+                time.sleep(60)
+        elif name == "crash":
+            print(f"fake codex: crashing ({', '.join(summary) or 'no changes'})", flush=True)
+            return int(arg or 1)
+        elif name == "corrupt":
+            Path("feature_list.json").write_text('{"tests": [', encoding="utf-8")
+            summary.append("corrupted feature_list.json")
+        elif name == "rewrite":
+            data, tests = _load_tests()
+            tests[-1]["description"] = f"{tests[-1].get('description', '')} (rewritten)"
+            _save_tests(data)
+            summary.append("rewrote a description")
+        elif name == "nocommit":
+            commit = False
+        else:
+            print(f"fake codex: unknown action {name!r}", file=sys.stderr)
+            return 2
+    message = f"fake codex cycle {cycle}: {', '.join(summary) or 'no changes'}"
+    print(message, flush=True)
+    if commit:
+        _git("add", "-A")
+        _git("commit", "-q", "-m", message)
+    return 0
+
+
+def main() -> int:
+    if len(sys.argv) < 2 or sys.argv[1] != "exec":
+        print("Usage: fake_codex.py exec [--yolo] [--model M] PROMPT  (behaviour from FAKE_CODEX)")
+        return 1
+
+    started = time.perf_counter()
+    state_file = _state_file()
+    try:
+        state = json.loads(state_file.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        state = {"cycles": 0, "secs": {}}
+    script_file = os.getenv("FAKE_CODEX_SCRIPT", "")
+    script = Path(script_file).read_text(encoding="utf-8") if script_file else os.getenv("FAKE_CODEX", DEFAULT_SCRIPT)
+    cycles = parse_script(script.strip())
+    cycle = state["cycles"]
+    state["cycles"] += 1
+    state_file.write_text(json.dumps(state), encoding="utf-8")
+
+    try:
+        return run(cycles[cycle % len(cycles)], cycle)
+    finally:
+        # Time spent "being the model", so benchmarks can subtract it from the cycle
+        state["secs"][str(cycle)] = round(time.perf_counter() - started, 4)
+        state_file.write_text(json.dumps(state), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
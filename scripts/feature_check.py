@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Feature List Check for Autonomous Codex Harness
+Validates and counts feature_list.json from a single parse per file version.
+Against a pre-cycle baseline only the tests that actually changed are
+inspected: schema, the "only `passes` may change" rule from coding_prompt.md
+and the list of flipped tests all come from the same comparison.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+REQUIRED_FIELDS = ["category", "description", "steps", "passes"]
+
+
+class FeatureListError(Exception):
+    """feature_list.json is missing or has an unknown shape."""
+
+    def __init__(self, code: str):
+        super().__init__(code)
+        self.code = code
+
+
+@dataclass
+class FeatureDiff:
+    """What a cycle did to feature_list.json relative to the baseline."""
+
+    to_pass: list[int] = field(default_factory=list)
+    to_fail: list[int] = field(default_factory=list)
+    violations: list[str] = field(default_factory=list)
+    checked: int = 0  # tests inspected field by field
+
+    def flipped(self) -> dict[str, list[int]]:
+        return {"to_pass": self.to_pass, "to_fail": self.to_fail}
+
+
+def _schema_error(i: int, test: object) -> str | None:
+    if not isinstance(test, dict):
+        return f"ERROR: Test {i} is not an object"
+    for name in REQUIRED_FIELDS:
+        if name not in test:
+            return f"ERROR: Test {i} missing field: {name}"
+    if not isinstance(test["steps"], list):
+        return f"ERROR: Test {i} steps is not a list"
+    return None
+
+
+def _parse(raw: bytes) -> tuple[list | None, str | None]:
+    """Return (tests, error) for the raw file content."""
+    try:
+        data = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        return None, f"ERROR: Invalid JSON - {e}"
+    tests = data.get("tests") if isinstance(data, dict) else data
+    if not isinstance(tests, list):
+        return None, None
+    return tests, None
+
+
+class FeatureList:
+    """feature_list.json, parsed once per file version and kept in memory.
+
+    ``mark_baseline()`` remembers the current (valid) version. The parsed
+    baseline tests act as the fingerprint of the unchanged portion: a later
+    version is compared test by test with plain ``==`` (C-level, no Python
+    work for equal tests), and only tests that differ are schema-checked and
+    diffed field by field.
+    """
+
+    def __init__(self, path: str | Path = "feature_list.json"):
+        self.path = Path(path)
+        self._version: tuple[int, int, int] | None = None
+        self._digest: str | None = None
+        self._tests: list | None = None
+        self._error: str | None = None
+        self._failing: int | None = None
+        self._validation: str | None = None
+        self._diff: FeatureDiff | None = None
+        self._baseline: list | None = None
+        self._baseline_digest: str | None = None
+
+    def _load(self) -> None:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            self._version, self._digest, self._tests, self._error = None, None, None, None
+            raise FeatureListError("ERR_NO_FEATURE_LIST")
+        version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if version == self._version:
+            return
+        raw = self.path.read_bytes()
+        self._version = version
+        digest = hashlib.sha1(raw).hexdigest()
+        if digest == self._digest:
+            # Touched but identical (e.g. rewritten by git checkout)
+            return
+        self._digest = digest
+        self._failing = self._validation = self._diff = None
+        self._tests, self._error = _parse(raw)
+
+    def tests(self) -> list[dict]:
+        self._load()
+        if self._tests is None:
+            raise FeatureListError("ERR_BAD_FORMAT")
+        return self._tests
+
+    def count_failing(self) -> int:
+        tests = self.tests()
+        if self._failing is None:
+            self._failing = sum(1 for t in tests if not t.get("passes", False))
+        return self._failing
+
+    def count_passing(self) -> int:
+        return len(self.tests()) - self.count_failing()
+
+    @property
+    def digest(self) -> str | None:
+        """SHA-1 of the current file content (None if the file is missing)."""
+        try:
+            self._load()
+        except FeatureListError:
+            return None
+        return self._digest
+
+    # -----------------------------
+    # Baseline / diff
+    # -----------------------------
+
+    def mark_baseline(self) -> bool:
+        """Use the current version as the pre-cycle baseline if it is valid."""
+        self._baseline = self._baseline_digest = None
+        if self.validate() != "OK":
+            return False
+        self._baseline, self._baseline_digest = self._tests, self._digest
+        self._diff = None
+        return True
+
+    @property
+    def baseline_digest(self) -> str | None:
+        """SHA-1 of the baseline file content, if a baseline is set."""
+        return self._baseline_digest
+
+    def set_baseline(self, raw: bytes) -> bool:
+        """Use ``raw`` (e.g. from ``git show``) as the baseline if it is valid."""
+        self._baseline = self._baseline_digest = None
+        tests, error = _parse(raw)
+        if error or tests is None or any(_schema_error(i, t) for i, t in enumerate(tests)):
+            return False
+        self._baseline, self._baseline_digest = tests, hashlib.sha1(raw).hexdigest()
+        self._diff = self._validation = None
+        return True
+
+    def diff(self) -> FeatureDiff:
+        """Compare the current version with the baseline (empty diff without one)."""
+        tests = self.tests()
+        if self._diff is not None:
+            return self._diff
+        result = FeatureDiff()
+        base = self._baseline
+        if base is not None and self._digest != self._baseline_digest:
+            if len(tests) != len(base):
+                result.violations.append(f"ERROR: test count changed from {len(base)} to {len(tests)}")
+            for i, (new, old) in enumerate(zip(tests, base)):
+                if new == old:
+                    continue
+                result.checked += 1
+                error = _schema_error(i, new)
+                if error:
+                    result.violations.append(error)
+                    continue
+                changed = sorted(k for k in new.keys() | old.keys()
+                                 if k != "passes" and new.get(k) != old.get(k))
+                if changed:
+                    result.violations.append(f"ERROR: Test {i} changed fields other than passes: {', '.join(changed)}")
+                elif bool(new["passes"]) != bool(old.get("passes", False)):
+                    (result.to_pass if new["passes"] else result.to_fail).append(i)
+            for i, new in enumerate(tests[len(base):], start=len(base)):
+                error = _schema_error(i, new)
+                if error:
+                    result.violations.append(error)
+        self._diff = result
+        return result
+
+    def validate(self) -> str:
+        """Return "OK" or the first error, worded like the bash helper.
+
+        With a baseline, only changed tests are checked and any change other
+        than ``passes`` is an error; without one, every test is checked.
+        """
+        try:
+            self._load()
+        except FeatureListError:
+            return "ERROR: feature_list.json not found"
+        if self._validation is not None:
+            return self._validation
+        if self._error:
+            result = self._error
+        elif self._tests is None:
+            result = "ERROR: tests is not a list"
+        elif self._baseline is not None:
+            violations = self.diff().violations
+            result = violations[0] if violations else "OK"
+        else:
+            result = next((e for e in map(_schema_error, range(len(self._tests)), self._tests) if e), "OK")
+        self._validation = result
+        return result
+
+
+def describe(tests: list[dict], indices: list[int], limit: int = 5) -> str:
+    """Short "#3 Login works, #7 ..." list for log lines."""
+    parts = [f"#{i} {str(tests[i].get('description', ''))[:60]}" for i in indices[:limit]]
+    if len(indices) > limit:
+        parts.append(f"+{len(indices) - limit} more")
+    return ", ".join(parts)
+
+
+def main() -> int:
+    if len(sys.argv) < 2 or sys.argv[1] not in ("validate", "count", "diff"):
+        print("Usage: feature_check.py <command> [args...]")
+        print("Commands:")
+        print("  validate        check the schema of feature_list.json")
+        print("  count           print the number of failing tests")
+        print("  diff [rev]      validate against feature_list.json at rev (default HEAD)")
+        print("                  and list flipped tests")
+        return 1
+
+    features = FeatureList()
+    command = sys.argv[1]
+    if command == "validate":
+        result = features.validate()
+        print(result)
+        return 0 if result == "OK" else 1
+
+    if command == "count":
+        try:
+            print(features.count_failing())
+        except FeatureListError as e:
+            print(e.code)
+            return 1
+        return 0
+
+    rev = sys.argv[2] if len(sys.argv) > 2 else "HEAD"
+    base = subprocess.run(["git", "show", f"{rev}:{features.path.as_posix()}"], capture_output=True)
+    if base.returncode != 0 or not features.set_baseline(base.stdout):
+        print(f"ERROR: no valid feature_list.json at {rev}")
+        return 1
+    result = features.validate()
+    print(result)
+    if features._tests is not None:
+        diff = features.diff()
+        tests = features._tests
+        if diff.to_pass:
+            print(f"now passing: {describe(tests, diff.to_pass)}")
+        if diff.to_fail:
+            print(f"now failing: {describe(tests, diff.to_fail)}")
+        for violation in diff.violations[1:]:
+            print(violation)
+    return 0 if result == "OK" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
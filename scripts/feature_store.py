@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Feature Store for Autonomous Codex Harness
+Indexed, sharded copy of feature_list.json for large feature lists. Test
+bodies live in one JSONL shard per category; a fixed-width index maps each
+test id to (shard, offset, length) and a status file holds one byte per test
+for `passes`. Failing tests can be fetched, counted and flipped without
+parsing the whole list. feature_list.json stays the exchange format
+(import/export) that the agent edits.
+
+Layout of .feature_store/:
+  meta.json           count, categories, shape of the source file, source stamp
+  index.bin           per test: <shard u16><offset u32><length u32>
+  passes              per test: b"1" passing, b"0" failing
+  shards/NNN.jsonl    one test per line, in feature_list.json order
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import struct
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Iterator
+
+
+STORE_DIR = ".feature_store"
+STORE_VERSION = 1
+INDEX_ENTRY = struct.Struct("<HII")
+PASS, FAIL = b"1", b"0"
+
+
+class FeatureStoreError(Exception):
+    """The store is missing, out of date or cannot be built."""
+
+
+def _source_stamp(path: Path, raw: bytes | None = None) -> dict[str, Any]:
+    stat = path.stat()
+    if raw is None:
+        raw = path.read_bytes()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": hashlib.sha1(raw).hexdigest()}
+
+
+def _exclude_from_git(path: Path) -> None:
+    """Keep the store out of `git add .`; it is derived from feature_list.json."""
+    top = subprocess.run(["git", "rev-parse", "--show-toplevel"], capture_output=True, text=True)
+    exclude = subprocess.run(["git", "rev-parse", "--git-path", "info/exclude"], capture_output=True, text=True)
+    if top.returncode != 0 or exclude.returncode != 0:
+        return
+    try:
+        rel = path.resolve().relative_to(Path(top.stdout.strip()).resolve()).as_posix()
+    except ValueError:
+        return
+    exclude_file = Path(exclude.stdout.strip())
+    entry = f"/{rel}/"
+    existing = exclude_file.read_text(encoding="utf-8").splitlines() if exclude_file.exists() else []
+    if entry not in existing:
+        exclude_file.parent.mkdir(parents=True, exist_ok=True)
+        with exclude_file.open("a", encoding="utf-8") as f:
+            f.write(entry + "\n")
+
+
+class FeatureStore:
+    def __init__(self, root: str | Path = STORE_DIR):
+        self.root = Path(root)
+        self._meta: dict[str, Any] | None = None
+        self._meta_mtime: int | None = None
+
+    # -----------------------------
+    # Metadata
+    # -----------------------------
+
+    @property
+    def meta(self) -> dict[str, Any]:
+        path = self.root / "meta.json"
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            raise FeatureStoreError(f"no feature store at {self.root} (run: feature_store.py import)")
+        if self._meta is None or mtime != self._meta_mtime:
+            self._meta = json.loads(path.read_text(encoding="utf-8"))
+            self._meta_mtime = mtime
+            if self._meta.get("version") != STORE_VERSION:
+                raise FeatureStoreError(f"feature store version {self._meta.get('version')} is not supported")
+        return self._meta
+
+    def exists(self) -> bool:
+        return (self.root / "meta.json").exists()
+
+    def _write_meta(self, meta: dict[str, Any]) -> None:
+        tmp = self.root / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        os.replace(tmp, self.root / "meta.json")
+        self._meta = None
+
+    def in_sync(self, source: str | Path = "feature_list.json") -> bool:
+        """True if the store reflects the current content of ``source``."""
+        if not self.exists():
+            return False
+        path = Path(source)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return False
+        stamp = self.meta.get("source") or {}
+        if stamp.get("size") == stat.st_size and stamp.get("mtime_ns") == stat.st_mtime_ns:
+            return True
+        if stamp.get("size") != stat.st_size:
+            return False
+        # Same size, new mtime (e.g. after git checkout): compare content
+        if stamp.get("sha1") != hashlib.sha1(path.read_bytes()).hexdigest():
+            return False
+        self._write_meta({**self.meta, "source": _source_stamp(path)})
+        return True
+
+    # -----------------------------
+    # Import / export
+    # -----------------------------
+
+    def import_json(self, source: str | Path = "feature_list.json") -> int:
+        """(Re)build the store from ``source``. Returns the number of tests."""
+        path = Path(source)
+        raw = path.read_bytes()
+        data = json.loads(raw)
+        tests = data.get("tests") if isinstance(data, dict) else data
+        if not isinstance(tests, list):
+            raise FeatureStoreError(f"{path}: expected a list or {{tests: [...]}}")
+
+        self.root.parent.mkdir(parents=True, exist_ok=True)
+        build = self.root.with_name(self.root.name + ".build")
+        shutil.rmtree(build, ignore_errors=True)
+        (build / "shards").mkdir(parents=True)
+
+        categories: dict[str, int] = {}
+        shards: list[bytearray] = []
+        index = bytearray()
+        passes = bytearray()
+        for test in tests:
+            if not isinstance(test, dict):
+                raise FeatureStoreError(f"{path}: test {len(passes)} is not an object")
+            category = str(test.get("category", ""))
+            shard = categories.setdefault(category, len(categories))
+            if shard == len(shards):
+                if shard > 0xFFFF:
+                    raise FeatureStoreError("too many categories for the index format")
+                shards.append(bytearray())
+            line = json.dumps(test, ensure_ascii=False).encode("utf-8")
+            index += INDEX_ENTRY.pack(shard, len(shards[shard]), len(line))
+            shards[shard] += line + b"\n"
+            passes += PASS if test.get("passes", False) else FAIL
+        for shard, content in enumerate(shards):
+            (build / "shards" / f"{shard:03d}.jsonl").write_bytes(content)
+
+        (build / "index.bin").write_bytes(index)
+        (build / "passes").write_bytes(passes)
+        extra = {k: v for k, v in data.items() if k != "tests"} if isinstance(data, dict) else None
+        (build / "meta.json").write_text(json.dumps({
+            "version": STORE_VERSION,
+            "count": len(passes),
+            "categories": list(categories),
+            "shape": "dict" if isinstance(data, dict) else "list",
+            "extra": extra,
+            "source": _source_stamp(path, raw),
+        }, indent=2), encoding="utf-8")
+
+        old = self.root.with_name(self.root.name + ".old")
+        shutil.rmtree(old, ignore_errors=True)
+        if self.root.exists():
+            os.replace(self.root, old)
+        os.replace(build, self.root)
+        shutil.rmtree(old, ignore_errors=True)
+        self._meta = None
+        _exclude_from_git(self.root)
+        return len(passes)
+
+    def export_json(self, target: str | Path = "feature_list.json") -> int:
+        """Write the store back as feature_list.json (same shape as imported)."""
+        meta = self.meta
+        tests = [test for _, test in self.iter_tests()]
+        data: Any = {**(meta.get("extra") or {}), "tests": tests} if meta["shape"] == "dict" else tests
+        path = Path(target)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        os.replace(tmp, path)
+        if path.resolve() == Path("feature_list.json").resolve():
+            self._write_meta({**meta, "source": _source_stamp(path)})
+        return len(tests)
+
+    def sync(self, source: str | Path = "feature_list.json", base_sha1: str | None = None,
+             to_pass: list[int] | None = None, to_fail: list[int] | None = None) -> str:
+        """Bring the store up to date with ``source``.
+
+        If the store matches the version with digest ``base_sha1`` and the
+        caller knows which tests flipped since (see FeatureList.diff), only
+        those status bytes are rewritten; otherwise the store is rebuilt.
+        Returns "current", "patched" or "rebuilt".
+        """
+        if self.in_sync(source):
+            return "current"
+        if base_sha1 and self.exists() and (self.meta.get("source") or {}).get("sha1") == base_sha1:
+            for test_id in to_pass or []:
+                self.set_passes(test_id, True)
+            for test_id in to_fail or []:
+                self.set_passes(test_id, False)
+            self._write_meta({**self.meta, "source": _source_stamp(Path(source))})
+            return "patched"
+        self.import_json(source)
+        return "rebuilt"
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+
+    def _passes(self) -> bytes:
+        return (self.root / "passes").read_bytes()
+
+    def count(self) -> tuple[int, int]:
+        """(total, failing)"""
+        status = self._passes()
+        return len(status), status.count(FAIL)
+
+    def count_failing(self) -> int:
+        return self.count()[1]
+
+    def count_passing(self) -> int:
+        total, failing = self.count()
+        return total - failing
+
+    def _entry(self, index, test_id: int) -> tuple[int, int, int]:
+        index.seek(test_id * INDEX_ENTRY.size)
+        return INDEX_ENTRY.unpack(index.read(INDEX_ENTRY.size))
+
+    def _read(self, shard: int, offset: int, length: int, passes: bool) -> dict:
+        with (self.root / "shards" / f"{shard:03d}.jsonl").open("rb") as f:
+            f.seek(offset)
+            test = json.loads(f.read(length))
+        test["passes"] = passes
+        return test
+
+    def get(self, test_id: int) -> dict:
+        if not 0 <= test_id < self.meta["count"]:
+            raise FeatureStoreError(f"no test with id {test_id}")
+        with (self.root / "passes").open("rb") as f:
+            f.seek(test_id)
+            passes = f.read(1) == PASS
+        with (self.root / "index.bin").open("rb") as index:
+            return self._read(*self._entry(index, test_id), passes)
+
+    def failing(self, category: str | None = None, offset: int = 0,
+                limit: int | None = None) -> list[tuple[int, dict]]:
+        """(id, test) for failing tests in file order; only those tests are read."""
+        return list(self._select(FAIL, category, offset, limit))
+
+    def iter_tests(self) -> Iterator[tuple[int, dict]]:
+        """All tests in file order, reading each shard sequentially."""
+        status = self._passes()
+        entries = INDEX_ENTRY.iter_unpack((self.root / "index.bin").read_bytes())
+        handles: dict[int, Any] = {}
+        try:
+            for test_id, (shard, off, length) in enumerate(entries):
+                f = handles.get(shard)
+                if f is None:
+                    f = handles[shard] = (self.root / "shards" / f"{shard:03d}.jsonl").open("rb")
+                f.seek(off)
+                test = json.loads(f.read(length))
+                test["passes"] = status[test_id:test_id + 1] == PASS
+                yield test_id, test
+        finally:
+            for f in handles.values():
+                f.close()
+
+    def _select(self, status_byte: bytes, category: str | None, offset: int,
+                limit: int | None) -> Iterator[tuple[int, dict]]:
+        status = self._passes()
+        shard_filter = None
+        if category is not None:
+            try:
+                shard_filter = self.meta["categories"].index(category)
+            except ValueError:
+                return
+        skipped = returned = 0
+        with (self.root / "index.bin").open("rb") as index:
+            pos = status.find(status_byte)
+            while pos != -1 and (limit is None or returned < limit):
+                shard, off, length = self._entry(index, pos)
+                if shard_filter is None or shard == shard_filter:
+                    if skipped < offset:
+                        skipped += 1
+                    else:
+                        returned += 1
+                        yield pos, self._read(shard, off, length, status_byte == PASS)
+                pos = status.find(status_byte, pos + 1)
+
+    def categories(self) -> dict[str, dict[str, int]]:
+        """Per category: total and failing counts (index and status only)."""
+        names = self.meta["categories"]
+        summary = {name: {"total": 0, "failing": 0} for name in names}
+        status = self._passes()
+        index = (self.root / "index.bin").read_bytes()
+        for test_id, (shard, _, _) in enumerate(INDEX_ENTRY.iter_unpack(index)):
+            entry = summary[names[shard]]
+            entry["total"] += 1
+            if status[test_id:test_id + 1] == FAIL:
+                entry["failing"] += 1
+        return summary
+
+    # -----------------------------
+    # Updates
+    # -----------------------------
+
+    def set_passes(self, test_id: int, passes: bool) -> None:
+        """Flip one test in place (a single byte write)."""
+        if not 0 <= test_id < self.meta["count"]:
+            raise FeatureStoreError(f"no test with id {test_id}")
+        fd = os.open(self.root / "passes", os.O_WRONLY)
+        try:
+            os.pwrite(fd, PASS if passes else FAIL, test_id)
+        finally:
+            os.close(fd)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store", default=STORE_DIR, help=f"store directory (default {STORE_DIR})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("import", help="build the store from feature_list.json")
+    p.add_argument("source", nargs="?", default="feature_list.json")
+    p = sub.add_parser("export", help="write the store back as feature_list.json")
+    p.add_argument("target", nargs="?", default="feature_list.json")
+    sub.add_parser("count", help="print total / failing / passing")
+    sub.add_parser("categories", help="print per-category counts")
+    p = sub.add_parser("failing", help="print failing tests as JSON lines")
+    p.add_argument("--category")
+    p.add_argument("--offset", type=int, default=0)
+    p.add_argument("--limit", type=int, default=20)
+    p = sub.add_parser("get", help="print one test as JSON")
+    p.add_argument("id", type=int)
+    for name in ("pass", "fail"):
+        p = sub.add_parser(name, help=f"mark a test as {'passing' if name == 'pass' else 'failing'}")
+        p.add_argument("id", type=int)
+        p.add_argument("--export", action="store_true", help="also rewrite feature_list.json")
+    args = parser.parse_args()
+
+    store = FeatureStore(args.store)
+    try:
+        if args.command == "import":
+            print(f"✓ Imported {store.import_json(args.source)} tests into {store.root}")
+        elif args.command == "export":
+            print(f"✓ Exported {store.export_json(args.target)} tests to {args.target}")
+        elif args.command == "count":
+            total, failing = store.count()
+            print(f"total={total} failing={failing} passing={total - failing}")
+            if not store.in_sync():
+                print("⚠ store is out of date with feature_list.json (run: feature_store.py import)")
+        elif args.command == "categories":
+            for name, counts in store.categories().items():
+                print(f"{counts['failing']:>6} / {counts['total']:<6} {name}")
+        elif args.command == "failing":
+            for test_id, test in store.failing(args.category, args.offset, args.limit):
+                print(json.dumps({"id": test_id, **test}, ensure_ascii=False))
+        elif args.command == "get":
+            print(json.dumps({"id": args.id, **store.get(args.id)}, indent=2, ensure_ascii=False))
+        else:
+            store.set_passes(args.id, args.command == "pass")
+            if args.export:
+                store.export_json()
+            else:
+                # The store no longer matches feature_list.json; drop the stamp so in_sync()/sync() see that
+                store._write_meta({**store.meta, "source": None})
+            print(f"✓ Test {args.id} marked as {'passing' if args.command == 'pass' else 'failing'}")
+            if not args.export:
+                print("⚠ feature_list.json not updated (use --export); the next sync re-imports it")
+    except (FeatureStoreError, OSError, json.JSONDecodeError) as e:
+        print(f"ERROR: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,34 @@
 from __future__ import annotations
 
+import os
+import shlex
 import subprocess
 from pathlib import Path
 
+from scripts.resources import ResourceMonitor
 
-def run_legacy(prompt_file: str, codex_model: str) -> None:
+
+def run_legacy(prompt_file: str, codex_model: str, extra_prompt: str = "", sample_secs: float = 1.0,
+               codex_bin: str = "codex") -> None:
     prompt_path = Path(prompt_file)
     if not prompt_path.exists():
         raise FileNotFoundError(f"Prompt file not found: {prompt_path}")
 
     prompt_text = prompt_path.read_text(encoding="utf-8")
-    cmd = ["codex", "exec", "--yolo"]
+    if extra_prompt:
+        prompt_text = prompt_text.rstrip() + "\n\n" + extra_prompt
+    cmd = [*shlex.split(codex_bin), "exec", "--yolo"]
     if codex_model:
         cmd.extend(["--model", codex_model])
     cmd.append(prompt_text)
 
-    subprocess.run(cmd, check=True)
+    # Resource usage of the codex process tree goes to HARNESS_RESOURCE_FILE for the metrics record
+    monitor = ResourceMonitor(sample_secs)
+    try:
+        rc = monitor.run(cmd)
+    finally:
+        resource_file = os.getenv("HARNESS_RESOURCE_FILE", "").strip()
+        if resource_file:
+            monitor.write(resource_file)
+    if rc != 0:
+        raise subprocess.CalledProcessError(rc, cmd)
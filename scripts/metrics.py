@@ -6,10 +6,25 @@ Collects and analyzes cycle performance metrics
 from __future__ import annotations
 
 import json
+import os
 import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
+
+
+TAIL_CHUNK_SIZE = 64 * 1024
+
+
+def _parse(line: str | bytes) -> dict[str, Any] | None:
+    """One metrics record, or None for a blank, truncated or malformed line."""
+    if not line.strip():
+        return None
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return None
+    return entry if isinstance(entry, dict) else None
 
 
 class MetricsCollector:
@@ -25,7 +40,12 @@ class MetricsCollector:
         failing_after: int,
         error_msg: str | None = None,
         timeout: bool = False,
-        prompt_version: str | None = None
+        prompt_version: str | None = None,
+        push: dict[str, Any] | None = None,
+        flipped: dict[str, list[int]] | None = None,
+        sentinels: dict[str, Any] | None = None,
+        resources: dict[str, Any] | None = None,
+        phases: dict[str, float] | None = None,
     ) -> None:
         """Record metrics for a single cycle."""
         entry = {
@@ -40,6 +60,16 @@ class MetricsCollector:
             "error_msg": error_msg,
             "prompt_version": prompt_version,
         }
+        if push is not None:
+            entry["push"] = push
+        if flipped is not None:
+            entry["flipped"] = flipped
+        if sentinels is not None:
+            entry["sentinels"] = sentinels
+        if resources is not None:
+            entry["resources"] = resources
+        if phases is not None:
+            entry["phases"] = phases
 
         with self.metrics_file.open("a", encoding="utf-8") as f:
             f.write(json.dumps(entry) + "\n")
@@ -57,8 +87,8 @@ class MetricsCollector:
                 "last_10_success_rate": 0.0,
             }
 
-        lines = self.metrics_file.read_text(encoding="utf-8").strip().split("\n")
-        entries = [json.loads(line) for line in lines if line]
+        lines = self.metrics_file.read_text(encoding="utf-8").splitlines()
+        entries = [entry for entry in map(_parse, lines) if entry is not None]
 
         if not entries:
             return {
@@ -75,6 +105,7 @@ class MetricsCollector:
         total_progress = sum(e["progress"] for e in entries)
         avg_duration = sum(e["duration_secs"] for e in entries) / len(entries)
         timeout_count = sum(1 for e in entries if e.get("timeout", False))
+        last_push = next((e["push"] for e in reversed(entries) if e.get("push")), None)
 
         return {
             "total_cycles": len(entries),
@@ -84,8 +115,50 @@ class MetricsCollector:
             "error_rate": round((len(entries) - successful) / len(entries), 3),
             "timeout_count": timeout_count,
             "last_10_success_rate": self._last_n_success_rate(entries, 10),
+            "push": last_push,
+            "resources": self._resource_summary(entries),
         }
 
+    def duration_percentile(
+        self, pct: float, last_n: int = 50, successful_only: bool = True
+    ) -> tuple[float | None, int]:
+        """Return (percentile of cycle duration, sample count) over the last N cycles."""
+        if not self.metrics_file.exists():
+            return None, 0
+        durations = []
+        for entry in self._reversed_entries():
+            if len(durations) >= last_n:
+                break
+            if successful_only and not entry.get("success", False):
+                continue
+            try:
+                durations.append(float(entry.get("duration_secs", 0)))
+            except (TypeError, ValueError):
+                continue
+        durations.sort()
+        if not durations:
+            return None, 0
+        index = min(len(durations) - 1, max(0, round(pct / 100 * len(durations)) - 1))
+        return durations[index], len(durations)
+
+    def _reversed_entries(self) -> Iterator[dict[str, Any]]:
+        """Records from newest to oldest, reading the file backwards in chunks (malformed lines skipped)."""
+        with self.metrics_file.open("rb") as f:
+            pos = f.seek(0, os.SEEK_END)
+            rest = b""
+            while pos > 0:
+                size = min(TAIL_CHUNK_SIZE, pos)
+                pos -= size
+                f.seek(pos)
+                lines = (f.read(size) + rest).split(b"\n")
+                # The first line may continue in the previous chunk
+                rest = lines.pop(0)
+                for line in reversed(lines):
+                    if (entry := _parse(line)) is not None:
+                        yield entry
+            if (entry := _parse(rest)) is not None:
+                yield entry
+
     def _last_n_success_rate(self, entries: list[dict], n: int) -> float:
         """Calculate success rate of last N cycles."""
         if not entries:
@@ -94,6 +167,24 @@ class MetricsCollector:
         successful = sum(1 for e in last_n if e["success"])
         return round(successful / len(last_n), 3)
 
+    def _resource_summary(self, entries: list[dict]) -> dict[str, Any] | None:
+        """Aggregate the ``resources`` of metric records (None if no cycle has any)."""
+        records = [e["resources"] for e in entries if e.get("resources")]
+        if not records:
+            return None
+        cpu = [r.get("user_cpu_secs", 0) + r.get("sys_cpu_secs", 0) for r in records]
+        peaks = [r.get("peak_rss_mb", r.get("max_rss_mb", 0)) for r in records]
+        return {
+            "cycles": len(records),
+            "avg_cpu_secs": round(sum(cpu) / len(records), 2),
+            "max_cpu_secs": round(max(cpu), 2),
+            "avg_peak_rss_mb": round(sum(peaks) / len(records), 1),
+            "max_peak_rss_mb": max(peaks),
+            "total_read_mb": round(sum(r.get("read_mb", 0) for r in records), 1),
+            "total_write_mb": round(sum(r.get("write_mb", 0) for r in records), 1),
+            "avg_processes": round(sum(r.get("processes", 0) for r in records) / len(records), 1),
+        }
+
     def print_summary(self) -> None:
         """Print a human-readable summary."""
         summary = self.get_summary()
@@ -108,6 +199,16 @@ class MetricsCollector:
         print(f"Error Rate:            {summary['error_rate']:.1%}")
         print(f"Timeout Count:         {summary['timeout_count']}")
         print(f"Last 10 Success Rate:  {summary['last_10_success_rate']:.1%}")
+        push = summary.get("push")
+        if push:
+            print(f"Push OK / Failed:      {push['pushes_ok']} / {push['pushes_failed']}")
+            print(f"Push Latency:          {push['last_latency_secs']}s (queue depth {push['queue_depth']})")
+        resources = summary.get("resources")
+        if resources:
+            print(f"CPU per Cycle:         {resources['avg_cpu_secs']}s avg, {resources['max_cpu_secs']}s max")
+            print(f"Peak RSS:              {resources['avg_peak_rss_mb']} MB avg, {resources['max_peak_rss_mb']} MB max")
+            print(f"I/O Read / Write:      {resources['total_read_mb']} / {resources['total_write_mb']} MB")
+            print(f"Processes per Cycle:   {resources['avg_processes']} avg")
         print("=" * 50)
 
 
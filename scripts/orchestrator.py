@@ -0,0 +1,709 @@
+#!/usr/bin/env python3
+"""
+Orchestrator for Autonomous Codex Harness
+Runs the "until green" loop in a single long-lived process: config and
+feature_list.json stay parsed in memory instead of being re-read by a fresh
+interpreter for every helper call. run_until_green.sh is a thin wrapper.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from scripts.config import DEFAULT_CONFIG, load_config, resolve
+from scripts.context_builder import harness_dirs
+from scripts.feature_check import FeatureDiff, FeatureList, FeatureListError, describe
+from scripts.feature_store import FeatureStore, FeatureStoreError
+from scripts.metrics import MetricsCollector
+from scripts.prefetch import Prefetcher
+from scripts.push_queue import PushQueue
+from scripts.resources import describe_resources, process_start_time
+from scripts.scheduler import HISTORY_NAME, Scheduler, TestHistory, target_entries, write_target_file
+from scripts.sentinel import SentinelRunner, summarize, write_results
+from scripts.services import ServiceSupervisor
+from scripts.snapshot import SnapshotError, Snapshotter
+
+
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+# Exit codes (unchanged from the original bash loop)
+EXIT_GREEN = 0
+EXIT_NO_FEATURE_LIST = 2
+EXIT_BAD_FORMAT = 3
+EXIT_MAX_ERRORS = 10
+EXIT_MAX_ITERS = 11
+EXIT_NO_SSH_AGENT = 20
+TIMEOUT_RC = 124
+STREAM_CHUNK_SIZE = 64 * 1024
+WATCH_INTERVAL_SECS = 1.0
+PID_NAME = "harness.pid"  # under log_dir; the dashboard reads it to tell whether the harness runs
+
+
+@dataclass
+class Settings:
+    sleep_secs: float = 2
+    max_iters: int = 9999
+    cycle_timeout: int = 1800
+    checkpoint_interval: int = 10
+    stuck_threshold: int = 5
+    git_remote: str = "origin"
+    git_branch: str = ""
+    push_each_cycle: bool = True
+    max_errors: int = 5
+    log_dir: str = "logs"
+    log_level: str = "INFO"
+    validate_feature_list: bool = True
+    adaptive_timeout: bool = True
+    adaptive_timeout_factor: float = 1.5
+    adaptive_timeout_min: int = 600
+    adaptive_timeout_max: int = 7200
+    adaptive_timeout_samples: int = 5
+    stall_timeout: int = 600
+    snapshot_keep: int = 20
+    push_backoff_max: int = 300
+    push_alert_failures: int = 3
+    push_flush_timeout: int = 60
+    use_feature_store: bool = True
+    feature_store_dir: str = ".feature_store"
+    scheduler: bool = True
+    scheduler_targets: int = 1
+    scheduler_retry_penalty: float = 5.0
+    scheduler_cost_penalty: float = 2.0
+    sentinel: bool = True
+    sentinel_file: str = "harness_sentinels.json"
+    sentinel_workers: int = 4
+    sentinel_timeout: int = 120
+    services: bool = True
+    services_file: str = "harness_services.json"
+    services_keep_running: bool = False
+    prefetch: bool = True
+    prefetch_warm_files: int = 50
+
+    @classmethod
+    def load(cls, config: dict[str, object], env: dict[str, str] | None = None) -> "Settings":
+        """Resolve settings like the bash loop: env var, then harness.conf, then default."""
+        values = resolve({**DEFAULT_CONFIG, **config}, env)
+        names = {f.name for f in fields(cls)}
+        return cls(max_iters=values["max_iterations"], **{k: v for k, v in values.items() if k in names})
+
+
+class PhaseTimer:
+    """Lap timer for one iteration: ``lap(name)`` books the time since the previous lap under ``name``."""
+
+    def __init__(self):
+        self.phases: dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def lap(self, name: str) -> None:
+        now = time.perf_counter()
+        self.phases[name] = self.phases.get(name, 0.0) + now - self._last
+        self._last = now
+
+    def rounded(self) -> dict[str, float]:
+        return {name: round(secs, 4) for name, secs in self.phases.items()}
+
+
+def _git(*args: str, check: bool = False) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], capture_output=True, text=True, check=check)
+
+
+class Orchestrator:
+    """The until-green loop: cycle, validate, roll back, push, checkpoint."""
+
+    def __init__(self, settings: Settings, config: dict[str, object]):
+        self.settings = settings
+        self.config = config
+        self.log_dir = Path(settings.log_dir)
+        self.features = FeatureList()
+        self.metrics = MetricsCollector()
+        self.snapshots = Snapshotter(keep=settings.snapshot_keep)
+        self.store = FeatureStore(settings.feature_store_dir) if settings.use_feature_store else None
+        self.history = TestHistory(self.log_dir / HISTORY_NAME)
+        self.scheduler = Scheduler(self.history, settings.scheduler_retry_penalty, settings.scheduler_cost_penalty)
+        self.sentinels = SentinelRunner(settings.sentinel_file, log_dir=settings.log_dir,
+                                        workers=settings.sentinel_workers, timeout=settings.sentinel_timeout)
+        self.services = ServiceSupervisor(settings.services_file, settings.log_dir)
+        self.prefetcher = Prefetcher(
+            self.scheduler,
+            os.getenv("CYCLE_PROMPT_FILE", "").strip() or str(config.get("cycle_prompt_file", "coding_prompt.md")),
+            targets=settings.scheduler_targets if settings.scheduler else 0,
+            warm_count=settings.prefetch_warm_files,
+            max_file_bytes=int(config.get("max_file_bytes", 200000)),
+            skip_dirs=harness_dirs(config),
+        ) if settings.prefetch else None
+        self.pre_cycle_untracked: set[str] = set()
+        self.push_queue: PushQueue | None = None
+        self.iteration = 0
+        self.error_count = 0
+        self.failure_history: dict[int, int] = {}
+
+    # -----------------------------
+    # Helpers
+    # -----------------------------
+
+    def log(self, level: str, msg: str) -> None:
+        if LOG_LEVELS.get(level, 20) < LOG_LEVELS.get(self.settings.log_level, 20):
+            return
+        ts = datetime.now().astimezone().isoformat(timespec="seconds")
+        print(f"[{ts}] [{level}] {msg}", flush=True)
+        # A fallback reset --hard may remove the log dir if a cycle committed it
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        with (self.log_dir / "harness.jsonl").open("a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "timestamp": ts, "level": level, "message": msg, "iteration": self.iteration,
+            }) + "\n")
+
+    def prompt_version(self) -> str:
+        prompt = Path("coding_prompt.md")
+        if not prompt.exists():
+            return ""
+        return hashlib.sha256(prompt.read_bytes()).hexdigest()[:8]
+
+    def check_control_files(self) -> bool:
+        """Block while paused; return False if a stop was requested."""
+        if Path(".harness_pause").exists():
+            self.log("INFO", "PAUSE requested. Waiting for .harness_pause to be removed...")
+            while Path(".harness_pause").exists():
+                time.sleep(5)
+            self.log("INFO", "RESUMED")
+        if Path(".harness_stop").exists():
+            self.log("INFO", "STOP requested. Exiting gracefully...")
+            Path(".harness_stop").unlink(missing_ok=True)
+            return False
+        return True
+
+    def detect_stuck(self, current_failing: int, iteration: int) -> bool:
+        """Return True if the failing count has not moved for stuck_threshold cycles."""
+        threshold = self.settings.stuck_threshold
+        self.failure_history[iteration] = current_failing
+        if iteration < threshold:
+            return False
+        prev = self.failure_history.get(iteration - 1)
+        for j in range(iteration - threshold + 1, iteration):
+            if self.failure_history.get(j) != prev:
+                return False
+        if current_failing == prev:
+            self.log("WARNING", f"No progress in last {threshold} cycles (stuck at {current_failing} failing tests)")
+            self.log("WARNING", "Consider manual intervention or changing strategy.")
+            return True
+        return False
+
+    def effective_timeout(self) -> tuple[int, str]:
+        """Pick the wall-clock limit for the next cycle.
+
+        With enough history the limit is p95 of recent successful cycle
+        durations times adaptive_timeout_factor, clamped to
+        [adaptive_timeout_min, adaptive_timeout_max]; otherwise the fixed
+        cycle_timeout applies. cycle_timeout=0 disables the limit entirely.
+        """
+        s = self.settings
+        if s.cycle_timeout <= 0:
+            return 0, "disabled"
+        if not s.adaptive_timeout:
+            return s.cycle_timeout, "fixed"
+        try:
+            p95, samples = self.metrics.duration_percentile(95)
+        except (OSError, ValueError):
+            p95, samples = None, 0
+        if p95 is None or samples < s.adaptive_timeout_samples:
+            return s.cycle_timeout, f"fixed, {samples} samples"
+        limit = int(min(max(p95 * s.adaptive_timeout_factor, s.adaptive_timeout_min), s.adaptive_timeout_max))
+        return limit, f"adaptive, p95={p95:.0f}s over {samples} cycles"
+
+    def run_cycle(self, log_file: Path, timeout: int,
+                  env: dict[str, str] | None = None) -> tuple[int, str | None]:
+        """Run one ./run_cycle.sh, streaming its output into log_file.
+
+        The process tree is killed when it exceeds ``timeout`` or produces no
+        output for stall_timeout seconds. Returns (exit code, kill reason);
+        a killed cycle reports exit code 124 like timeout(1).
+        """
+        stall_timeout = self.settings.stall_timeout
+        last_output = [time.monotonic()]
+
+        with log_file.open("wb") as log:
+            proc = subprocess.Popen(
+                ["./run_cycle.sh"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, start_new_session=True, env=env,
+            )
+
+            def pump() -> None:
+                for chunk in iter(lambda: proc.stdout.read1(STREAM_CHUNK_SIZE), b""):
+                    log.write(chunk)
+                    log.flush()
+                    last_output[0] = time.monotonic()
+
+            reader = threading.Thread(target=pump, daemon=True)
+            reader.start()
+            started = time.monotonic()
+            reason = None
+            while proc.poll() is None:
+                now = time.monotonic()
+                if timeout > 0 and now - started > timeout:
+                    reason = "timeout"
+                elif stall_timeout > 0 and now - last_output[0] > stall_timeout:
+                    reason = "stall"
+                if reason:
+                    self._kill_tree(proc)
+                    break
+                # Returns as soon as the cycle exits instead of rounding it up to the next interval
+                try:
+                    proc.wait(timeout=WATCH_INTERVAL_SECS)
+                except subprocess.TimeoutExpired:
+                    pass
+            reader.join(timeout=10)
+            if reason:
+                log.write(f"\n==> harness killed cycle: {reason}\n".encode())
+                return TIMEOUT_RC, reason
+            return proc.returncode, None
+
+    def _kill_tree(self, proc: subprocess.Popen) -> None:
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.wait()
+        except ProcessLookupError:
+            proc.wait()
+
+    def _harness_output(self, path: str) -> bool:
+        """Files the harness itself writes during a cycle (metrics, everything under log_dir)."""
+        return path == str(self.metrics.metrics_file) or Path(path).is_relative_to(self.log_dir)
+
+    def _untracked_to_keep(self, untracked: set[str]) -> set[str]:
+        return self.pre_cycle_untracked | {p for p in untracked if self._harness_output(p)}
+
+    def has_uncommitted_changes(self) -> bool:
+        """Tracked changes, or untracked files that the cycle created."""
+        changed, untracked = self.snapshots.status()
+        return bool(changed or untracked - self._untracked_to_keep(untracked))
+
+    def rollback(self, pre_cycle_commit: str, reason: str) -> None:
+        """Back up the paths the cycle touched under refs/harness/backups/, then restore them."""
+        name = f"{reason}-cycle-{self.iteration}"
+        try:
+            commit = self.snapshots.rollback(
+                pre_cycle_commit, name, f"FAILED_CYCLE_{self.iteration}: Backup before rollback ({reason})",
+                ignore_untracked=self._untracked_to_keep(self.snapshots.status()[1]),
+                keep=self._harness_output,
+            )
+        except SnapshotError as e:
+            self.log("WARNING", f"Snapshot rollback failed ({e}); falling back to git reset --hard")
+            _git("reset", "--hard", pre_cycle_commit)
+            return
+        if commit:
+            self.log("INFO", f"Backup saved as {self.snapshots.namespace}{name} ({commit[:10]})")
+
+    def sync_feature_store(self, diff: FeatureDiff | None = None) -> None:
+        """Keep .feature_store/ in step with feature_list.json; only flipped tests are patched."""
+        if self.store is None:
+            return
+        try:
+            if diff is not None and not diff.violations:
+                state = self.store.sync(base_sha1=self.features.baseline_digest,
+                                        to_pass=diff.to_pass, to_fail=diff.to_fail)
+            else:
+                state = self.store.sync()
+        except (FeatureStoreError, OSError, ValueError) as e:
+            self.log("WARNING", f"feature store sync failed: {e}")
+            return
+        if state != "current":
+            self.log("DEBUG", f"feature store {state} ({self.store.root})")
+
+    def schedule(self, cycle_id: str, head: str) -> tuple[list[int], dict[str, str] | None]:
+        """Pick this cycle's target tests and hand them to run_cycle.sh via HARNESS_TARGET_FILE."""
+        if self.prefetcher is not None:
+            return self.schedule_prepared(cycle_id, head)
+        if not self.settings.scheduler or self.settings.scheduler_targets <= 0:
+            return [], None
+        tests = self.features.tests()
+        targets = self.scheduler.targets(tests, self.settings.scheduler_targets)
+        if not targets:
+            return [], None
+        target_file = self.log_dir / "cycle_target.json"
+        write_target_file(target_file, cycle_id, target_entries(tests, targets, self.history))
+        self.log("INFO", f"target: {describe(tests, targets)}")
+        return targets, {**os.environ, "HARNESS_TARGET_FILE": str(target_file.resolve())}
+
+    def schedule_prepared(self, cycle_id: str, head: str) -> tuple[list[int], dict[str, str] | None]:
+        """Like schedule(), but with inputs prefetched during the previous iteration's tail.
+
+        The prompt (prompt file plus target section) is handed over ready to
+        use via HARNESS_PROMPT_FILE. Prefetched inputs built from another
+        HEAD or feature_list.json are rebuilt here.
+        """
+        digest = self.features.digest
+        prepared, status = self.prefetcher.take(head, digest)
+        if prepared is not None:
+            self.log("DEBUG", f"prefetch hit (prepared in {prepared.secs}s, {prepared.warmed} files warmed)")
+        else:
+            if status != "nothing prefetched":
+                self.log("INFO", f"prefetch discarded: {status}")
+            try:
+                prepared = self.prefetcher.prepare(head, digest, self.features.tests())
+            except (OSError, ValueError) as e:
+                self.log("WARNING", f"Failed to prepare cycle inputs: {e}")
+                return [], None
+        env = None
+        if prepared.entries:
+            target_file = self.log_dir / "cycle_target.json"
+            write_target_file(target_file, cycle_id, prepared.entries)
+            self.log("INFO", f"target: {describe(self.features.tests(), prepared.targets)}")
+            env = {**os.environ, "HARNESS_TARGET_FILE": str(target_file.resolve())}
+        if prepared.prompt is not None:
+            prompt_file = self.log_dir / "cycle_prompt.md"
+            prompt_file.write_text(prepared.prompt, encoding="utf-8")
+            env = {**(env or os.environ), "HARNESS_PROMPT_FILE": str(prompt_file.resolve())}
+        return prepared.targets, env
+
+    def start_prefetch(self) -> None:
+        """Prepare the next cycle's inputs in the background; the tree is final for this iteration."""
+        try:
+            self.prefetcher.start(_git("rev-parse", "HEAD").stdout.strip(), self.features.digest,
+                                  self.features.tests())
+        except FeatureListError:
+            pass
+
+    def ensure_services(self, env: dict[str, str] | None) -> tuple[float, dict[str, str] | None]:
+        """Start or restart dev servers as needed and hand their status to the cycle via HARNESS_SERVICES_FILE.
+
+        Returns the wall time spent and the cycle environment.
+        """
+        if not self.settings.services or not self.services.definitions.exists():
+            return 0.0, env
+        started = time.time()
+        try:
+            entries = self.services.ensure()
+        except (OSError, ValueError, SnapshotError) as e:
+            self.log("WARNING", f"service supervisor failed: {e}")
+            return round(time.time() - started, 2), env
+        for entry in entries:
+            if entry.get("status") != "healthy":
+                self.log("WARNING", f"service {entry['name']}: {entry.get('status')} ({entry.get('detail')}, "
+                                    f"see {entry.get('log')})")
+            elif entry.get("reason"):
+                self.log("INFO", f"service {entry['name']} (re)started: {entry['reason']} "
+                                 f"({entry.get('startup_secs')}s)")
+        secs = round(time.time() - started, 2)
+        self.log("DEBUG", f"services checked in {secs}s")
+        return secs, {**(env or os.environ), "HARNESS_SERVICES_FILE": str(self.services.state_file.resolve())}
+
+    def stop_services(self) -> None:
+        if not self.settings.services or self.settings.services_keep_running:
+            return
+        try:
+            self.services.stop_all()
+        except OSError as e:
+            self.log("WARNING", f"Failed to stop services: {e}")
+
+    def verify_sentinels(self, env: dict[str, str] | None) -> tuple[dict[str, Any] | None, dict[str, str] | None]:
+        """Re-run stale regression sentinels and hand the results to the cycle via HARNESS_SENTINEL_FILE."""
+        if not self.settings.sentinel or not self.sentinels.definitions.exists():
+            return None, env
+        tests = self.features.tests()
+        started = time.time()
+        try:
+            results = self.sentinels.run(tests)
+        except (OSError, ValueError, SnapshotError) as e:
+            self.log("WARNING", f"regression sentinels failed to run: {e}")
+            return None, env
+        summary = {**summarize(results), "wall_secs": round(time.time() - started, 2)}
+        if not results:
+            return summary, env
+        self.log("INFO", f"sentinels: {summary['total']} checked, {summary['ran']} re-run in {summary['secs']}s, "
+                         f"{summary['cached']} cached")
+        if summary["failed"]:
+            self.log("WARNING", f"sentinel regressions: {describe(tests, summary['failed'])}")
+        results_file = self.log_dir / "sentinel_results.json"
+        write_results(results_file, results, tests)
+        return summary, {**(env or os.environ), "HARNESS_SENTINEL_FILE": str(results_file.resolve())}
+
+    def read_resources(self, resource_file: Path) -> dict[str, Any] | None:
+        """Resource usage of the cycle's codex process tree, as written by run_cycle."""
+        try:
+            resources = json.loads(resource_file.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        self.log("INFO", f"resources: {describe_resources(resources)}")
+        return resources
+
+    def record_history(self, cycle_id: str, tests: list[dict], targets: list[int], duration: float,
+                       outcome: str, flipped: FeatureDiff | None) -> None:
+        try:
+            self.history.record(
+                cycle_id, tests, targets, duration, outcome,
+                flipped.to_pass if flipped is not None else None, flipped.to_fail if flipped is not None else None,
+            )
+        except OSError as e:
+            self.log("WARNING", f"Failed to record test history for {cycle_id}: {e}")
+
+    def queue_push(self) -> None:
+        """Hand the current HEAD to the background push worker."""
+        branch = self.settings.git_branch or _git("rev-parse", "--abbrev-ref", "HEAD").stdout.strip()
+        if not branch or branch == "HEAD":
+            self.log("WARNING", "cannot determine git branch; skipping push.")
+            return
+        if _git("remote", "get-url", self.settings.git_remote).returncode != 0:
+            self.log("WARNING", f"git remote '{self.settings.git_remote}' not configured; skipping push.")
+            return
+        self.push_queue.enqueue(_git("rev-parse", "HEAD").stdout.strip(), branch)
+        stats = self.push_queue.stats()
+        latency = f"{stats['last_latency_secs']}s" if stats["last_latency_secs"] is not None else "n/a"
+        self.log("INFO", f"git push queued (depth {stats['queue_depth']}, last latency {latency})")
+        if stats["consecutive_failures"] >= self.settings.push_alert_failures:
+            self.log("WARNING", f"git push failing: {stats['consecutive_failures']} attempts in a row "
+                                f"({stats['last_error']}, see {self.log_dir / 'push.log'})")
+
+    def stop_push_queue(self) -> None:
+        if self.push_queue is None:
+            return
+        if not self.push_queue.stop(self.settings.push_flush_timeout):
+            self.log("WARNING", f"git push queue not flushed on exit (see {self.log_dir / 'push.log'})")
+        self.push_queue = None
+
+    def checkpoint(self) -> None:
+        passing = self.features.count_passing()
+        tag = f"checkpoint-iter-{self.iteration}-passing-{passing}"
+        if _git("tag", tag).returncode == 0 and self.push_queue is not None:
+            self.push_queue.enqueue_tag(tag)
+        self.log("INFO", f"Checkpoint created at iteration {self.iteration} ({passing} tests passing)")
+
+    def count_failing(self) -> int | None:
+        try:
+            return self.features.count_failing()
+        except FeatureListError:
+            return None
+
+    def print_config_summary(self) -> None:
+        print("==> Config summary")
+        print(f"test_case_limit={self.config.get('test_case_limit')}")
+        print(f"codex_model={self.config.get('codex_model')}")
+        print(f"cycle_prompt_file={self.config.get('cycle_prompt_file')}")
+        print(f"cycle_timeout={self.settings.cycle_timeout}s")
+
+    def finish(self, code: int) -> int:
+        try:
+            self.metrics.print_summary()
+        except (OSError, ValueError, KeyError) as e:
+            self.log("WARNING", f"Failed to show metrics summary: {e}")
+        return code
+
+    # -----------------------------
+    # Main loop
+    # -----------------------------
+
+    def write_pid_file(self) -> None:
+        pid = os.getpid()
+        (self.log_dir / PID_NAME).write_text(json.dumps({
+            "pid": pid, "starttime": process_start_time(pid), "started_at": datetime.now().isoformat(timespec="seconds"),
+        }), encoding="utf-8")
+
+    def remove_pid_file(self) -> None:
+        pid_file = self.log_dir / PID_NAME
+        try:
+            if json.loads(pid_file.read_text(encoding="utf-8")).get("pid") == os.getpid():
+                pid_file.unlink()
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def run(self) -> int:
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.print_config_summary()
+
+        if self.settings.push_each_cycle and not os.environ.get("SSH_AUTH_SOCK"):
+            print("ERROR: PUSH_EACH_CYCLE=1 requires ssh-agent. Run: eval $(ssh-agent -s) && ssh-add")
+            return EXIT_NO_SSH_AGENT
+
+        if self.settings.push_each_cycle:
+            self.push_queue = PushQueue(
+                self.settings.git_remote, self.log_dir / "push.log", backoff_max=self.settings.push_backoff_max,
+            )
+            self.push_queue.start()
+        self.write_pid_file()
+        try:
+            return self.loop()
+        finally:
+            self.stop_services()
+            self.stop_push_queue()
+            self.remove_pid_file()
+
+    def loop(self) -> int:
+
+        for i in range(1, self.settings.max_iters + 1):
+            self.iteration = i
+            if not self.check_control_files():
+                return EXIT_GREEN
+
+            ts = datetime.now().astimezone().isoformat(timespec="seconds")
+            cycle_start = time.time()
+            phases = PhaseTimer()
+            log_file = self.log_dir / f"cycle_{i}_{datetime.now():%Y%m%dT%H%M%S}.log"
+
+            try:
+                fail = self.features.count_failing()
+            except FeatureListError as e:
+                if e.code == "ERR_NO_FEATURE_LIST":
+                    self.log("ERROR", "feature_list.json fehlt. Erst run_init.sh ausführen.")
+                    return EXIT_NO_FEATURE_LIST
+                self.log("ERROR", "feature_list.json Format unbekannt (erwarte Liste oder {tests:[...]})")
+                return EXIT_BAD_FORMAT
+
+            print()
+            print("==============================")
+            self.log("INFO", f"Iteration #{i}  {ts}")
+            self.log("INFO", f"failing tests: {fail}")
+            self.log("INFO", f"errors so far: {self.error_count} / {self.settings.max_errors}")
+            self.log("INFO", f"log: {log_file}")
+            timeout, timeout_basis = self.effective_timeout()
+            self.log("INFO", f"cycle timeout: {timeout}s ({timeout_basis}), stall timeout: {self.settings.stall_timeout}s")
+            print("==============================")
+
+            if fail == 0:
+                self.log("INFO", "All tests passing. Done.")
+                return self.finish(EXIT_GREEN)
+
+            if self.detect_stuck(fail, i):
+                self.log("WARNING", "Stuck detected - incrementing error count")
+                self.error_count += 1
+            phases.lap("start")
+
+            pre_cycle_commit = _git("rev-parse", "HEAD").stdout.strip()
+            self.features.mark_baseline()
+            self.sync_feature_store()
+            phases.lap("baseline")
+            cycle_id = log_file.stem
+            targets, cycle_env = self.schedule(cycle_id, pre_cycle_commit)
+            phases.lap("schedule")
+            services_secs, cycle_env = self.ensure_services(cycle_env)
+            phases.lap("services")
+            sentinel_summary, cycle_env = self.verify_sentinels(cycle_env)
+            phases.lap("sentinels")
+            resource_file = self.log_dir / "cycle_resources.json"
+            resource_file.unlink(missing_ok=True)
+            cycle_env = {**(cycle_env or os.environ), "HARNESS_RESOURCE_FILE": str(resource_file.resolve())}
+            self.pre_cycle_untracked = self.snapshots.status()[1]
+            phases.lap("snapshot")
+            rc, kill_reason = self.run_cycle(log_file, timeout, cycle_env)
+            phases.lap("cycle")
+            resources = self.read_resources(resource_file)
+            # Services and sentinels are handled before the agent; their time is not part of the cycle
+            cycle_duration = int(time.time() - cycle_start - services_secs
+                                 - (sentinel_summary or {}).get("wall_secs", 0))
+
+            cycle_success = False
+            flipped = None
+            timeout_occurred = False
+            error_msg = ""
+
+            if rc == TIMEOUT_RC:
+                if kill_reason == "stall":
+                    self.log("ERROR", f"run_cycle.sh produced no output for {self.settings.stall_timeout}s, "
+                                      f"killed as stalled (see {log_file})")
+                else:
+                    self.log("ERROR", f"run_cycle.sh timed out after {timeout}s (see {log_file})")
+                self.error_count += 1
+                timeout_occurred = True
+                error_msg = kill_reason or "timeout"
+                if self.has_uncommitted_changes():
+                    self.log("WARNING", "Uncommitted changes detected after timeout. Rolling back.")
+                    phases.lap("validate")
+                    self.rollback(pre_cycle_commit, "timeout")
+                    phases.lap("rollback")
+            elif rc != 0:
+                self.error_count += 1
+                self.log("ERROR", f"run_cycle.sh failed with exit code {rc} (see {log_file})")
+                error_msg = f"exit_code_{rc}"
+                if self.has_uncommitted_changes():
+                    self.log("WARNING", "Uncommitted changes detected. Creating backup and rolling back.")
+                    phases.lap("validate")
+                    self.rollback(pre_cycle_commit, "failed")
+                    phases.lap("rollback")
+            else:
+                self.log("INFO", f"run_cycle.sh finished OK (see {log_file})")
+                validation = self.features.validate() if self.settings.validate_feature_list else "OK"
+                if validation != "OK":
+                    self.log("ERROR", f"feature_list.json corrupted after cycle: {validation}")
+                    self.log("WARNING", "Rolling back to pre-cycle state.")
+                    phases.lap("validate")
+                    self.rollback(pre_cycle_commit, "corrupt")
+                    phases.lap("rollback")
+                    self.error_count += 1
+                    error_msg = "corrupted_feature_list"
+                else:
+                    cycle_success = True
+                    flipped = self.features.diff()
+                    tests = self.features.tests()
+                    if flipped.to_pass:
+                        self.log("INFO", f"now passing: {describe(tests, flipped.to_pass)}")
+                    if flipped.to_fail:
+                        self.log("WARNING", f"now failing: {describe(tests, flipped.to_fail)}")
+                    phases.lap("validate")
+                    self.sync_feature_store(flipped)
+                    phases.lap("feature_store")
+
+                # Pushes run in the background; their failures do not count as cycle errors
+                if self.push_queue is not None and cycle_success:
+                    self.queue_push()
+                    phases.lap("push")
+
+            new_fail = self.count_failing()
+            if new_fail is not None:
+                self.log("INFO", f"failing tests after iteration: {new_fail}")
+            phases.lap("validate")
+            if new_fail is not None:
+                self.record_history(cycle_id, self.features.tests(), targets, cycle_duration,
+                                    error_msg or "unchanged", flipped)
+            phases.lap("history")
+            # Overlaps with checkpoint, metrics, the background push and the sleep below
+            if self.prefetcher is not None and new_fail:
+                self.start_prefetch()
+                phases.lap("prefetch")
+
+            interval = self.settings.checkpoint_interval
+            if interval > 0 and i % interval == 0 and cycle_success:
+                self.checkpoint()
+                phases.lap("checkpoint")
+
+            try:
+                self.metrics.record_cycle(
+                    i, cycle_duration, cycle_success, fail, new_fail if new_fail is not None else fail,
+                    error_msg, timeout_occurred, self.prompt_version(),
+                    push=self.push_queue.stats() if self.push_queue is not None else None,
+                    flipped=flipped.flipped() if flipped is not None else None,
+                    sentinels=sentinel_summary,
+                    resources=resources,
+                    phases=phases.rounded(),
+                )
+            except OSError as e:
+                self.log("WARNING", f"Failed to record metrics for cycle {i}: {e}")
+            self.log("DEBUG", "phases: " + ", ".join(f"{k} {v:.3f}s" for k, v in phases.rounded().items()))
+
+            if self.error_count > self.settings.max_errors:
+                self.log("ERROR", f"STOP: error_count={self.error_count} exceeded MAX_ERRORS={self.settings.max_errors}")
+                self.log("ERROR", f"Last log: {log_file}")
+                return self.finish(EXIT_MAX_ERRORS)
+
+            time.sleep(self.settings.sleep_secs)
+
+        self.log("ERROR", f"reached MAX_ITERS={self.settings.max_iters} without finishing.")
+        return self.finish(EXIT_MAX_ITERS)
+
+
+def main() -> int:
+    config = load_config()
+    settings = Settings.load(config)
+    return Orchestrator(settings, config).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
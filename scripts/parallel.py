@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Parallel Cycle Scheduler for Autonomous Codex Harness
+Runs N cycles at once, each on its own git worktree and its own disjoint
+shard of failing tests, then merges the results back into the main checkout.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from scripts.config import DEFAULT_CONFIG, load_config, resolve
+from scripts.feature_check import FeatureList
+from scripts.metrics import MetricsCollector
+from scripts.snapshot import SnapshotError, Snapshotter
+
+
+FEATURE_FILE = "feature_list.json"
+PASSES_FIELD = "passes"
+
+
+@dataclass
+class Worker:
+    index: int
+    path: Path
+    shard: list[int]
+    shard_file: Path
+    log_file: Path
+    failing_before: int = 0
+    proc: subprocess.Popen | None = None
+    started: float = 0.0
+    rc: int | None = None
+    timed_out: bool = False
+    commit: str = ""
+
+
+def _log(level: str, msg: str, log_dir: Path) -> None:
+    ts = datetime.now().astimezone().isoformat(timespec="seconds")
+    print(f"[{ts}] [{level}] {msg}", flush=True)
+    log_dir.mkdir(parents=True, exist_ok=True)
+    with (log_dir / "harness.jsonl").open("a", encoding="utf-8") as f:
+        f.write(json.dumps({"timestamp": ts, "level": level, "message": msg, "component": "parallel"}) + "\n")
+
+
+def _git(*args: str, cwd: Path | None = None, check: bool = True) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=check)
+
+
+def _tests_of(data: Any) -> list[dict]:
+    tests = data.get("tests") if isinstance(data, dict) else data
+    if not isinstance(tests, list):
+        raise ValueError("feature_list.json: expected a list or {tests: [...]}")
+    return tests
+
+
+def _load_tests(root: Path) -> list[dict]:
+    return _tests_of(json.loads((root / FEATURE_FILE).read_text(encoding="utf-8")))
+
+
+def _prompt_version(root: Path) -> str | None:
+    prompt = root / "coding_prompt.md"
+    if not prompt.exists():
+        return None
+    return hashlib.sha256(prompt.read_bytes()).hexdigest()[:8]
+
+
+def _count_failing(root: Path) -> int:
+    return sum(1 for t in _load_tests(root) if not t.get(PASSES_FIELD, False))
+
+
+def check_feature_list(root: Path, baseline: bytes) -> str:
+    """"OK" or the first violation of root's feature_list.json against ``baseline``.
+
+    Same rule as the serial loop: only ``passes`` may change.
+    """
+    features = FeatureList(root / FEATURE_FILE)
+    features.set_baseline(baseline)
+    return features.validate()
+
+
+# -----------------------------
+# Sharding
+# -----------------------------
+
+def shard_failing(tests: list[dict], workers: int, strategy: str = "category") -> list[list[int]]:
+    """Split failing test indices into at most ``workers`` disjoint shards.
+
+    ``category`` packs whole categories into shards (largest first, onto the
+    currently smallest shard) so workers touch unrelated parts of the app;
+    it falls back to ``range`` when there are fewer categories than workers.
+    ``range`` splits the failing tests, in list order, into contiguous chunks.
+    """
+    failing = [i for i, t in enumerate(tests) if not t.get(PASSES_FIELD, False)]
+    if not failing or workers < 1:
+        return []
+
+    if strategy == "category":
+        by_category: dict[str, list[int]] = {}
+        for i in failing:
+            by_category.setdefault(str(tests[i].get("category", "Unknown")), []).append(i)
+        if len(by_category) >= workers:
+            shards: list[list[int]] = [[] for _ in range(workers)]
+            for ids in sorted(by_category.values(), key=len, reverse=True):
+                min(shards, key=len).extend(ids)
+            return [sorted(s) for s in shards if s]
+
+    count = min(workers, len(failing))
+    size, extra = divmod(len(failing), count)
+    shards = []
+    start = 0
+    for k in range(count):
+        end = start + size + (1 if k < extra else 0)
+        shards.append(failing[start:end])
+        start = end
+    return shards
+
+
+def shard_prompt(shard_file: str | Path) -> str:
+    """Render the prompt section that restricts a cycle to its shard."""
+    shard = json.loads(Path(shard_file).read_text(encoding="utf-8"))
+    lines = [
+        "### PARALLEL SHARD (HARNESS)",
+        "",
+        f"You are worker {shard['worker']} of {shard['workers']} running in parallel on separate checkouts.",
+        "Only work on the following failing tests from feature_list.json (0-based index).",
+        "Do NOT change `passes` for any test outside this list; other workers own them.",
+        "",
+    ]
+    for entry in shard["tests"]:
+        lines.append(f"- #{entry['index']} [{entry['category']}] {entry['description']}")
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------------
+# feature_list.json merge resolver
+# -----------------------------
+
+def _without_passes(test: dict) -> dict:
+    return {k: v for k, v in test.items() if k != PASSES_FIELD}
+
+
+def resolve_passes_conflict(base: Any, ours: Any, theirs: Any) -> Any | None:
+    """Three-way merge of feature_list.json where only ``passes`` may differ.
+
+    Returns the merged document (shaped like ``ours``), or None if anything
+    besides ``passes`` changed or both sides flipped the same test differently.
+    """
+    base_tests, our_tests, their_tests = _tests_of(base), _tests_of(ours), _tests_of(theirs)
+    if not len(base_tests) == len(our_tests) == len(their_tests):
+        return None
+
+    merged = []
+    for b, o, t in zip(base_tests, our_tests, their_tests):
+        if not _without_passes(b) == _without_passes(o) == _without_passes(t):
+            return None
+        b_pass, o_pass, t_pass = (x.get(PASSES_FIELD, False) for x in (b, o, t))
+        if o_pass != b_pass and t_pass != b_pass and o_pass != t_pass:
+            return None
+        result = dict(o)
+        if t_pass != b_pass:
+            result[PASSES_FIELD] = t_pass
+        merged.append(result)
+
+    if isinstance(ours, dict):
+        return {**ours, "tests": merged}
+    return merged
+
+
+def merge_worker(root: Path, commit: str) -> tuple[bool, str]:
+    """Merge a worker commit into the main checkout.
+
+    Conflicts confined to feature_list.json are resolved with
+    resolve_passes_conflict; any other conflict aborts the merge.
+    """
+    result = _git("merge", "--no-ff", "--no-edit", "-m", f"Merge parallel worker {commit[:10]}", commit,
+                  cwd=root, check=False)
+    if result.returncode == 0:
+        return True, "merged"
+
+    conflicted = _git("diff", "--name-only", "--diff-filter=U", cwd=root, check=False).stdout.split()
+    if conflicted == [FEATURE_FILE]:
+        try:
+            stages = [
+                json.loads(_git("show", f":{n}:{FEATURE_FILE}", cwd=root).stdout) for n in (1, 2, 3)
+            ]
+            merged = resolve_passes_conflict(*stages)
+        except (subprocess.CalledProcessError, ValueError):
+            merged = None
+        if merged is not None:
+            (root / FEATURE_FILE).write_text(json.dumps(merged, indent=2, ensure_ascii=False) + "\n",
+                                             encoding="utf-8")
+            _git("add", FEATURE_FILE, cwd=root)
+            _git("commit", "--no-edit", cwd=root)
+            return True, "merged (feature_list.json passes resolved)"
+
+    _git("merge", "--abort", cwd=root, check=False)
+    return False, f"conflict in {', '.join(conflicted) or 'unknown files'}"
+
+
+# -----------------------------
+# Worktrees & workers
+# -----------------------------
+
+def _exclude_worktree_dir(root: Path, worktree_dir: Path) -> None:
+    """Keep the worktree directory out of `git add .` in the main checkout."""
+    try:
+        rel = worktree_dir.resolve().relative_to(root.resolve()).as_posix()
+    except ValueError:
+        return
+    exclude = Path(_git("rev-parse", "--git-path", "info/exclude", cwd=root).stdout.strip())
+    if not exclude.is_absolute():
+        exclude = root / exclude
+    entry = f"/{rel}/"
+    existing = exclude.read_text(encoding="utf-8").splitlines() if exclude.exists() else []
+    if entry not in existing:
+        exclude.parent.mkdir(parents=True, exist_ok=True)
+        with exclude.open("a", encoding="utf-8") as f:
+            f.write(entry + "\n")
+
+
+def prepare_worktree(root: Path, path: Path, head: str) -> None:
+    """Create the worktree or reset an existing one to ``head``.
+
+    Ignored files (dependency folders, build caches) are kept on reuse.
+    """
+    if (path / ".git").exists():
+        _git("checkout", "--detach", "--force", head, cwd=path)
+        _git("clean", "-fd", cwd=path)
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _git("worktree", "add", "--detach", "--force", str(path), head, cwd=root)
+
+
+def _start_worker(worker: Worker, workers: int, tests: list[dict]) -> None:
+    worker.shard_file.write_text(json.dumps({
+        "worker": worker.index + 1,
+        "workers": workers,
+        "tests": [
+            {"index": i, "category": tests[i].get("category", "Unknown"),
+             "description": tests[i].get("description", "")}
+            for i in worker.shard
+        ],
+    }, indent=2), encoding="utf-8")
+    env = {**os.environ, "HARNESS_SHARD_FILE": str(worker.shard_file.resolve())}
+    log = worker.log_file.open("w", encoding="utf-8")
+    worker.started = time.time()
+    worker.proc = subprocess.Popen(
+        ["./run_cycle.sh"], cwd=worker.path, env=env, stdout=log, stderr=subprocess.STDOUT,
+        start_new_session=True,
+    )
+    log.close()
+
+
+def _wait_workers(workers: list[Worker], timeout: int) -> None:
+    while any(w.rc is None for w in workers):
+        for w in workers:
+            if w.rc is not None or w.proc is None:
+                continue
+            rc = w.proc.poll()
+            if rc is not None:
+                w.rc = rc
+            elif timeout > 0 and time.time() - w.started > timeout:
+                os.killpg(w.proc.pid, signal.SIGKILL)
+                w.proc.wait()
+                w.rc = 124
+                w.timed_out = True
+        time.sleep(1)
+
+
+def run_serial_fallback(root: Path, worker: Worker, timeout: int) -> int:
+    """Re-run a shard whose merge conflicted directly in the main checkout."""
+    env = {**os.environ, "HARNESS_SHARD_FILE": str(worker.shard_file.resolve())}
+    with worker.log_file.open("a", encoding="utf-8") as log:
+        log.write("\n==> serial fallback in main checkout\n")
+        log.flush()
+        # Own process group, so a timeout also stops codex before _rollback resets the checkout
+        proc = subprocess.Popen(["./run_cycle.sh"], cwd=root, env=env, stdout=log, stderr=subprocess.STDOUT,
+                                start_new_session=True)
+        try:
+            return proc.wait(timeout=timeout or None)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            proc.wait()
+            log.write(f"\n==> serial fallback killed after {timeout}s\n")
+            return 124
+
+
+def _rollback(root: Path, base: str, name: str, untracked_before: set[str], config: dict[str, object],
+              collector: MetricsCollector, log_dir: Path) -> None:
+    """Undo a failed serial fallback (including its commits), keeping a backup like the serial loop."""
+    snapshots = Snapshotter(root, keep=int(config.get("snapshot_keep", 20)))
+    log_rel = None
+    if log_dir.resolve().is_relative_to(root.resolve()):
+        log_rel = log_dir.resolve().relative_to(root.resolve())
+
+    def harness_output(path: str) -> bool:
+        return path == str(collector.metrics_file) or (log_rel is not None and Path(path).is_relative_to(log_rel))
+
+    try:
+        untracked = snapshots.status()[1]
+        commit = snapshots.rollback(
+            base, name, f"FAILED_PARALLEL_FALLBACK: Backup before rollback ({name})",
+            ignore_untracked=untracked_before | {p for p in untracked if harness_output(p)}, keep=harness_output,
+        )
+    except SnapshotError as e:
+        _log("WARNING", f"Snapshot rollback failed ({e}); falling back to git reset --hard", log_dir)
+        _git("reset", "--hard", base, cwd=root, check=False)
+        return
+    if commit:
+        _log("INFO", f"Backup saved as {snapshots.namespace}{name} ({commit[:10]})", log_dir)
+
+
+def run_round(root: Path, config: dict[str, object], round_no: int, iteration: int,
+              collector: MetricsCollector, log_dir: Path) -> tuple[int, int]:
+    """Run one parallel round. Returns (next iteration number, error count)."""
+    workers_n = int(config.get("parallel_workers", 1))
+    strategy = str(config.get("parallel_shard_strategy", "category"))
+    worktree_dir = root / str(config.get("parallel_worktree_dir", ".harness_worktrees"))
+    timeout = int(config.get("cycle_timeout", 1800))
+
+    tests = _load_tests(root)
+    baseline = (root / FEATURE_FILE).read_bytes()
+    shards = shard_failing(tests, workers_n, strategy)
+    head = _git("rev-parse", "HEAD", cwd=root).stdout.strip()
+    _exclude_worktree_dir(root, worktree_dir)
+
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    workers = []
+    for k, shard in enumerate(shards):
+        w = Worker(
+            index=k,
+            path=worktree_dir / f"worker-{k + 1}",
+            shard=shard,
+            shard_file=worktree_dir / f"shard-{k + 1}.json",
+            log_file=log_dir / f"cycle_{iteration + k}_w{k + 1}_{stamp}.log",
+        )
+        prepare_worktree(root, w.path, head)
+        w.failing_before = _count_failing(w.path)
+        _start_worker(w, len(shards), tests)
+        _log("INFO", f"round {round_no}: worker {k + 1} started on {len(shard)} failing tests ({w.log_file})",
+             log_dir)
+        workers.append(w)
+
+    _wait_workers(workers, timeout)
+
+    errors = 0
+    conflicts: list[Worker] = []
+    for w in workers:
+        w.commit = _git("rev-parse", "HEAD", cwd=w.path).stdout.strip()
+        duration = time.time() - w.started
+        failing_after = w.failing_before
+        success = w.rc == 0
+        error_msg = None
+        if w.timed_out:
+            error_msg = "timeout"
+        elif w.rc != 0:
+            error_msg = f"exit_code_{w.rc}"
+
+        validation = check_feature_list(w.path, baseline) if success and w.commit != head else "OK"
+        if validation != "OK":
+            success = False
+            errors += 1
+            error_msg = "corrupted_feature_list"
+            tag = f"parallel-invalid-{round_no}-w{w.index + 1}"
+            _git("tag", tag, w.commit, cwd=root, check=False)
+            _log("ERROR", f"worker {w.index + 1}: feature_list.json rejected ({validation}); "
+                          f"not merged, commit tagged as {tag}", log_dir)
+        elif success and w.commit != head:
+            ok, note = merge_worker(root, w.commit)
+            _log("INFO" if ok else "WARNING", f"worker {w.index + 1}: {note}", log_dir)
+            if ok:
+                failing_after = _count_failing(w.path)
+            else:
+                _git("tag", f"parallel-conflict-{round_no}-w{w.index + 1}", w.commit, cwd=root, check=False)
+                conflicts.append(w)
+        elif not success:
+            errors += 1
+            _log("ERROR", f"worker {w.index + 1} failed ({error_msg}, see {w.log_file})", log_dir)
+        else:
+            _log("INFO", f"worker {w.index + 1} made no commits", log_dir)
+
+        collector.record_cycle(
+            iteration + w.index, duration, success, w.failing_before, failing_after,
+            error_msg, w.timed_out, _prompt_version(root),
+        )
+
+    next_iteration = iteration + len(workers)
+    for w in conflicts:
+        _log("WARNING", f"worker {w.index + 1}: falling back to a serial cycle for its shard", log_dir)
+        before = _count_failing(root)
+        before_commit = _git("rev-parse", "HEAD", cwd=root).stdout.strip()
+        before_list = (root / FEATURE_FILE).read_bytes()
+        untracked_before = Snapshotter(root).status()[1]
+        started = time.time()
+        rc = run_serial_fallback(root, w, timeout)
+        error_msg = None if rc == 0 else ("timeout" if rc == 124 else f"exit_code_{rc}")
+        if rc == 0:
+            validation = check_feature_list(root, before_list)
+            if validation != "OK":
+                error_msg = "corrupted_feature_list"
+                _log("ERROR", f"worker {w.index + 1}: serial fallback broke feature_list.json ({validation})",
+                     log_dir)
+        if error_msg:
+            errors += 1
+            _rollback(root, before_commit, f"parallel-{round_no}-w{w.index + 1}-{error_msg}", untracked_before,
+                      config, collector, log_dir)
+        collector.record_cycle(
+            next_iteration, time.time() - started, error_msg is None, before, _count_failing(root),
+            error_msg, rc == 124, _prompt_version(root),
+        )
+        next_iteration += 1
+
+    return next_iteration, errors
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, help="override parallel_workers from harness.conf")
+    parser.add_argument("--strategy", choices=["category", "range"], help="override parallel_shard_strategy")
+    parser.add_argument("--rounds", type=int, default=0, help="stop after N rounds (0 = until green)")
+    args = parser.parse_args()
+
+    root = Path(".").resolve()
+    config = resolve({**DEFAULT_CONFIG, **load_config()})
+    if args.workers:
+        config["parallel_workers"] = args.workers
+    if args.strategy:
+        config["parallel_shard_strategy"] = args.strategy
+    log_dir = root / str(config.get("log_dir", "logs") or "logs")
+    max_errors = int(config.get("max_errors", 5))
+    collector = MetricsCollector()
+
+    if not (root / FEATURE_FILE).exists():
+        _log("ERROR", "feature_list.json fehlt. Erst run_init.sh ausführen.", log_dir)
+        return 2
+    if _git("status", "--porcelain", "--untracked-files=no", cwd=root).stdout.strip():
+        _log("ERROR", "Main checkout has uncommitted changes; commit or stash them first.", log_dir)
+        return 4
+
+    iteration = 1
+    errors = 0
+    round_no = 0
+    while True:
+        round_no += 1
+        if Path(".harness_stop").exists():
+            _log("INFO", "STOP requested. Exiting gracefully...", log_dir)
+            Path(".harness_stop").unlink()
+            return 0
+        while Path(".harness_pause").exists():
+            time.sleep(5)
+
+        failing = _count_failing(root)
+        if failing == 0:
+            _log("INFO", "All tests passing. Done.", log_dir)
+            collector.print_summary()
+            return 0
+
+        _log("INFO", f"round {round_no}: {failing} failing tests, "
+                     f"{config.get('parallel_workers')} workers", log_dir)
+        iteration, round_errors = run_round(root, config, round_no, iteration, collector, log_dir)
+        errors += round_errors
+        if errors > max_errors:
+            _log("ERROR", f"STOP: error_count={errors} exceeded MAX_ERRORS={max_errors}", log_dir)
+            collector.print_summary()
+            return 10
+        if args.rounds and round_no >= args.rounds:
+            return 0
+        time.sleep(float(config.get("sleep_secs", 2)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Prefetch for Autonomous Codex Harness
+Prepares the next cycle's inputs while the current iteration is still
+finishing (checkpoint, metrics, background push, sleep): the scheduled target
+tests, the rendered prompt and a warm page cache for the files that rank
+highest for the failing tests. The result is keyed to the commit, the
+feature_list.json content and the prompt file version it was built from;
+``take()`` discards it if any of them changed in the meantime (e.g. a
+rollback or a manual commit while paused).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from scripts.context_builder import rank_repo_files, warm_files
+from scripts.scheduler import Scheduler, render_targets, target_entries
+
+# Like context_builder, only the first failing tests steer file ranking
+RANKING_TESTS = 10
+
+
+def _file_version(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@dataclass
+class Prepared:
+    """Inputs for one cycle and the state they were built from."""
+
+    head: str
+    digest: str | None
+    prompt_version: tuple[int, int] | None
+    targets: list[int]
+    entries: list[dict[str, Any]]
+    prompt: str | None  # base prompt plus target section; None if the prompt file is missing
+    warmed: int
+    secs: float
+
+
+class Prefetcher:
+    """Builds ``Prepared`` inputs, either right away or in a background thread."""
+
+    def __init__(self, scheduler: Scheduler, prompt_file: str | Path, targets: int = 1, warm_count: int = 50,
+                 max_file_bytes: int = 200000, skip_dirs: set[str] | frozenset[str] = frozenset()):
+        self.scheduler = scheduler
+        self.prompt_file = Path(prompt_file)
+        self.targets = targets
+        self.warm_count = warm_count
+        self.max_file_bytes = max_file_bytes
+        self.skip_dirs = skip_dirs
+        self._thread: threading.Thread | None = None
+        self._result: Prepared | None = None
+        self._error: str | None = None
+
+    def prepare(self, head: str, digest: str | None, tests: list[dict]) -> Prepared:
+        started = time.perf_counter()
+        prompt_version = _file_version(self.prompt_file)
+        targets = self.scheduler.targets(tests, self.targets) if self.targets > 0 else []
+        entries = target_entries(tests, targets, self.scheduler.history)
+        prompt = None
+        if prompt_version is not None:
+            prompt = self.prompt_file.read_text(encoding="utf-8")
+            if entries:
+                prompt = prompt.rstrip() + "\n\n" + render_targets(entries)
+        warmed = 0
+        if self.warm_count > 0:
+            failing = [t for t in tests if not t.get("passes", False)][:RANKING_TESTS]
+            ranked = rank_repo_files(Path("."), failing, self.skip_dirs)[:self.warm_count]
+            warmed = warm_files([path for _, path in ranked], self.max_file_bytes)
+        return Prepared(head, digest, prompt_version, targets, entries, prompt, warmed,
+                        round(time.perf_counter() - started, 4))
+
+    def start(self, head: str, digest: str | None, tests: list[dict]) -> None:
+        """Prepare in the background; the tree must not change until the cycle that uses it."""
+        self.discard()
+
+        def run() -> None:
+            try:
+                self._result = self.prepare(head, digest, tests)
+            except (OSError, ValueError, KeyError, IndexError) as e:
+                self._error = str(e)
+
+        self._thread = threading.Thread(target=run, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def discard(self) -> None:
+        if self._thread is not None:
+            self._thread.join()
+        self._thread, self._result, self._error = None, None, None
+
+    def take(self, head: str, digest: str | None) -> tuple[Prepared | None, str]:
+        """The prefetched inputs if they still match ``head`` and ``digest``, with the reason if not."""
+        if self._thread is None:
+            return None, "nothing prefetched"
+        self._thread.join()
+        result, error = self._result, self._error
+        self._thread, self._result, self._error = None, None, None
+        if result is None:
+            return None, f"prefetch failed: {error}"
+        if result.head != head:
+            return None, f"HEAD moved from {result.head[:10]} to {head[:10]}"
+        if result.digest != digest:
+            return None, "feature_list.json changed"
+        if result.prompt_version != _file_version(self.prompt_file):
+            return None, f"{self.prompt_file} changed"
+        return result, "hit"
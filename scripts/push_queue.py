@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Background Push Queue for Autonomous Codex Harness
+Pushes commits and checkpoint tags from a worker thread so a slow or
+unreachable remote never delays the next cycle.
+"""
+from __future__ import annotations
+
+import subprocess
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+
+class PushQueue:
+    """Background git push worker, off the cycle critical path.
+
+    Pending pushes coalesce to the newest commit, so a slow remote never
+    causes a backlog. Failed pushes are retried with exponential backoff and
+    checkpoint tags are pushed in batches. Push health is tracked here,
+    separately from cycle health.
+    """
+
+    def __init__(
+        self,
+        remote: str,
+        log_file: str | Path,
+        backoff_base: float = 5.0,
+        backoff_max: float = 300.0,
+        tag_batch: int = 50,
+    ):
+        self.remote = remote
+        self.log_file = Path(log_file)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.tag_batch = tag_batch
+
+        self._cond = threading.Condition()
+        self._pending: tuple[str, str, float] | None = None  # (commit, branch, enqueued_at)
+        self._pending_tags: set[str] = set()
+        self._depth = 0
+        self._retry_at = 0.0
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+
+        self.pushes_ok = 0
+        self.pushes_failed = 0
+        self.consecutive_failures = 0
+        self.coalesced = 0
+        self.last_latency_secs: float | None = None
+        self.last_lag_secs: float | None = None
+        self.last_error: str | None = None
+        self.last_pushed_commit: str | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="push-queue", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, commit: str, branch: str) -> None:
+        """Schedule ``commit`` to be pushed to ``branch``, replacing any older pending commit."""
+        with self._cond:
+            if self._pending is not None:
+                self.coalesced += 1
+            # Keep the original enqueue time so lag covers the whole wait
+            enqueued_at = self._pending[2] if self._pending else time.time()
+            self._pending = (commit, branch, enqueued_at)
+            self._depth += 1
+            self._cond.notify()
+
+    def enqueue_tag(self, tag: str) -> None:
+        with self._cond:
+            self._pending_tags.add(tag)
+            self._cond.notify()
+
+    def stop(self, timeout: float = 60.0) -> bool:
+        """Flush what is pending (one attempt, no backoff) and stop. False if work remains."""
+        with self._cond:
+            self._stopping = True
+            self._retry_at = 0.0
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout)
+        with self._cond:
+            return self._pending is None and not self._pending_tags
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            return {
+                "queue_depth": self._depth,
+                "pending_tags": len(self._pending_tags),
+                "pushes_ok": self.pushes_ok,
+                "pushes_failed": self.pushes_failed,
+                "consecutive_failures": self.consecutive_failures,
+                "coalesced": self.coalesced,
+                "last_latency_secs": self.last_latency_secs,
+                "last_lag_secs": self.last_lag_secs,
+                "last_error": self.last_error,
+            }
+
+    # -----------------------------
+    # Worker
+    # -----------------------------
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    has_work = self._pending is not None or bool(self._pending_tags)
+                    if self._stopping and (not has_work or self._retry_at < 0):
+                        return
+                    wait = self._retry_at - time.time()
+                    if has_work and wait <= 0:
+                        break
+                    self._cond.wait(wait if has_work else None)
+                pending, self._pending = self._pending, None
+                tags = sorted(self._pending_tags)
+                self._pending_tags.clear()
+                depth, self._depth = self._depth, 0
+                final_attempt = self._stopping
+
+            # The branch update rides along with the first tag batch
+            started = time.time()
+            ok, error = True, None
+            failed_tags: list[str] = []
+            batches = [tags[i:i + self.tag_batch] for i in range(0, len(tags), self.tag_batch)] or [[]]
+            for n, batch in enumerate(batches):
+                refspecs = [f"refs/tags/{t}" for t in batch]
+                if n == 0 and pending:
+                    refspecs.insert(0, f"{pending[0]}:refs/heads/{pending[1]}")
+                if not refspecs:
+                    continue
+                batch_ok, batch_error = self._push(refspecs)
+                if not batch_ok:
+                    ok, error = False, batch_error
+                    failed_tags.extend(batch)
+                    if n == 0:
+                        # Remote is likely unreachable; keep the rest for the retry
+                        failed_tags.extend(t for later in batches[1:] for t in later)
+                        break
+            latency = time.time() - started
+
+            with self._cond:
+                self.last_latency_secs = round(latency, 2)
+                if ok:
+                    self.pushes_ok += 1
+                    self.consecutive_failures = 0
+                    self.last_error = None
+                    self._retry_at = 0.0
+                    if pending:
+                        self.last_pushed_commit = pending[0]
+                        self.last_lag_secs = round(time.time() - pending[2], 2)
+                    continue
+
+                self.pushes_failed += 1
+                self.consecutive_failures += 1
+                self.last_error = error
+                # Retry unless a newer commit replaced this one meanwhile
+                if pending and self._pending is None:
+                    self._pending = pending
+                    self._depth += depth
+                self._pending_tags.update(failed_tags)
+                if final_attempt:
+                    self._retry_at = -1.0
+                else:
+                    delay = min(self.backoff_max, self.backoff_base * 2 ** (self.consecutive_failures - 1))
+                    self._retry_at = time.time() + delay
+
+    def _push(self, refspecs: list[str]) -> tuple[bool, str | None]:
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        with self.log_file.open("a", encoding="utf-8") as log:
+            log.write(f"[{datetime.now().isoformat(timespec='seconds')}] git push {self.remote} {' '.join(refspecs)}\n")
+            log.flush()
+            result = subprocess.run(
+                ["git", "push", self.remote, *refspecs], stdout=log, stderr=subprocess.STDOUT,
+            )
+        if result.returncode != 0:
+            return False, f"git push exited with {result.returncode}"
+        return True, None
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Resource Accounting for Autonomous Codex Harness
+Runs the codex command and records what its process tree consumed: the
+tree is sampled from /proc (peak RSS of all processes together, I/O bytes,
+number of processes spawned) and resource.getrusage(RUSAGE_CHILDREN) is
+taken at exit for exact CPU times. Without /proc (macOS) only the getrusage
+numbers are available.
+"""
+from __future__ import annotations
+
+import json
+import os
+import resource
+import signal
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import Any
+
+
+PROC = Path("/proc")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+MB = 1024 * 1024
+TERMINATE_GRACE_SECS = 5
+# ru_maxrss is in KiB on Linux, in bytes on macOS
+MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+class _Terminated(Exception):
+    pass
+
+
+def _raise_terminated(signum, frame):
+    raise _Terminated()
+
+
+def _read_stat(pid: str) -> tuple[int, int, int] | None:
+    """(ppid, starttime, rss bytes) from /proc/<pid>/stat."""
+    try:
+        raw = (PROC / pid / "stat").read_bytes()
+    except OSError:
+        return None
+    # Fields after "comm)"; comm itself may contain spaces and parentheses
+    fields = raw[raw.rfind(b")") + 2:].split()
+    return int(fields[1]), int(fields[19]), int(fields[21]) * PAGE_SIZE
+
+
+def process_start_time(pid: int) -> int | None:
+    """Start time of ``pid`` (clock ticks since boot); with the pid it identifies a process."""
+    stat = _read_stat(str(pid))
+    return stat[1] if stat else None
+
+
+def _read_io(pid: int) -> tuple[int, int] | None:
+    """(read_bytes, write_bytes) from /proc/<pid>/io (storage layer, like inblock/oublock)."""
+    try:
+        lines = (PROC / str(pid) / "io").read_text().splitlines()
+    except OSError:
+        return None
+    values = dict(line.split(": ", 1) for line in lines if ": " in line)
+    return int(values.get("read_bytes", 0)), int(values.get("write_bytes", 0))
+
+
+class ProcessTreeSampler:
+    """Periodically walks /proc for the descendants of ``root_pid``.
+
+    Processes are keyed by (pid, start time) so a reused pid is not
+    mistaken for an earlier process; once seen, a process is followed even
+    after it was re-parented (e.g. a daemonized dev server).
+    """
+
+    def __init__(self, root_pid: int):
+        self.root_pid = root_pid
+        self.seen: set[tuple[int, int]] = set()
+        self.io: dict[tuple[int, int], tuple[int, int]] = {}
+        self.peak_rss = 0
+        self.samples = 0
+
+    @staticmethod
+    def supported() -> bool:
+        return (PROC / "self" / "stat").exists()
+
+    def sample(self) -> None:
+        stats: dict[int, tuple[int, int, int]] = {}
+        children: dict[int, list[int]] = {}
+        for entry in os.listdir(PROC):
+            if not entry.isdigit():
+                continue
+            stat = _read_stat(entry)
+            if stat is None:
+                continue
+            pid = int(entry)
+            stats[pid] = stat
+            children.setdefault(stat[0], []).append(pid)
+
+        tree = {pid for pid, (_, start, _) in stats.items() if (pid, start) in self.seen}
+        pending = [self.root_pid, *tree]
+        while pending:
+            pid = pending.pop()
+            if pid in stats:
+                tree.add(pid)
+            pending.extend(c for c in children.get(pid, ()) if c not in tree)
+
+        rss = 0
+        for pid in tree:
+            _, start, pid_rss = stats[pid]
+            key = (pid, start)
+            self.seen.add(key)
+            rss += pid_rss
+            io = _read_io(pid)
+            if io is not None:
+                self.io[key] = io
+        self.peak_rss = max(self.peak_rss, rss)
+        self.samples += 1
+
+    def totals(self) -> dict[str, int]:
+        return {
+            "peak_rss": self.peak_rss,
+            "read_bytes": sum(r for r, _ in self.io.values()),
+            "write_bytes": sum(w for _, w in self.io.values()),
+            "processes": len(self.seen),
+        }
+
+
+class ResourceMonitor:
+    """Run a command and account for the resources its process tree used."""
+
+    def __init__(self, sample_secs: float = 1.0):
+        self.sample_secs = sample_secs
+        self.stats: dict[str, Any] | None = None
+
+    def run(self, cmd: list[str]) -> int:
+        before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        proc = subprocess.Popen(cmd)
+        sampler = ProcessTreeSampler(proc.pid) if self.sample_secs > 0 and ProcessTreeSampler.supported() else None
+        stop = threading.Event()
+
+        def watch() -> None:
+            while True:
+                try:
+                    sampler.sample()
+                except (OSError, ValueError, IndexError):
+                    pass  # a process vanished or /proc changed mid-scan; take the next sample
+                if stop.wait(self.sample_secs):
+                    return
+
+        watcher = threading.Thread(target=watch, name="resource-sampler", daemon=True) if sampler else None
+        if watcher:
+            watcher.start()
+        # The harness stops a cycle with SIGTERM; still record what it used up to then
+        previous = None
+        if threading.current_thread() is threading.main_thread():
+            previous = signal.signal(signal.SIGTERM, _raise_terminated)
+        partial = False
+        try:
+            return proc.wait()
+        except _Terminated:
+            partial = True
+            try:
+                proc.wait(timeout=TERMINATE_GRACE_SECS)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+            raise SystemExit(128 + signal.SIGTERM)
+        finally:
+            if previous is not None:
+                signal.signal(signal.SIGTERM, previous)
+            stop.set()
+            if watcher:
+                watcher.join()
+            after = resource.getrusage(resource.RUSAGE_CHILDREN)
+            self.stats = self._stats(before, after, sampler, partial)
+
+    @staticmethod
+    def _stats(before, after, sampler: ProcessTreeSampler | None, partial: bool) -> dict[str, Any]:
+        # getrusage only covers descendants that were waited for; /proc also
+        # sees re-parented ones, so I/O takes whichever total is larger
+        read_bytes = (after.ru_inblock - before.ru_inblock) * 512
+        write_bytes = (after.ru_oublock - before.ru_oublock) * 512
+        stats: dict[str, Any] = {
+            "user_cpu_secs": round(after.ru_utime - before.ru_utime, 2),
+            "sys_cpu_secs": round(after.ru_stime - before.ru_stime, 2),
+            # Largest single process (the children's high-water mark, not a per-run delta)
+            "max_rss_mb": round(after.ru_maxrss * MAXRSS_UNIT / MB, 1),
+        }
+        if sampler is not None:
+            totals = sampler.totals()
+            stats.update(
+                peak_rss_mb=round(totals["peak_rss"] / MB, 1),
+                processes=totals["processes"],
+                samples=sampler.samples,
+            )
+            read_bytes = max(read_bytes, totals["read_bytes"])
+            write_bytes = max(write_bytes, totals["write_bytes"])
+        stats.update(read_mb=round(read_bytes / MB, 1), write_mb=round(write_bytes / MB, 1))
+        if partial:
+            stats["partial"] = True
+        return stats
+
+    def write(self, path: str | Path) -> None:
+        if self.stats is not None:
+            Path(path).write_text(json.dumps(self.stats), encoding="utf-8")
+
+
+def describe_resources(stats: dict[str, Any]) -> str:
+    """One-line summary for the cycle log."""
+    rss = stats.get("peak_rss_mb", stats["max_rss_mb"])
+    line = (f"cpu {stats['user_cpu_secs']}s user / {stats['sys_cpu_secs']}s sys, peak rss {rss} MB, "
+            f"io {stats['read_mb']} MB read / {stats['write_mb']} MB written")
+    if "processes" in stats:
+        line += f", {stats['processes']} processes"
+    return line
@@ -2,9 +2,14 @@ from __future__ import annotations
 
 import os
 import sys
+from pathlib import Path
 
 from scripts.config import load_config
 from scripts.legacy_cycle import run_legacy
+from scripts.parallel import shard_prompt
+from scripts.scheduler import target_prompt
+from scripts.sentinel import sentinel_prompt
+from scripts.services import services_prompt
 
 
 def main() -> int:
@@ -13,8 +18,28 @@ def main() -> int:
     env_override = os.getenv("CYCLE_PROMPT_FILE", "").strip()
     if env_override:
         prompt_file = env_override
+    # Prompt rendered by the harness (prompt file plus target section), possibly ahead of time
+    rendered_prompt = os.getenv("HARNESS_PROMPT_FILE", "").strip()
+    if rendered_prompt and Path(rendered_prompt).exists():
+        prompt_file = rendered_prompt
+    else:
+        rendered_prompt = ""
     codex_model = str(config.get("codex_model", ""))
-    run_legacy(prompt_file, codex_model)
+    extra_prompt = ""
+    shard_file = os.getenv("HARNESS_SHARD_FILE", "").strip()
+    if shard_file:
+        extra_prompt = shard_prompt(shard_file)
+    target_file = os.getenv("HARNESS_TARGET_FILE", "").strip()
+    if target_file and Path(target_file).exists() and not rendered_prompt:
+        extra_prompt += ("\n" if extra_prompt else "") + target_prompt(target_file)
+    services_file = os.getenv("HARNESS_SERVICES_FILE", "").strip()
+    if services_file and Path(services_file).exists():
+        extra_prompt += ("\n" if extra_prompt else "") + services_prompt(services_file)
+    sentinel_file = os.getenv("HARNESS_SENTINEL_FILE", "").strip()
+    if sentinel_file and Path(sentinel_file).exists():
+        extra_prompt += ("\n" if extra_prompt else "") + sentinel_prompt(sentinel_file)
+    run_legacy(prompt_file, codex_model, extra_prompt, float(config.get("resource_sample_secs", 1.0)),
+               str(config.get("codex_bin", "codex")))
     return 0
 
 
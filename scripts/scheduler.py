@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Test Scheduler for Autonomous Codex Harness
+Keeps a per-test history (attempts, time spent, flips to pass, regressions,
+cycle ids) and uses it to pick the failing test(s) each cycle should target.
+Priority is the order in feature_list.json; tests the agent already failed
+on, or that have eaten a lot of cycle time, are pushed back so a cycle is
+spent where a fix is most likely.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any
+
+from scripts.config import load_config
+from scripts.feature_check import FeatureList, FeatureListError
+
+
+HISTORY_NAME = "test_history.json"  # under log_dir, never committed by the agent
+MAX_CYCLES_PER_TEST = 10
+
+
+def _fingerprint(test: dict) -> str:
+    """Short hash of the description, so a re-baselined list does not inherit history."""
+    return hashlib.sha1(str(test.get("description", "")).encode("utf-8")).hexdigest()[:8]
+
+
+class TestHistory:
+    """Per-test attempt history, keyed by the test's index in feature_list.json."""
+
+    def __init__(self, path: str | Path = Path("logs") / HISTORY_NAME):
+        self.path = Path(path)
+        self._tests: dict[str, dict[str, Any]] | None = None
+
+    @property
+    def tests(self) -> dict[str, dict[str, Any]]:
+        if self._tests is None:
+            try:
+                self._tests = json.loads(self.path.read_text(encoding="utf-8")).get("tests", {})
+            except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+                self._tests = {}
+        return self._tests
+
+    def get(self, test_id: int, test: dict) -> dict[str, Any] | None:
+        entry = self.tests.get(str(test_id))
+        if entry is None or entry.get("desc") != _fingerprint(test):
+            return None
+        return entry
+
+    def _entry(self, test_id: int, test: dict) -> dict[str, Any]:
+        entry = self.get(test_id, test)
+        if entry is None:
+            entry = self.tests[str(test_id)] = {
+                "desc": _fingerprint(test), "attempts": 0, "secs": 0.0, "passes": 0, "regressions": 0, "cycles": [],
+            }
+        return entry
+
+    def avg_attempt_secs(self) -> float:
+        attempts = sum(e["attempts"] for e in self.tests.values())
+        return sum(e["secs"] for e in self.tests.values()) / attempts if attempts else 0.0
+
+    def record(self, cycle_id: str, tests: list[dict], targets: list[int], duration_secs: float,
+               outcome: str, to_pass: list[int] | None = None, to_fail: list[int] | None = None) -> None:
+        """Record one cycle.
+
+        Targets and tests that flipped to pass count as attempts and share the
+        cycle's duration; ``outcome`` ("failed", "timeout", ...) is stored for
+        targets that did not pass. Tests that flipped back to failing count as
+        regressions.
+        """
+        to_pass, to_fail = to_pass or [], to_fail or []
+        worked = list(dict.fromkeys([*targets, *to_pass]))
+        share = duration_secs / len(worked) if worked else 0.0
+        passed = set(to_pass)
+        for test_id in worked:
+            if not 0 <= test_id < len(tests):
+                continue
+            entry = self._entry(test_id, tests[test_id])
+            entry["attempts"] += 1
+            entry["secs"] = round(entry["secs"] + share, 1)
+            result = "passed" if test_id in passed else outcome
+            if test_id in passed:
+                entry["passes"] += 1
+            entry["cycles"] = (entry["cycles"] + [{"cycle": cycle_id, "outcome": result}])[-MAX_CYCLES_PER_TEST:]
+        for test_id in to_fail:
+            if not 0 <= test_id < len(tests):
+                continue
+            entry = self._entry(test_id, tests[test_id])
+            entry["regressions"] += 1
+            entry["cycles"] = (entry["cycles"] + [{"cycle": cycle_id, "outcome": "regressed"}])[-MAX_CYCLES_PER_TEST:]
+        self.save()
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"tests": self.tests}, indent=1), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+class Scheduler:
+    """Pick the failing tests a cycle should target.
+
+    score = rank + retry_penalty * failed attempts + cost_penalty * time spent / average attempt
+
+    ``rank`` is the position among failing tests (feature_list.json order is
+    the priority order); the lowest score wins. A test whose latest
+    recorded event is a regression starts from rank 0, since it passed
+    before and is usually quick to restore; once a cycle has worked on it
+    again it falls back to its normal rank.
+    """
+
+    def __init__(self, history: TestHistory, retry_penalty: float = 5.0, cost_penalty: float = 2.0):
+        self.history = history
+        self.retry_penalty = retry_penalty
+        self.cost_penalty = cost_penalty
+
+    def score(self, rank: int, test_id: int, test: dict, avg_secs: float) -> float:
+        entry = self.history.get(test_id, test)
+        if entry is None:
+            return float(rank)
+        if entry["cycles"] and entry["cycles"][-1]["outcome"] == "regressed":
+            rank = 0
+        failed = entry["attempts"] - entry["passes"]
+        cost = entry["secs"] / avg_secs if avg_secs > 0 else 0.0
+        return rank + self.retry_penalty * failed + self.cost_penalty * cost
+
+    def targets(self, tests: list[dict], count: int = 1) -> list[int]:
+        avg_secs = self.history.avg_attempt_secs()
+        failing = [i for i, t in enumerate(tests) if not t.get("passes", False)]
+        scored = sorted(
+            (self.score(rank, test_id, tests[test_id], avg_secs), rank, test_id)
+            for rank, test_id in enumerate(failing)
+        )
+        return [test_id for _, _, test_id in scored[:max(count, 0)]]
+
+
+def target_entries(tests: list[dict], targets: list[int], history: TestHistory) -> list[dict[str, Any]]:
+    """What the prompt and cycle_target.json say about each target test."""
+    entries = []
+    for test_id in targets:
+        test = tests[test_id]
+        entry = history.get(test_id, test) or {}
+        entries.append({
+            "index": test_id,
+            "category": test.get("category", ""),
+            "description": test.get("description", ""),
+            "attempts": entry.get("attempts", 0),
+            "last_outcome": entry["cycles"][-1]["outcome"] if entry.get("cycles") else None,
+        })
+    return entries
+
+
+def write_target_file(path: str | Path, cycle_id: str, entries: list[dict[str, Any]]) -> None:
+    Path(path).write_text(json.dumps({"cycle": cycle_id, "tests": entries}, indent=2), encoding="utf-8")
+
+
+def render_targets(entries: list[dict[str, Any]]) -> str:
+    """The prompt section that tells a cycle which test(s) to work on."""
+    lines = [
+        "### CYCLE TARGET (HARNESS)",
+        "",
+        "The harness scheduled the following failing test(s) from feature_list.json (0-based index)",
+        "for this session, based on priority and earlier attempts. Work on these first instead of",
+        "choosing a feature yourself; only move on to other failing tests once they pass.",
+        "",
+    ]
+    for entry in entries:
+        line = f"- #{entry['index']} [{entry['category']}] {entry['description']}"
+        if entry["attempts"]:
+            line += f" (attempted {entry['attempts']}x before, last: {entry['last_outcome']})"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def target_prompt(target_file: str | Path) -> str:
+    """Render the target section from a cycle_target.json."""
+    return render_targets(json.loads(Path(target_file).read_text(encoding="utf-8"))["tests"])
+
+
+def main() -> int:
+    if len(sys.argv) < 2 or sys.argv[1] not in ("show", "next"):
+        print("Usage: python3 -m scripts.scheduler <command> [args...]")
+        print("Commands:")
+        print("  show [n]        tests with the most attempts (default 20)")
+        print("  next [n]        the tests the next cycle would target (default 1)")
+        return 1
+
+    config = load_config()
+    history = TestHistory(Path(str(config.get("log_dir", "logs"))) / HISTORY_NAME)
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else (20 if sys.argv[1] == "show" else 1)
+    try:
+        tests = FeatureList().tests()
+    except FeatureListError as e:
+        print(f"ERROR: feature_list.json: {e.code}")
+        return 1
+
+    if sys.argv[1] == "show":
+        rows = sorted(history.tests.items(), key=lambda kv: kv[1]["attempts"], reverse=True)[:n]
+        print(f"{'id':>6} {'tries':>5} {'pass':>4} {'regr':>4} {'secs':>8}  last")
+        for test_id, e in rows:
+            last = e["cycles"][-1]["outcome"] if e["cycles"] else "-"
+            print(f"{test_id:>6} {e['attempts']:>5} {e['passes']:>4} {e['regressions']:>4} {e['secs']:>8.0f}  {last}")
+        return 0
+
+    scheduler = Scheduler(history, float(config.get("scheduler_retry_penalty", 5)),
+                          float(config.get("scheduler_cost_penalty", 2)))
+    for test_id in scheduler.targets(tests, n):
+        print(f"#{test_id} [{tests[test_id].get('category', '')}] {tests[test_id].get('description', '')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Regression Sentinels for Autonomous Codex Harness
+Cheap, scripted re-checks of passing tests, run by the harness between
+cycles instead of by the agent. Sentinels are declared in
+harness_sentinels.json (test index, shell command, files the test depends
+on). A sentinel is only re-run when one of its files changed since the
+commit it last passed at; results and per-test timings are cached and
+handed to the next cycle so it can skip redundant re-verification.
+
+harness_sentinels.json:
+  {"sentinels": [
+    {"test": 12, "cmd": "npx playwright test e2e/login.spec.ts", "files": ["src/auth/*", "e2e/login*"]}
+  ]}
+
+`files` are fnmatch patterns relative to the repo root (`*` also matches
+`/`); an empty list means "re-run on any change".
+"""
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from scripts.config import load_config
+from scripts.feature_check import FeatureList, FeatureListError
+from scripts.snapshot import Snapshotter
+
+
+SENTINEL_FILE = "harness_sentinels.json"
+CACHE_NAME = "sentinel_cache.json"
+OUTPUT_TAIL_BYTES = 2000
+HARNESS_OUTPUT_PREFIXES = ("harness_metrics.jsonl", ".harness_", ".feature_store/")
+
+
+@dataclass
+class SentinelResult:
+    test: int
+    ok: bool
+    secs: float
+    commit: str
+    cached: bool
+    detail: str = ""
+
+
+def _git(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], capture_output=True, text=True)
+
+
+class SentinelRunner:
+    def __init__(self, definitions: str | Path = SENTINEL_FILE, cache: str | Path | None = None,
+                 log_dir: str | Path = "logs", workers: int = 4, timeout: int = 120):
+        self.definitions = Path(definitions)
+        self.cache_file = Path(cache) if cache else Path(log_dir) / CACHE_NAME
+        self.log_dir = Path(log_dir) / "sentinels"
+        self.workers = max(1, workers)
+        self.timeout = timeout
+
+    def load(self) -> list[dict[str, Any]]:
+        if not self.definitions.exists():
+            return []
+        data = json.loads(self.definitions.read_text(encoding="utf-8"))
+        sentinels = data.get("sentinels", []) if isinstance(data, dict) else data
+        return [s for s in sentinels if isinstance(s, dict) and isinstance(s.get("test"), int) and s.get("cmd")]
+
+    def _cache(self) -> dict[str, dict[str, Any]]:
+        try:
+            return json.loads(self.cache_file.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    @staticmethod
+    def _key(sentinel: dict[str, Any]) -> str:
+        raw = json.dumps([sentinel["cmd"], sentinel.get("files", [])], sort_keys=True)
+        return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+    def _changed_since(self, commits: set[str], dirty: set[str]) -> dict[str, set[str] | None]:
+        """Changed paths per commit (None if the commit is unknown), one git diff per commit."""
+        changed: dict[str, set[str] | None] = {}
+        for commit in commits:
+            result = _git("diff", "--name-only", commit, "HEAD")
+            changed[commit] = set(result.stdout.splitlines()) | dirty if result.returncode == 0 else None
+        return changed
+
+    def plan(self, tests: list[dict]) -> tuple[list[dict[str, Any]], list[SentinelResult]]:
+        """Split sentinels for passing tests into (to run, still valid from cache)."""
+        cache = self._cache()
+        candidates = [s for s in self.load() if 0 <= s["test"] < len(tests) and tests[s["test"]].get("passes")]
+        changed_tree, untracked = Snapshotter().status()
+        # Files the harness itself writes between cycles never invalidate a sentinel
+        dirty = {p for p in changed_tree | untracked
+                 if not (Path(p).is_relative_to(self.log_dir.parent) or p.startswith(HARNESS_OUTPUT_PREFIXES))}
+        changed = self._changed_since(
+            {c["commit"] for s in candidates if (c := cache.get(str(s["test"]))) and c.get("ok")}, dirty,
+        )
+        to_run: list[dict[str, Any]] = []
+        cached: list[SentinelResult] = []
+        for sentinel in candidates:
+            entry = cache.get(str(sentinel["test"]))
+            if not entry or not entry.get("ok") or entry.get("key") != self._key(sentinel):
+                to_run.append(sentinel)
+                continue
+            paths = changed.get(entry["commit"])
+            patterns = sentinel.get("files") or ["*"]
+            if paths is None or any(fnmatch.fnmatch(p, pat) for p in paths for pat in patterns):
+                to_run.append(sentinel)
+            else:
+                cached.append(SentinelResult(sentinel["test"], True, entry["secs"], entry["commit"], True))
+        return to_run, cached
+
+    def _run_one(self, sentinel: dict[str, Any], head: str) -> SentinelResult:
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        log_path = self.log_dir / f"test_{sentinel['test']}.log"
+        timeout = int(sentinel.get("timeout", self.timeout))
+        started = time.monotonic()
+        with log_path.open("wb") as log:
+            proc = subprocess.Popen(sentinel["cmd"], shell=True, stdout=log, stderr=subprocess.STDOUT,
+                                    stdin=subprocess.DEVNULL, start_new_session=True)
+            try:
+                rc = proc.wait(timeout=timeout if timeout > 0 else None)
+                detail = "" if rc == 0 else f"exit code {rc}"
+            except subprocess.TimeoutExpired:
+                os.killpg(proc.pid, signal.SIGKILL)
+                proc.wait()
+                rc, detail = -1, f"timed out after {timeout}s"
+        secs = round(time.monotonic() - started, 2)
+        if rc != 0:
+            tail = log_path.read_bytes()[-OUTPUT_TAIL_BYTES:].decode(errors="replace").strip()
+            detail = f"{detail}: {tail.splitlines()[-1]}" if tail else detail
+        return SentinelResult(sentinel["test"], rc == 0, secs, head, False, detail)
+
+    def run(self, tests: list[dict]) -> list[SentinelResult]:
+        """Run stale sentinels (a thread pool of shell subprocesses, ``workers`` wide) and update the cache."""
+        to_run, results = self.plan(tests)
+        if to_run:
+            head = _git("rev-parse", "HEAD").stdout.strip()
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(to_run))) as pool:
+                results += pool.map(lambda s: self._run_one(s, head), to_run)
+            cache = self._cache()
+            keys = {s["test"]: self._key(s) for s in to_run}
+            for r in results:
+                if not r.cached:
+                    cache[str(r.test)] = {"key": keys[r.test], "commit": r.commit, "ok": r.ok, "secs": r.secs,
+                                          "at": datetime.now().isoformat(timespec="seconds")}
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_file.with_name(self.cache_file.name + ".tmp")
+            tmp.write_text(json.dumps(cache, indent=1), encoding="utf-8")
+            os.replace(tmp, self.cache_file)
+        return sorted(results, key=lambda r: r.test)
+
+
+def summarize(results: list[SentinelResult]) -> dict[str, Any]:
+    ran = [r for r in results if not r.cached]
+    return {
+        "total": len(results),
+        "ran": len(ran),
+        "cached": len(results) - len(ran),
+        "failed": [r.test for r in results if not r.ok],
+        "secs": round(sum(r.secs for r in ran), 2),
+    }
+
+
+def write_results(path: str | Path, results: list[SentinelResult], tests: list[dict]) -> None:
+    Path(path).write_text(json.dumps({
+        "head": _git("rev-parse", "HEAD").stdout.strip(),
+        "results": [{**asdict(r), "description": tests[r.test].get("description", "")} for r in results],
+    }, indent=2), encoding="utf-8")
+
+
+def sentinel_prompt(results_file: str | Path) -> str:
+    """Render the prompt section with the harness-side verification results."""
+    data = json.loads(Path(results_file).read_text(encoding="utf-8"))
+    results = data["results"]
+    if not results:
+        return ""
+
+    def label(test_id: int) -> str:
+        description = next(r["description"] for r in results if r["test"] == test_id)
+        return f"#{test_id} {description}"
+
+    passed = [r for r in results if r["ok"]]
+    failed = [r for r in results if not r["ok"]]
+    lines = ["### REGRESSION SENTINELS (HARNESS)", ""]
+    if passed:
+        lines += [
+            f"The harness re-verified these passing tests at the current HEAD ({data['head'][:10]}).",
+            "You do not need to re-verify them in STEP 3:",
+            "",
+        ]
+        lines += [f"- {label(r['test'])} ({r['secs']}s{', cached' if r['cached'] else ''})" for r in passed]
+        lines.append("")
+    if failed:
+        lines += [
+            "These tests are marked passing but their sentinel FAILED. Treat them as regressions",
+            "(STEP 3): mark them `\"passes\": false` and fix them before new work:",
+            "",
+        ]
+        lines += [f"- {label(r['test'])}: {r['detail']}" for r in failed]
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    if len(sys.argv) < 2 or sys.argv[1] not in ("run", "plan"):
+        print("Usage: python3 -m scripts.sentinel <command>")
+        print("Commands:")
+        print("  plan            show which sentinels would run and which are cached")
+        print("  run             run stale sentinels and print the results")
+        return 1
+
+    config = load_config()
+    runner = SentinelRunner(
+        str(config.get("sentinel_file", SENTINEL_FILE)), log_dir=str(config.get("log_dir", "logs")),
+        workers=int(config.get("sentinel_workers", 4)), timeout=int(config.get("sentinel_timeout", 120)),
+    )
+    try:
+        tests = FeatureList().tests()
+    except FeatureListError as e:
+        print(f"ERROR: feature_list.json: {e.code}")
+        return 1
+
+    if sys.argv[1] == "plan":
+        to_run, cached = runner.plan(tests)
+        for s in to_run:
+            print(f"run     #{s['test']}  {s['cmd']}")
+        for r in cached:
+            print(f"cached  #{r.test}  ok at {r.commit[:10]} ({r.secs}s)")
+        return 0
+
+    results = runner.run(tests)
+    for r in results:
+        status = "✓" if r.ok else "✗"
+        print(f"{status} #{r.test} {r.secs}s{' (cached)' if r.cached else ''} {r.detail}")
+    return 0 if all(r.ok for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Service Supervisor for Autonomous Codex Harness
+Keeps the project's dev servers warm across cycles instead of having every
+cycle run init.sh and cold-start them. Services are declared in
+harness_services.json; the harness starts them once, health-checks them
+over HTTP/TCP before each cycle and restarts only those that died, turned
+unhealthy or whose source files changed. Their status goes to the cycle
+prompt and the dashboard via logs/services.json.
+
+harness_services.json:
+  {"services": [
+    {"name": "backend", "cmd": "uvicorn app:app --port 8000", "cwd": "backend",
+     "health": "http://localhost:8000/health", "files": ["backend/*.py"],
+     "setup": "pip install -r requirements.txt", "setup_files": ["backend/requirements.txt"]},
+    {"name": "frontend", "cmd": "npm run dev", "cwd": "frontend", "health": "tcp://localhost:5173",
+     "setup": "npm install", "setup_files": ["frontend/package*.json"]}
+  ]}
+
+`files` / `setup_files` are fnmatch patterns relative to the repo root
+(`*` also matches `/`). Services without `files` are only restarted when
+they die or fail their health check (e.g. servers with hot reload).
+"""
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+from scripts.config import load_config
+from scripts.resources import PROC, process_start_time
+from scripts.snapshot import Snapshotter
+
+
+SERVICES_FILE = "harness_services.json"
+STATE_NAME = "services.json"
+HEALTH_TIMEOUT_SECS = 2.0
+STARTUP_TIMEOUT_SECS = 60
+STOP_TIMEOUT_SECS = 10
+POLL_SECS = 0.5
+
+
+def _git(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], capture_output=True, text=True)
+
+
+def check_health(target: str | None, timeout: float = HEALTH_TIMEOUT_SECS) -> tuple[bool, str]:
+    """(healthy, detail) for an http(s):// URL or tcp://host:port; no target counts as healthy."""
+    if not target:
+        return True, "no health check"
+    parsed = urlparse(target)
+    if parsed.scheme == "tcp":
+        try:
+            with socket.create_connection((parsed.hostname or "localhost", parsed.port or 80), timeout=timeout):
+                return True, "tcp ok"
+        except OSError as e:
+            return False, f"tcp: {e}"
+    try:
+        with urllib.request.urlopen(target, timeout=timeout) as response:
+            return True, f"http {response.status}"
+    except urllib.error.HTTPError as e:
+        # The server answers; only 5xx counts as unhealthy
+        return e.code < 500, f"http {e.code}"
+    except (urllib.error.URLError, OSError) as e:
+        return False, f"http: {getattr(e, 'reason', e)}"
+
+
+class ServiceSupervisor:
+    def __init__(self, definitions: str | Path = SERVICES_FILE, log_dir: str | Path = "logs"):
+        self.definitions = Path(definitions)
+        self.log_dir = Path(log_dir)
+        self.state_file = self.log_dir / STATE_NAME
+        self._procs: dict[str, subprocess.Popen] = {}
+
+    def load(self) -> list[dict[str, Any]]:
+        if not self.definitions.exists():
+            return []
+        data = json.loads(self.definitions.read_text(encoding="utf-8"))
+        services = data.get("services", []) if isinstance(data, dict) else data
+        return [s for s in services if isinstance(s, dict) and s.get("name") and s.get("cmd")]
+
+    def state(self) -> dict[str, dict[str, Any]]:
+        try:
+            return json.loads(self.state_file.read_text(encoding="utf-8")).get("services", {})
+        except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+            return {}
+
+    def _save(self, state: dict[str, dict[str, Any]]) -> None:
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_file.with_name(self.state_file.name + ".tmp")
+        tmp.write_text(json.dumps({"updated": datetime.now().isoformat(timespec="seconds"), "services": state},
+                                  indent=2), encoding="utf-8")
+        os.replace(tmp, self.state_file)
+
+    @staticmethod
+    def _key(spec: dict[str, Any]) -> str:
+        raw = json.dumps([spec["cmd"], spec.get("cwd", ""), spec.get("env", {})], sort_keys=True)
+        return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+    # -----------------------------
+    # Processes
+    # -----------------------------
+
+    def _alive(self, name: str, entry: dict[str, Any]) -> bool:
+        """Whether the process recorded in ``entry`` still runs.
+
+        A pid from the state file is only trusted together with its recorded
+        start time, so a pid reused after a crash or reboot is never taken
+        for (and signalled as) our service. Without /proc the pid alone counts.
+        """
+        pid = entry.get("pid")
+        proc = self._procs.get(name)
+        if proc is not None:
+            if proc.pid == pid:
+                return proc.poll() is None
+            proc.poll()  # restarted elsewhere (CLI); reap our old child
+            del self._procs[name]
+        if not pid:
+            return False
+        if PROC.is_dir():
+            started = process_start_time(pid)
+            return started is not None and started == entry.get("starttime")
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _stop_pid(self, name: str, entry: dict[str, Any]) -> None:
+        pid = entry.get("pid")
+        if not pid or not self._alive(name, entry):
+            return
+        try:
+            os.killpg(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        deadline = time.monotonic() + STOP_TIMEOUT_SECS
+        while time.monotonic() < deadline and self._alive(name, entry):
+            time.sleep(POLL_SECS / 5)
+        if self._alive(name, entry):
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        proc = self._procs.pop(name, None)
+        if proc is not None:
+            proc.wait()
+
+    def _run_setup(self, spec: dict[str, Any], log) -> bool:
+        log.write(f"\n==> [{datetime.now().isoformat(timespec='seconds')}] setup: {spec['setup']}\n".encode())
+        log.flush()
+        result = subprocess.run(spec["setup"], shell=True, cwd=spec.get("cwd") or None, stdout=log,
+                                stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+        return result.returncode == 0
+
+    def start(self, spec: dict[str, Any], entry: dict[str, Any], head: str, setup: bool) -> dict[str, Any]:
+        """Start ``spec`` (running setup first if asked) and wait until it is healthy."""
+        name = spec["name"]
+        self._stop_pid(name, entry)
+        log_path = self.log_dir / "services" / f"{name}.log"
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {**entry, "key": self._key(spec), "commit": head, "health": spec.get("health"),
+                 "pid": None, "starttime": None, "log": str(log_path)}
+        started = time.monotonic()
+        with log_path.open("ab") as log:
+            try:
+                if setup and spec.get("setup") and not self._run_setup(spec, log):
+                    return {**entry, "status": "failed", "detail": "setup failed"}
+                log.write(f"\n==> [{datetime.now().isoformat(timespec='seconds')}] start: {spec['cmd']}\n".encode())
+                log.flush()
+                proc = subprocess.Popen(spec["cmd"], shell=True, cwd=spec.get("cwd") or None, stdout=log,
+                                        stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, start_new_session=True,
+                                        env={**os.environ, **{k: str(v) for k, v in spec.get("env", {}).items()}})
+            except OSError as e:
+                return {**entry, "status": "failed", "detail": str(e)}
+        self._procs[name] = proc
+        entry.update(pid=proc.pid, starttime=process_start_time(proc.pid), started_at=datetime.now().isoformat(timespec="seconds"),
+                     restarts=entry.get("restarts", -1) + 1)
+
+        timeout = float(spec.get("startup_timeout", STARTUP_TIMEOUT_SECS))
+        while True:
+            if proc.poll() is not None:
+                return {**entry, "status": "failed", "detail": f"exited with {proc.returncode} during startup"}
+            ok, detail = check_health(spec.get("health"))
+            if ok:
+                return {**entry, "status": "healthy", "detail": detail,
+                        "startup_secs": round(time.monotonic() - started, 2)}
+            if time.monotonic() - started > timeout:
+                return {**entry, "status": "unhealthy", "detail": f"not healthy after {timeout:.0f}s ({detail})"}
+            time.sleep(POLL_SECS)
+
+    # -----------------------------
+    # Supervision
+    # -----------------------------
+
+    def _changed_since(self, commits: set[str]) -> dict[str, set[str] | None]:
+        changed_tree, untracked = Snapshotter().status()
+        dirty = changed_tree | untracked
+        changed: dict[str, set[str] | None] = {}
+        for commit in commits:
+            result = _git("diff", "--name-only", commit, "HEAD")
+            if result.returncode != 0:
+                changed[commit] = None
+                continue
+            # Harness state (services.json, service logs, test history) lives in log_dir
+            changed[commit] = {p for p in set(result.stdout.splitlines()) | dirty
+                               if not Path(p).is_relative_to(self.log_dir)}
+        return changed
+
+    @staticmethod
+    def _matches(paths: set[str] | None, patterns: list[str]) -> bool:
+        if not patterns:
+            return False
+        return paths is None or any(fnmatch.fnmatch(p, pat) for p in paths for pat in patterns)
+
+    def ensure(self) -> list[dict[str, Any]]:
+        """Start missing services, restart dead/unhealthy/changed ones; return their status."""
+        specs = self.load()
+        state = self.state()
+        head = _git("rev-parse", "HEAD").stdout.strip()
+        changed = self._changed_since({e["commit"] for e in state.values() if e.get("commit")})
+
+        for name in set(state) - {s["name"] for s in specs}:
+            self._stop_pid(name, state.pop(name))
+
+        for spec in specs:
+            name = spec["name"]
+            entry = state.get(name, {})
+            paths = changed.get(entry.get("commit", ""))
+            setup = not entry or self._matches(paths, spec.get("setup_files", []))
+            reason = None
+            if not self._alive(name, entry):
+                reason = "not running"
+            elif entry.get("key") != self._key(spec):
+                reason = "definition changed"
+            elif setup:
+                reason = "dependencies changed"
+            elif self._matches(paths, spec.get("files", [])):
+                reason = "source changed"
+            else:
+                ok, detail = check_health(spec.get("health"))
+                if not ok:
+                    reason = f"unhealthy ({detail})"
+                else:
+                    entry = {**entry, "status": "healthy", "detail": detail, "commit": head, "reason": None}
+            if reason:
+                entry = self.start(spec, {**entry, "reason": reason}, head, setup)
+            entry["last_check"] = datetime.now().isoformat(timespec="seconds")
+            state[name] = entry
+        self._save(state)
+        return [{"name": name, **entry} for name, entry in state.items()]
+
+    def restart(self, name: str) -> dict[str, Any]:
+        spec = next((s for s in self.load() if s["name"] == name), None)
+        if spec is None:
+            raise KeyError(name)
+        state = self.state()
+        head = _git("rev-parse", "HEAD").stdout.strip()
+        state[name] = self.start(spec, {**state.get(name, {}), "reason": "manual restart"}, head, False)
+        self._save(state)
+        return {"name": name, **state[name]}
+
+    def stop_all(self) -> None:
+        state = self.state()
+        for name, entry in state.items():
+            self._stop_pid(name, entry)
+            state[name] = {**entry, "status": "stopped", "pid": None, "starttime": None, "detail": "stopped by harness"}
+        if state:
+            self._save(state)
+
+
+def services_prompt(state_file: str | Path) -> str:
+    """Render the prompt section listing the services the harness keeps running."""
+    services = json.loads(Path(state_file).read_text(encoding="utf-8")).get("services", {})
+    if not services:
+        return ""
+    lines = [
+        "### RUNNING SERVICES (HARNESS)",
+        "",
+        "The harness already started these services and keeps them running between sessions.",
+        "In STEP 2, do NOT run init.sh or restart them unless one is listed as not healthy.",
+        "If you change server code that is not hot-reloaded, restart just that service:",
+        "`python3 -m scripts.services restart <name>` (logs: logs/services/<name>.log)",
+        "",
+    ]
+    for name, entry in services.items():
+        line = f"- {name}: {entry.get('status', 'unknown')}"
+        if entry.get("health"):
+            line += f", {entry['health']}"
+        if entry.get("status") != "healthy" and entry.get("detail"):
+            line += f" ({entry['detail']})"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def main() -> int:
+    commands = ("status", "ensure", "restart", "stop")
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        print("Usage: python3 -m scripts.services <command> [name]")
+        print("Commands:")
+        print("  status          show the last known state of all services")
+        print("  ensure          start / restart services as needed")
+        print("  restart <name>  restart one service")
+        print("  stop            stop all services")
+        return 1
+
+    config = load_config()
+    supervisor = ServiceSupervisor(str(config.get("services_file", SERVICES_FILE)), str(config.get("log_dir", "logs")))
+    command = sys.argv[1]
+    if command == "restart":
+        if len(sys.argv) < 3:
+            print("ERROR: restart needs a service name")
+            return 1
+        try:
+            entries = [supervisor.restart(sys.argv[2])]
+        except KeyError:
+            print(f"ERROR: no service named {sys.argv[2]} in {supervisor.definitions}")
+            return 1
+    elif command == "stop":
+        supervisor.stop_all()
+        print("✓ Services stopped")
+        return 0
+    elif command == "ensure":
+        entries = supervisor.ensure()
+    else:
+        entries = [{"name": name, **entry} for name, entry in supervisor.state().items()]
+
+    for entry in entries:
+        print(f"{entry['name']:<16} {entry.get('status', 'unknown'):<10} pid={entry.get('pid')} "
+              f"{entry.get('health') or ''} {entry.get('detail', '')}")
+    return 0 if all(e.get("status") == "healthy" for e in entries) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Snapshot & Rollback for Autonomous Codex Harness
+Backs up a failed cycle without `git add -A` on the real index: only the
+paths the cycle touched are hashed into a temporary index, written as a tree
+and kept as a commit under refs/harness/backups/. Rollback then restores just
+those paths, so the cost scales with the size of the diff, not the repo.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+from typing import Callable
+
+
+SNAPSHOT_NAMESPACE = "refs/harness/backups/"
+
+
+class SnapshotError(Exception):
+    """A git plumbing command used for snapshots failed."""
+
+
+class Snapshotter:
+    def __init__(self, root: str | Path = ".", keep: int = 20, namespace: str = SNAPSHOT_NAMESPACE):
+        self.root = Path(root)
+        self.keep = keep
+        self.namespace = namespace
+
+    def _git(self, *args: str, stdin: bytes | None = None, env: dict[str, str] | None = None,
+             check: bool = True) -> subprocess.CompletedProcess:
+        result = subprocess.run(
+            ["git", *args], cwd=self.root, input=stdin, capture_output=True,
+            env={**os.environ, "GIT_LITERAL_PATHSPECS": "1", **(env or {})},
+        )
+        if check and result.returncode != 0:
+            detail = result.stderr.decode(errors="replace").strip().splitlines()
+            raise SnapshotError(f"git {args[0]} failed: {detail[-1] if detail else result.returncode}")
+        return result
+
+    # -----------------------------
+    # Inspecting the working tree
+    # -----------------------------
+
+    def status(self) -> tuple[set[str], set[str]]:
+        """Return (changed tracked paths, untracked paths) from `git status --porcelain -z`."""
+        out = self._git("status", "--porcelain", "-z", "--untracked-files=all").stdout
+        changed: set[str] = set()
+        untracked: set[str] = set()
+        entries = out.split(b"\0")
+        i = 0
+        while i < len(entries):
+            entry = entries[i]
+            i += 1
+            if len(entry) < 4:
+                continue
+            code, path = entry[:2], entry[3:].decode(errors="surrogateescape")
+            if code == b"??":
+                untracked.add(path)
+                continue
+            changed.add(path)
+            if code[:1] in (b"R", b"C"):
+                # Renames/copies are followed by the source path
+                changed.add(entries[i].decode(errors="surrogateescape"))
+                i += 1
+        return changed, untracked
+
+    def has_changes(self) -> bool:
+        changed, untracked = self.status()
+        return bool(changed or untracked)
+
+    def touched_paths(self, base: str, ignore: set[str] | frozenset[str] = frozenset()) -> list[str]:
+        """Paths that differ from ``base``: commits since base plus the working tree.
+
+        Untracked paths listed in ``ignore`` (typically those that already
+        existed before the cycle) are left alone.
+        """
+        changed, untracked = self.status()
+        committed = self._git("diff", "--name-only", "-z", base, "HEAD").stdout
+        paths = changed | {p.decode(errors="surrogateescape") for p in committed.split(b"\0") if p}
+        paths |= untracked - set(ignore)
+        return sorted(paths)
+
+    # -----------------------------
+    # Snapshot / restore
+    # -----------------------------
+
+    def snapshot(self, name: str, paths: list[str], message: str) -> str | None:
+        """Record HEAD plus the current content of ``paths`` as refs/harness/backups/<name>.
+
+        Works on a copy of the index, so the real index and the working tree
+        are untouched and unrelated files are never re-hashed.
+        """
+        if not paths:
+            return None
+        tree = self._write_tree(paths)
+        head = self._git("rev-parse", "HEAD").stdout.decode().strip()
+        commit = self._git("commit-tree", tree, "-p", head, "-m", message).stdout.decode().strip()
+        self._git("update-ref", "-m", message, self.namespace + name, commit)
+        return commit
+
+    def worktree_tree(self, exclude: Callable[[str], bool] | None = None) -> str:
+        """Tree object of the working tree, untracked (not ignored) files included.
+
+        Like ``snapshot()``, only changed and untracked paths are hashed into
+        a copy of the index; ``exclude`` leaves matching paths at their
+        indexed state (untracked ones out).
+        """
+        changed, untracked = self.status()
+        return self._write_tree(sorted(p for p in changed | untracked if not (exclude and exclude(p))))
+
+    def _write_tree(self, paths: list[str]) -> str:
+        """Write the index plus the current content of ``paths`` as a tree, via a temporary index."""
+        index = Path(self._git("rev-parse", "--git-path", "index").stdout.decode().strip())
+        if not index.is_absolute():
+            index = self.root / index
+        temp_index = index.with_name("index.harness-snapshot")
+        env = {"GIT_INDEX_FILE": str(temp_index)}
+        try:
+            if index.exists():
+                shutil.copyfile(index, temp_index)
+            else:
+                self._git("read-tree", "HEAD", env=env)
+            if paths:
+                self._git("update-index", "--add", "--remove", "-z", "--stdin",
+                          stdin=b"\0".join(p.encode(errors="surrogateescape") for p in paths) + b"\0", env=env)
+            return self._git("write-tree", env=env).stdout.decode().strip()
+        finally:
+            temp_index.unlink(missing_ok=True)
+
+    def restore(self, base: str, paths: list[str], keep: Callable[[str], bool] | None = None) -> None:
+        """Move HEAD back to ``base`` and reset only ``paths`` to their state there.
+
+        New paths matching ``keep`` are unstaged but stay in the working tree.
+        """
+        self._git("reset", "--soft", base)
+        if not paths:
+            return
+        in_base = self._paths_in(base, paths)
+        existing = [p for p in paths if p in in_base]
+        added = [p for p in paths if p not in in_base]
+
+        if existing:
+            self._git("restore", f"--source={base}", "--staged", "--worktree",
+                      "--pathspec-from-file=-", "--pathspec-file-nul",
+                      stdin=b"\0".join(p.encode(errors="surrogateescape") for p in existing) + b"\0")
+        if added:
+            self._git("rm", "--cached", "--force", "--quiet", "--ignore-unmatch", "-r",
+                      "--pathspec-from-file=-", "--pathspec-file-nul",
+                      stdin=b"\0".join(p.encode(errors="surrogateescape") for p in added) + b"\0")
+            for rel in added:
+                if keep is not None and keep(rel):
+                    continue
+                path = self.root / rel
+                if path.is_file() or path.is_symlink():
+                    path.unlink()
+                    self._prune_empty_dirs(path.parent)
+
+    def _paths_in(self, commit: str, paths: list[str]) -> set[str]:
+        """Subset of ``paths`` that exist in ``commit`` (one cat-file call, no tree walk)."""
+        query = "".join(f"{commit}:{p}\n" for p in paths).encode(errors="surrogateescape")
+        out = self._git("cat-file", "--batch-check=%(objecttype)", stdin=query).stdout.decode().splitlines()
+        return {p for p, line in zip(paths, out) if not line.endswith(" missing")}
+
+    def _prune_empty_dirs(self, directory: Path) -> None:
+        root = self.root.resolve()
+        directory = directory.resolve()
+        while directory != root and root in directory.parents:
+            try:
+                directory.rmdir()
+            except OSError:
+                return
+            directory = directory.parent
+
+    def rollback(self, base: str, name: str, message: str,
+                 ignore_untracked: set[str] | frozenset[str] = frozenset(),
+                 keep: Callable[[str], bool] | None = None) -> str | None:
+        """Snapshot everything the cycle touched, then restore it to ``base``."""
+        paths = self.touched_paths(base, ignore_untracked)
+        commit = self.snapshot(name, paths, message)
+        self.restore(base, paths, keep)
+        self.prune()
+        return commit
+
+    # -----------------------------
+    # Housekeeping
+    # -----------------------------
+
+    def list(self) -> list[tuple[str, str, str]]:
+        """(ref, commit, subject) for every snapshot, newest first."""
+        out = self._git("for-each-ref", "--sort=-committerdate",
+                        "--format=%(refname)%00%(objectname)%00%(subject)", self.namespace).stdout.decode()
+        return [tuple(line.split("\0", 2)) for line in out.splitlines() if line]
+
+    def prune(self) -> int:
+        """Drop all but the newest ``keep`` snapshots and let git pack if needed."""
+        if self.keep <= 0:
+            return 0
+        stale = self.list()[self.keep:]
+        if stale:
+            self._git("update-ref", "--stdin", stdin="".join(f"delete {ref}\n" for ref, _, _ in stale).encode())
+            self._git("pack-refs", "--all", check=False)
+        self._git("gc", "--auto", "--quiet", check=False)
+        return len(stale)
+
+
+def main() -> int:
+    if len(sys.argv) < 2 or sys.argv[1] not in ("list", "prune"):
+        print("Usage: snapshot.py <command> [args...]")
+        print("Commands:")
+        print("  list            show failed-cycle backups (newest first)")
+        print("  prune [keep]    keep only the newest N backups (default 20)")
+        return 1
+
+    if sys.argv[1] == "list":
+        for ref, commit, subject in Snapshotter().list():
+            print(f"{commit[:10]}  {ref}  {subject}")
+        return 0
+
+    keep = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    removed = Snapshotter(keep=keep).prune()
+    print(f"✓ Pruned {removed} backup(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())